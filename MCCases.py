@@ -0,0 +1,242 @@
+import numpy as np
+from MCOutliers import cornerOffsets, cubeCentres, outlierReachable, cubePairs, pairCut, \
+isOutlierCase
+from connectedComponents import forwardOffsets
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Marching cubes case numbers of all cubes of a thresholded field,
+# computed at once by shifting and OR-ing the 8 corner views of the
+# mask. The bit order of the corners is the one used by
+# extractStructuresMC.find_case_number (see MCOutliers.cornerOffsets).
+
+# Along a non-periodic axis of length n there are n + 1 cubes: entry a
+# holds the cube with lower corner a - 1, and corners outside the field
+# count as empty. Along a periodic axis there are n cubes: entry a holds
+# the cube with lower corner a and the corners wrap around.
+
+def _periodic_axes(_periodic):
+
+	if np.ndim(_periodic) == 0:
+		return (bool(_periodic),)*3
+
+	return tuple(bool(v) for v in _periodic)
+
+def _case_slab(_mask, a0, a1, _periodic):
+
+	# Case numbers of the cubes a0 to a1 - 1 along x. For a periodic x
+	# axis a0 and a1 may lie outside the field and wrap around.
+
+	xlen, ylen, zlen = np.shape(_mask)
+	_p = [0 if v else 1 for v in _periodic]
+
+	_rows = np.arange(a0 - _p[0], a1 - _p[0] + 1)
+
+	if _periodic[0]:
+		_slab = np.asarray(_mask[_rows % xlen], dtype = bool)
+	else:
+		_slab = np.zeros((len(_rows), ylen, zlen), dtype = bool)
+		_valid = np.nonzero((_rows >= 0) & (_rows < xlen))[0]
+		if len(_valid) > 0:
+			_slab[_valid[0]:_valid[-1] + 1] = _mask[_rows[_valid[0]]:_rows[_valid[-1]] + 1]
+
+	# Extend y and z by one layer of empty (or wrapped) corners
+
+	for _axis in (1, 2):
+		_width = [(0, 0)]*3
+		if _periodic[_axis]:
+			_width[_axis] = (0, 1)
+			_slab = np.pad(_slab, _width, mode = 'wrap')
+		else:
+			_width[_axis] = (1, 1)
+			_slab = np.pad(_slab, _width, mode = 'constant')
+
+	_n = (a1 - a0, ylen + _p[1], zlen + _p[2])
+	_codes = np.zeros(_n, dtype = np.uint8)
+
+	for _bit in range(8):
+		dx, dy, dz = cornerOffsets[_bit]
+		_corner = _slab[dx:dx + _n[0], dy:dy + _n[1], dz:dz + _n[2]].view(np.uint8)
+		_codes |= _corner << np.uint8(_bit)
+
+	return _codes
+
+def case_numbers(_mask, _periodic = False, _slabSize = 32, _out = None):
+
+	'''
+
+	Returns a uint8 volume with the MC case number of every cube of the
+	boolean 3D array _mask. _periodic is a bool or one bool per axis.
+	The volume is filled in slabs along x to bound the temporary memory.
+	_out may be a preallocated array (or memmap) of the right shape.
+
+	'''
+
+	_periodic = _periodic_axes(_periodic)
+	_shape = tuple(n + (0 if p else 1) for n, p in zip(np.shape(_mask), _periodic))
+
+	if _out is None:
+		_out = np.zeros(_shape, dtype = np.uint8)
+
+	for a0 in range(0, _shape[0], _slabSize):
+		a1 = min(a0 + _slabSize, _shape[0])
+		_out[a0:a1] = _case_slab(_mask, a0, a1, _periodic)
+
+	return _out
+
+def _shift(_volume, _axis, s, n, _periodic):
+
+	# _volume[p + s] along _axis for p = 0 .. n - 1
+
+	if _periodic and s < 0:
+		return np.concatenate((np.take(_volume, [n - 1], axis = _axis), \
+		np.take(_volume, np.arange(n - 1), axis = _axis)), axis = _axis)
+
+	return np.take(_volume, np.arange(s, s + n), axis = _axis)
+
+def correction_candidates(_mask, _periodic = False, _slabSize = 32, _out = None):
+
+	'''
+
+	Returns a uint8 volume of the shape of _mask. Bit ii is set for a
+	voxel if the MC correction of its sub-cube ii (cube ii + 1 in
+	extractStructuresMC) can hit an outlier case. _out may be a
+	preallocated array of that shape, e.g. a packedMask if only the
+	voxels with any bit set are needed.
+
+	'''
+
+	_periodic = _periodic_axes(_periodic)
+	xlen, ylen, zlen = np.shape(_mask)
+	_p = [0 if v else 1 for v in _periodic]
+
+	if _out is None:
+		_out = np.zeros((xlen, ylen, zlen), dtype = np.uint8)
+
+	for i0 in range(0, xlen, _slabSize):
+
+		i1 = min(i0 + _slabSize, xlen)
+		_candidates = np.zeros((i1 - i0, ylen, zlen), dtype = np.uint8)
+
+		# Cubes touching the voxels i0 .. i1 - 1 along x
+
+		_codes = _case_slab(_mask, i0 - 1 + _p[0], i1 + _p[0], _periodic)
+
+		for ii in range(8):
+
+			_reach = outlierReachable[ii][_codes].view(np.uint8)
+
+			# The cube of voxel p has its lower corner at p - offset
+
+			_offset = cornerOffsets[cubeCentres[ii]]
+			_reach = _reach[1 - _offset[0]:1 - _offset[0] + i1 - i0]
+			_reach = _shift(_reach, 1, _p[1] - _offset[1], ylen, _periodic[1])
+			_reach = _shift(_reach, 2, _p[2] - _offset[2], zlen, _periodic[2])
+
+			_candidates |= _reach << np.uint8(ii)
+
+		_out[i0:i1] = _candidates
+
+	return _out
+
+def link_cuts(_mask, _slabSize = 32):
+
+	'''
+
+	Order independent form of the MC correction of the non-periodic
+	boolean 3D array _mask. Yields (i0, i1, _cuts, _outliers) for slabs
+	of voxels i0 .. i1 - 1 along x, where _cuts[n] is True for a voxel p
+	if the link from p to p + forwardOffsets[n] is cut by the outlier
+	case of a cube holding both (see MCOutliers.pairCut), and _outliers
+	is the number of cubes with an outlier case among those with lower
+	corner i0 - 1 .. i1 - 2 along x (and i1 - 1 for the last slab), so
+	every cube is counted once.
+
+	'''
+
+	xlen, ylen, zlen = np.shape(_mask)
+	_periodic = (False, False, False)
+
+	for i0 in range(0, xlen, _slabSize):
+
+		i1 = min(i0 + _slabSize, xlen)
+		_cuts = np.zeros((len(forwardOffsets), i1 - i0, ylen, zlen), dtype = bool)
+
+		# Cubes touching the voxels i0 .. i1 - 1 along x
+
+		_codes = _case_slab(_mask, i0, i1 + 1, _periodic)
+		_outliers = int(np.count_nonzero(isOutlierCase[_codes[:i1 - i0 + (i1 == xlen)]]))
+
+		for _n, (_u, _v, _d) in enumerate(cubePairs):
+
+			_cut = pairCut[:, _n]
+			if not _cut.any():
+				continue
+
+			# The cube of voxel p (at corner u) has its lower corner at
+			# p - offset, i.e. entry p + 1 - offset
+
+			dx, dy, dz = 1 - cornerOffsets[_u]
+			_cuts[forwardOffsets.index(_d)] |= _cut[_codes[dx:dx + i1 - i0, \
+			dy:dy + ylen, dz:dz + zlen]]
+
+		yield i0, i1, _cuts, _outliers
+
+def wrapped_link_cuts(_mask, _shape, _periodic):
+
+	'''
+
+	MC correction of the links across the wrapped faces of the boolean
+	3D array _mask (of shape _shape, or padded beyond it). Returns a
+	dictionary from every periodic axis to an array _cuts of shape
+	(3, 3) + the shape of its face, where _cuts[d0 + 1, d1 + 1] is True
+	for a voxel p of the last plane along the axis if the link from p to
+	the voxel of the first plane shifted by (d0, d1) along the other
+	axes is cut by the outlier case of a wrapped cube holding both. The
+	corners of the wrapped cubes wrap along the other periodic axes and
+	are empty beyond the faces of the others.
+
+	'''
+
+	_periodic = _periodic_axes(_periodic)
+	_wrappedCuts = {}
+
+	for _axis in range(3):
+
+		if not _periodic[_axis]:
+			continue
+
+		_others = [a for a in range(3) if a != _axis]
+
+		# The last and the first plane as a slab of two planes, extended
+		# by one wrapped layer along the other periodic axes
+
+		_planes = []
+		for v in (_shape[_axis] - 1, 0):
+			_key = [slice(0, n) for n in _shape]
+			_key[_axis] = slice(v, v + 1)
+			_planes.append(np.take(np.asarray(_mask[tuple(_key)], dtype = bool), 0, axis = _axis))
+
+		_width = [(0, 0)] + [(1, 1) if _periodic[a] else (0, 0) for a in _others]
+		_slab = np.pad(np.stack(_planes), _width, mode = 'wrap')
+
+		n0, n1 = (_shape[a] for a in _others)
+		p0, p1 = (w[0] for w in _width[1:])
+		_cuts = np.zeros((3, 3, n0, n1), dtype = bool)
+
+		for i0, i1, _slabCuts, _outliers in link_cuts(_slab, _slabSize = 2):
+			for _n, (dx, d0, d1) in enumerate(forwardOffsets):
+				if dx == 1:
+					_cuts[d0 + 1, d1 + 1] = _slabCuts[_n, 0, p0:p0 + n0, p1:p1 + n1]
+
+		_wrappedCuts[_axis] = _cuts
+
+	return _wrappedCuts
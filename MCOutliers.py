@@ -12,6 +12,8 @@
 # as described in Table 3 and appendix A of the paper
 # https://arxiv.org/abs/2110.02253
 
+import numpy as np
+
 def outliers(_whichOne):
 
 	outliers = [[], # 0
@@ -273,3 +275,90 @@ def outliers(_whichOne):
 	]
 	
 	return outliers[_whichOne]
+
+#---------------------------------------------------------------------#
+
+# Precompiled tables, built once at import
+
+# Corner positions of a cube relative to its lower corner, in the
+# order of the bits of the case number. The offsets take part in index
+# arithmetic with the grid lengths, so they are of the index type.
+
+cornerOffsets = np.array([[0, 1, 0], [1, 1, 0], [1, 0, 0], [0, 0, 0], \
+[0, 1, 1], [1, 1, 1], [1, 0, 1], [0, 0, 1]], dtype = np.intp)
+
+# The 8 sub-cubes around a voxel [i, j, k] (cube 1 to cube 8 in
+# extractStructuresWithMC). cubeCentres holds the corner at [i, j, k]
+# and cubeOffsets the offsets of all corners relative to [i, j, k].
+
+cubeCentres = np.array([4, 5, 6, 7, 0, 1, 2, 3], dtype = np.intp)
+cubeOffsets = cornerOffsets[None, :, :] - cornerOffsets[cubeCentres][:, None, :]
+
+# Case number -> index into outlierGroups (-1 if not an outlier case)
+
+outlierGroups = []
+outlierGroupIndex = -np.ones(256, dtype = np.int16)
+
+for _case in range(256):
+	if len(outliers(_case)) > 0:
+		outlierGroupIndex[_case] = len(outlierGroups)
+		outlierGroups.append(outliers(_case))
+
+isOutlierCase = outlierGroupIndex >= 0
+
+# removeMask[ii, case, v] is True if corner v of sub-cube ii is discarded,
+# i.e. it lies in an outlier group that does not contain [i, j, k].
+# removeOffsets[ii][case] lists the offsets of these corners.
+
+removeMask = np.zeros((8, 256, 8), dtype = bool)
+
+for _ii in range(8):
+	for _case in np.nonzero(isOutlierCase)[0]:
+		for _group in outliers(_case):
+			if cubeCentres[_ii] not in _group:
+				removeMask[_ii, _case, _group] = True
+
+removeOffsets = tuple(tuple(tuple(tuple(int(v) for v in cubeOffsets[_ii, _corner]) \
+for _corner in np.nonzero(removeMask[_ii, _case])[0]) for _case in range(256)) \
+for _ii in range(8))
+
+# outlierReachable[ii, case] is True if some subset of the corners in
+# case which contains [i, j, k] is an outlier case for sub-cube ii. The
+# MC correction only ever sees such subsets (neighbors which were already
+# labeled are left out), so it can be skipped where this is False.
+
+outlierReachable = np.zeros((8, 256), dtype = bool)
+
+for _case in range(256):
+	_sub = _case
+	while _sub > 0:
+		if isOutlierCase[_sub]:
+			for _ii in range(8):
+				if (_sub >> int(cubeCentres[_ii])) & 1:
+					outlierReachable[_ii, _case] = True
+		_sub = (_sub - 1) & _case
+
+# Corner pairs of a cube as (u, v, offset), with the corner v at the
+# neighbor offset of the corner u following it in C-order. Every
+# 26-neighbor link of the field is the pair of one or more cubes.
+# pairCut[case, n] is True if the corners of pair n are both in case
+# and belong to different outlier groups (a corner outside all groups
+# is cut from the grouped ones), i.e. the MC correction separates them.
+
+cubePairs = []
+
+for _u in range(8):
+	for _v in range(8):
+		_d = tuple(int(v) for v in cornerOffsets[_v] - cornerOffsets[_u])
+		if _d > (0, 0, 0):
+			cubePairs.append((_u, _v, _d))
+
+pairCut = np.zeros((256, len(cubePairs)), dtype = bool)
+
+for _case in np.nonzero(isOutlierCase)[0]:
+	_group = -np.ones(8, dtype = np.int8)
+	for _g, _corners in enumerate(outliers(_case)):
+		_group[_corners] = _g
+	for _n, (_u, _v, _d) in enumerate(cubePairs):
+		if (_case >> _u) & 1 and (_case >> _v) & 1 and _group[_u] != _group[_v]:
+			pairCut[_case, _n] = True
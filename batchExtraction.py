@@ -0,0 +1,193 @@
+import numpy as np
+import time
+import os
+import json
+import argparse
+import traceback
+import concurrent.futures
+from extractStructuresWithMC import extractStructuresMC
+from structureStatistics import write_statistics
+from rawReader import read_raw
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Extraction of a series of snapshots (raw binary files, see rawReader)
+# with one threshold and one MC setting. The snapshots are spread over
+# a pool of worker processes, each of which imports the modules once and
+# holds one volume at a time; at most _maxInFlight snapshots are queued
+# or running. For every snapshot the labels (raw binary, C-order) and
+# the statistics table are written to the output directory, together
+# with a manifest (manifest.json) of the settings, timings and failures.
+
+# Can also be run from the command line, e.g.
+# python batchExtraction.py snap_*.bin --shape 200 328 234 --threshold 47 --output-dir out --workers 4
+
+def extract_snapshot(_filenameRead, _outputDir, _threshVal, xlen, ylen, zlen, \
+_zFastest = True, _marchingCubesExt = False, precision = 'f', _byteOrder = 'native', \
+_headerOffset = 0, _engine = 'scan', _lowMemory = False):
+
+	'''
+
+	Extracts the structures of one snapshot and writes
+	<name>_labels.bin and <name>_statistics.npz to _outputDir. Returns
+	the manifest entry of the snapshot.
+
+	'''
+
+	start_time = time.time()
+	_name = os.path.splitext(os.path.basename(_filenameRead))[0]
+
+	data = read_raw(_filenameRead, xlen, ylen, zlen, precision, _byteOrder, \
+	_headerOffset, _zFastest)
+
+	extractStructuresObj = extractStructuresMC(_threshVal, data, xlen, ylen, zlen, \
+	_zFastest, False, False, False, _marchingCubesExt, _engine = _engine, \
+	_lowMemory = _lowMemory)
+	_setupTime = time.time() - start_time
+
+	structureGrid, _stats = extractStructuresObj.extract(_returnStatistics = True)
+	_extractTime = time.time() - start_time - _setupTime
+
+	_labelsFile = os.path.join(_outputDir, _name + '_labels.bin')
+	_statisticsFile = os.path.join(_outputDir, _name + '_statistics.npz')
+
+	structureGrid.tofile(_labelsFile)
+	write_statistics(_stats, _statisticsFile)
+
+	return {'snapshot': _filenameRead, 'status': 'ok', \
+	'labels': _labelsFile, 'labelsDtype': structureGrid.dtype.str, \
+	'statistics': _statisticsFile, \
+	'numberOfStructures': int(len(_stats['label'])), \
+	'Vmax': int(np.max(_stats['volume'], initial = 0)), \
+	'Vall': int(np.sum(_stats['volume'])), \
+	'setupTime': _setupTime, 'extractTime': _extractTime, \
+	'writeTime': time.time() - start_time - _setupTime - _extractTime, \
+	'totalTime': time.time() - start_time}
+
+def _run_snapshot(_args):
+
+	# Runs one snapshot and turns an exception into a failed entry, so
+	# that one bad file does not stop the series
+
+	_filenameRead, _outputDir, _kwargs = _args
+
+	try:
+		return extract_snapshot(_filenameRead, _outputDir, **_kwargs)
+	except Exception as e:
+		return {'snapshot': _filenameRead, 'status': 'failed', \
+		'error': repr(e), 'traceback': traceback.format_exc()}
+
+def extract_series(_filenames, _outputDir, _threshVal, xlen, ylen, zlen, \
+_zFastest = True, _marchingCubesExt = False, precision = 'f', _byteOrder = 'native', \
+_headerOffset = 0, _engine = 'scan', _lowMemory = False, _workers = 1, \
+_maxInFlight = None, verbose = False):
+
+	'''
+
+	Extracts every snapshot in _filenames with _workers processes,
+	keeping at most _maxInFlight (default _workers) snapshots submitted
+	at a time. Writes the manifest to _outputDir/manifest.json and
+	returns it. Snapshots appear in the manifest in the order of
+	_filenames.
+
+	'''
+
+	start_time = time.time()
+	os.makedirs(_outputDir, exist_ok = True)
+
+	_kwargs = {'_threshVal': _threshVal, 'xlen': xlen, 'ylen': ylen, 'zlen': zlen, \
+	'_zFastest': _zFastest, '_marchingCubesExt': _marchingCubesExt, \
+	'precision': precision, '_byteOrder': _byteOrder, '_headerOffset': _headerOffset, \
+	'_engine': _engine, '_lowMemory': _lowMemory}
+
+	_entries = [None]*len(_filenames)
+
+	def _done(n, _entry):
+
+		_entries[n] = _entry
+		if verbose:
+			print(_entry['status'], _entry['snapshot'], round(_entry.get('totalTime', 0), 3))
+
+	if _workers <= 1:
+
+		for n, _filenameRead in enumerate(_filenames):
+			_done(n, _run_snapshot((_filenameRead, _outputDir, _kwargs)))
+
+	else:
+
+		if _maxInFlight is None:
+			_maxInFlight = _workers
+
+		with concurrent.futures.ProcessPoolExecutor(_workers) as _pool:
+
+			_pending = {}
+			_next = 0
+
+			while _next < len(_filenames) or _pending:
+
+				while _next < len(_filenames) and len(_pending) < _maxInFlight:
+					_future = _pool.submit(_run_snapshot, (_filenames[_next], _outputDir, _kwargs))
+					_pending[_future] = _next
+					_next += 1
+
+				_finished, _ = concurrent.futures.wait(_pending, \
+				return_when = concurrent.futures.FIRST_COMPLETED)
+
+				for _future in _finished:
+					n = _pending.pop(_future)
+					try:
+						_done(n, _future.result())
+					except Exception as e:
+						# The worker process itself died
+						_done(n, {'snapshot': _filenames[n], 'status': 'failed', \
+						'error': repr(e), 'traceback': traceback.format_exc()})
+
+	_manifest = {'settings': dict(_kwargs, _workers = _workers, _maxInFlight = _maxInFlight), \
+	'snapshots': _entries, \
+	'failures': [e['snapshot'] for e in _entries if e['status'] != 'ok'], \
+	'totalTime': time.time() - start_time}
+
+	fw = open(os.path.join(_outputDir, 'manifest.json'), 'w')
+	json.dump(_manifest, fw, indent = 1)
+	fw.close()
+
+	if verbose:
+		print('Snapshots:', len(_filenames), 'failed:', len(_manifest['failures']), \
+		'total time:', _manifest['totalTime'])
+
+	return _manifest
+
+if __name__ == '__main__':
+
+	parser = argparse.ArgumentParser(description = 'Extract structures from a series of raw binary snapshots.')
+	parser.add_argument('snapshots', nargs = '+', help = 'raw binary files')
+	parser.add_argument('--shape', nargs = 3, type = int, required = True, metavar = ('XLEN', 'YLEN', 'ZLEN'))
+	parser.add_argument('--threshold', type = float, required = True)
+	parser.add_argument('--output-dir', required = True)
+	parser.add_argument('--mc', action = 'store_true', help = 'use the marching cubes correction')
+	parser.add_argument('--fortran-order', action = 'store_true', help = 'x is the fastest axis')
+	parser.add_argument('--precision', default = 'f')
+	parser.add_argument('--byte-order', default = 'native', choices = ('native', 'little', 'big'))
+	parser.add_argument('--header-offset', type = int, default = 0)
+	parser.add_argument('--engine', default = 'scan', choices = ('scan', 'array', 'blocks', 'sparse', 'edgecut'))
+	parser.add_argument('--low-memory', action = 'store_true')
+	parser.add_argument('--workers', type = int, default = 1)
+	parser.add_argument('--max-in-flight', type = int, default = None)
+	args = parser.parse_args()
+
+	_manifest = extract_series(args.snapshots, args.output_dir, args.threshold, *args.shape, \
+	_zFastest = not args.fortran_order, _marchingCubesExt = args.mc, precision = args.precision, \
+	_byteOrder = args.byte_order, _headerOffset = args.header_offset, _engine = args.engine, \
+	_lowMemory = args.low_memory, _workers = args.workers, _maxInFlight = args.max_in_flight, \
+	verbose = True)
+
+	if _manifest['failures']:
+		raise SystemExit(1)
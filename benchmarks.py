@@ -0,0 +1,447 @@
+import os
+import sys
+import time
+import json
+import argparse
+import platform
+import tempfile
+import multiprocessing
+import concurrent.futures
+import numpy as np
+from blockExtraction import extract_blocks
+from rawReader import read_raw
+
+try:
+	import resource
+except ImportError:
+	resource = None
+
+#---------------------------------------------------------------------#
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+# Benchmarks of the extractStructuresWithMC python module
+
+#---------------------------------------------------------------------#
+
+# Reproducible benchmark suite. Synthetic fields (Gaussian random
+# fields, packed vortex tubes, sparse blobs) are generated from a fixed
+# seed at several sizes and thresholded at several fill fractions. Every
+# case runs in a fresh process, so that its peak RSS is its own. The
+# JSON report can be compared against the report of an earlier run to
+# catch regressions in time, memory or structure counts.
+
+# python benchmarks.py --output report.json
+# python benchmarks.py --output new.json --compare report.json
+
+_fieldTypes = ('gaussian', 'tubes', 'blobs')
+
+def _smooth(_field, _width):
+
+	# Periodic box filter of width 2*_width + 1 along every axis, applied
+	# twice (close to a Gaussian filter)
+
+	for _axis in range(3):
+		for _pass in range(2):
+			_sum = np.zeros_like(_field)
+			for s in range(-_width, _width + 1):
+				_sum += np.roll(_field, s, axis = _axis)
+			_field = _sum/(2*_width + 1)
+
+	return _field
+
+def _periodic_distance2(_n, _centre):
+
+	# Squared periodic distance of 0 .. _n - 1 from _centre
+
+	d = np.abs(np.arange(_n) - _centre)
+	d = np.minimum(d, _n - d)
+
+	return (d*d).astype(np.float32)
+
+def gaussian_field(_shape, _seed = 0, _correlationLength = 3):
+
+	'''
+
+	Gaussian random field: white noise smoothed over about
+	_correlationLength voxels, with unit variance.
+
+	'''
+
+	rng = np.random.default_rng(_seed)
+	_field = _smooth(rng.standard_normal(_shape, dtype = np.float32), _correlationLength)
+
+	return _field/_field.std()
+
+def vortex_tubes(_shape, _seed = 0, _numberOfTubes = None, _radius = 3.0):
+
+	'''
+
+	Packed straight tubes along random axes with a Gaussian profile of
+	width _radius, on weak background noise.
+
+	'''
+
+	rng = np.random.default_rng(_seed)
+	if _numberOfTubes is None:
+		_numberOfTubes = max(1, int(np.prod(_shape)**(1/3)) // 4)
+
+	_field = 0.05*rng.standard_normal(_shape, dtype = np.float32)
+
+	for n in range(_numberOfTubes):
+
+		_axis = int(rng.integers(3))
+		_others = [a for a in range(3) if a != _axis]
+		_centre = [rng.uniform(0, _shape[a]) for a in _others]
+
+		_r2 = _periodic_distance2(_shape[_others[0]], _centre[0])[:, None] + \
+		_periodic_distance2(_shape[_others[1]], _centre[1])[None, :]
+		_profile = np.exp(-_r2/(2*_radius**2)).astype(np.float32)
+
+		_field += np.expand_dims(_profile, _axis)
+
+	return _field
+
+def sparse_blobs(_shape, _seed = 0, _numberOfBlobs = None, _radius = 2.0):
+
+	'''
+
+	Isolated Gaussian blobs of width _radius at random positions.
+
+	'''
+
+	rng = np.random.default_rng(_seed)
+	if _numberOfBlobs is None:
+		_numberOfBlobs = max(1, int(np.prod(_shape)) // 4096)
+
+	_field = np.zeros(_shape, dtype = np.float32)
+	_half = int(np.ceil(3*_radius))
+
+	for n in range(_numberOfBlobs):
+
+		_centre = [int(rng.integers(_shape[a])) for a in range(3)]
+		_index = [np.arange(_centre[a] - _half, _centre[a] + _half + 1) % _shape[a] for a in range(3)]
+		_r2 = sum(np.expand_dims(np.arange(-_half, _half + 1, dtype = np.float32)**2, \
+		[b for b in range(3) if b != a]) for a in range(3))
+
+		_field[np.ix_(*_index)] += np.exp(-_r2/(2*_radius**2)).astype(np.float32)
+
+	return _field
+
+def synthetic_field(_fieldType, _shape, _seed = 0):
+
+	if _fieldType == 'gaussian':
+		return gaussian_field(_shape, _seed)
+	if _fieldType == 'tubes':
+		return vortex_tubes(_shape, _seed)
+	if _fieldType == 'blobs':
+		return sparse_blobs(_shape, _seed)
+
+	raise ValueError('Unknown synthetic field: ' + str(_fieldType))
+
+def threshold_for_fill(_field, _fillFraction):
+
+	# Positive threshold leaving about _fillFraction of the voxels above
+	# it (None if the field has too few positive values)
+
+	_t = float(np.quantile(_field, 1 - _fillFraction))
+
+	return _t if _t > 0 else None
+
+def _peak_rss():
+
+	# Peak resident set size of this process in bytes
+
+	if resource is None:
+		return None
+
+	_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+	return _rss if sys.platform == 'darwin' else 1024*_rss
+
+def _run_case(_filename, _shape, _threshVal, _kwargs):
+
+	# Runs in a fresh process: extraction of the field in _filename
+
+	from extractStructuresWithMC import extractStructuresMC
+
+	data = read_raw(_filename, *_shape)
+
+	start_time = time.time()
+	extractStructuresObj = extractStructuresMC(_threshVal, data, *_shape, True, False, \
+	False, False, **_kwargs)
+	_setupTime = time.time() - start_time
+
+	structureGrid = extractStructuresObj.extract()
+	_extractTime = time.time() - start_time - _setupTime
+
+	return {'setupTime': _setupTime, 'extractTime': _extractTime, \
+	'voxelsPerSecond': float(np.prod(_shape))/(_setupTime + _extractTime), \
+	'numberOfStructures': int(structureGrid.max(initial = 0)), \
+	'outlierCaseCount': int(extractStructuresObj.outlierCaseCount), \
+	'peakRSS': _peak_rss()}
+
+def run_suite(_sizes = (64, 128, 256, 512), _fillFractions = (0.01, 0.05, 0.2), \
+_fieldTypes = _fieldTypes, _engines = ('scan', 'array'), _maxScanSize = 64, _seed = 0, \
+_tempDir = None, verbose = True):
+
+	'''
+
+	Runs every combination of field type, size (cubes of that edge
+	length), fill fraction and engine; the scan runs with and without
+	the MC correction, up to edge length _maxScanSize, and the edgecut
+	engine with it. Returns the report.
+
+	'''
+
+	_context = multiprocessing.get_context('spawn')
+	_cases = []
+
+	for _fieldType in _fieldTypes:
+		for _size in _sizes:
+
+			_shape = (_size, _size, _size)
+			_field = synthetic_field(_fieldType, _shape, _seed)
+
+			fd, _filename = tempfile.mkstemp(suffix = '.bin', dir = _tempDir)
+			os.close(fd)
+
+			try:
+
+				_field.tofile(_filename)
+
+				for _fillFraction in _fillFractions:
+
+					_threshVal = threshold_for_fill(_field, _fillFraction)
+
+					for _engine in _engines:
+						for _marchingCubesExt in {'scan': (False, True), 'edgecut': (True,)}.get(_engine, (False,)):
+
+							_case = {'field': _fieldType, 'size': _size, 'fillFraction': _fillFraction, \
+							'threshold': _threshVal, 'engine': _engine, 'marchingCubes': _marchingCubesExt}
+
+							if _threshVal is None or (_engine == 'scan' and _size > _maxScanSize):
+								continue
+
+							with concurrent.futures.ProcessPoolExecutor(1, mp_context = _context) as _pool:
+								_case.update(_pool.submit(_run_case, _filename, _shape, _threshVal, \
+								{'_marchingCubesExt': _marchingCubesExt, '_engine': _engine}).result())
+
+							_cases.append(_case)
+
+							if verbose:
+								print(_fieldType, _size, _fillFraction, _engine, \
+								'MC' if _marchingCubesExt else '', \
+								'structures:', _case['numberOfStructures'], \
+								'time:', round(_case['setupTime'] + _case['extractTime'], 3), \
+								'peak RSS (MB):', _case['peakRSS'] and round(_case['peakRSS']/2**20, 1))
+
+			finally:
+				os.remove(_filename)
+
+			del _field
+
+	return {'environment': {'python': platform.python_version(), 'numpy': np.__version__, \
+	'platform': platform.platform(), 'cpus': os.cpu_count()}, 'seed': _seed, 'cases': _cases}
+
+def _case_key(_case):
+
+	return (_case['field'], _case['size'], _case['fillFraction'], _case['engine'], \
+	_case['marchingCubes'])
+
+def compare_reports(_reference, _report, _tolerance = 0.2):
+
+	'''
+
+	Compares a report with a reference report. Returns a list of
+	(case, quantity, reference value, new value) for every case whose
+	structure or outlier case count changed, or whose time or peak RSS
+	grew by more than _tolerance.
+
+	'''
+
+	_previous = {_case_key(v): v for v in _reference['cases']}
+	_regressions = []
+
+	for _case in _report['cases']:
+
+		_old = _previous.get(_case_key(_case))
+		if _old is None:
+			continue
+
+		for _quantity in ('numberOfStructures', 'outlierCaseCount'):
+			if _case[_quantity] != _old[_quantity]:
+				_regressions.append((_case_key(_case), _quantity, _old[_quantity], _case[_quantity]))
+
+		_times = [v['setupTime'] + v['extractTime'] for v in (_old, _case)]
+		if _times[1] > (1 + _tolerance)*_times[0]:
+			_regressions.append((_case_key(_case), 'time', _times[0], _times[1]))
+
+		if _old['peakRSS'] and _case['peakRSS'] and _case['peakRSS'] > (1 + _tolerance)*_old['peakRSS']:
+			_regressions.append((_case_key(_case), 'peakRSS', _old['peakRSS'], _case['peakRSS']))
+
+	return _regressions
+
+def worker_scaling(data, xlen, ylen, zlen, _threshVal, _workerCounts, \
+_blockShape = (64, 64, 64), _zFastest = True, verbose = True):
+
+	'''
+
+	Times the block decomposed extraction with each number of workers
+	in _workerCounts. Returns a dictionary workers -> wall time.
+
+	'''
+
+	_times = {}
+
+	for _workers in _workerCounts:
+
+		start_time = time.time()
+		_labels, _structVal = extract_blocks(_threshVal, data, xlen, ylen, zlen, \
+		_zFastest, _blockShape = _blockShape, _workers = _workers)
+		_times[_workers] = time.time() - start_time
+
+		if verbose:
+			print('Workers:', _workers, 'structures:', _structVal, \
+			'time:', round(_times[_workers], 3), \
+			'speedup:', round(_times[_workerCounts[0]]/_times[_workers], 2))
+
+	return _times
+
+def edge_cut_report(data, xlen, ylen, zlen, _thresholds, _zFastest = True, verbose = True):
+
+	'''
+
+	Compares the edge-cut MC correction (see edgeCutLabeling) with the
+	sequential one of the neighbor scan at every threshold. Returns one
+	entry per threshold with the number of structures without MC, with
+	the sequential and with the edge-cut correction, the structures of
+	both corrections made of exactly the same voxels, and the voxels
+	lying in the other structures.
+
+	'''
+
+	from extractStructuresWithMC import extractStructuresMC
+	from structureTracking import track_structures
+
+	_entries = []
+
+	for _threshVal in _thresholds:
+
+		_labels = {}
+		_times = {}
+
+		for _name, _engine, _marchingCubesExt in (('noMC', 'array', False), \
+		('sequential', 'scan', True), ('edgeCut', 'edgecut', True)):
+
+			start_time = time.time()
+			extractStructuresObj = extractStructuresMC(_threshVal, data, xlen, ylen, zlen, \
+			_zFastest, False, False, False, _marchingCubesExt, _engine = _engine)
+			_labels[_name] = extractStructuresObj.extract()
+			_times[_name] = time.time() - start_time
+
+		_links = track_structures(_labels['sequential'], _labels['edgeCut'])
+		_same = (_links['fractionA'] == 1) & (_links['fractionB'] == 1)
+
+		_entry = {'threshold': _threshVal, \
+		'activeVoxels': int(np.count_nonzero(_labels['noMC'])), \
+		'structuresNoMC': int(_labels['noMC'].max(initial = 0)), \
+		'structuresSequential': int(_labels['sequential'].max(initial = 0)), \
+		'structuresEdgeCut': int(_labels['edgeCut'].max(initial = 0)), \
+		'identicalStructures': int(_same.sum()), \
+		'voxelsDiffering': int(np.count_nonzero(_labels['noMC']) - _links['overlap'][_same].sum()), \
+		'times': _times}
+		_entries.append(_entry)
+
+		if verbose:
+			print('Threshold:', _threshVal, \
+			'structures without MC:', _entry['structuresNoMC'], \
+			'sequential MC:', _entry['structuresSequential'], \
+			'edge-cut MC:', _entry['structuresEdgeCut'], \
+			'identical:', _entry['identicalStructures'], \
+			'voxels in differing structures:', _entry['voxelsDiffering'], \
+			'of', _entry['activeVoxels'])
+			print('Time (s) sequential MC:', round(_times['sequential'], 3), \
+			'edge-cut MC:', round(_times['edgeCut'], 3))
+
+	return _entries
+
+if __name__ == '__main__':
+
+	parser = argparse.ArgumentParser(description = 'Benchmarks of the structure extraction.')
+	parser.add_argument('--sizes', nargs = '+', type = int, default = [64, 128, 256, 512])
+	parser.add_argument('--fill-fractions', nargs = '+', type = float, default = [0.01, 0.05, 0.2])
+	parser.add_argument('--fields', nargs = '+', default = list(_fieldTypes), choices = _fieldTypes)
+	parser.add_argument('--engines', nargs = '+', default = ['scan', 'array'], choices = ('scan', 'array', 'blocks', 'sparse', 'edgecut'))
+	parser.add_argument('--max-scan-size', type = int, default = 64, \
+	help = 'largest edge length run with the (pure Python) neighbor scan')
+	parser.add_argument('--seed', type = int, default = 0)
+	parser.add_argument('--output', default = 'benchmark_report.json')
+	parser.add_argument('--compare', default = None, help = 'reference report')
+	parser.add_argument('--tolerance', type = float, default = 0.2)
+	parser.add_argument('--worker-scaling', nargs = '?', const = 'testData.bin', default = None, metavar = 'FILE', \
+	help = 'time the block extraction of testData.bin (or FILE) over the number of workers instead')
+	parser.add_argument('--edge-cut-report', nargs = '?', const = 'testData.bin', default = None, metavar = 'FILE', \
+	help = 'compare the edge-cut and the sequential MC correction on testData.bin (or FILE) instead')
+	parser.add_argument('--thresholds', nargs = '+', type = float, default = [47], \
+	help = 'thresholds of the edge-cut report')
+	args = parser.parse_args()
+
+	if args.worker_scaling is not None:
+
+		# Set data related parameters (see runTests.py)
+		xlen = 200
+		ylen = 328
+		zlen = 234
+		precision = 'f'
+
+		data = read_raw(args.worker_scaling, xlen, ylen, zlen, precision)
+
+		# 1, 2, 4, ... up to the number of cores
+
+		_workerCounts = [2**n for n in range(int(np.log2(os.cpu_count() or 1)) + 1)]
+		if _workerCounts[-1] != (os.cpu_count() or 1):
+			_workerCounts.append(os.cpu_count())
+
+		print('Block extraction, scaling with the number of workers:')
+		worker_scaling(data, xlen, ylen, zlen, 47, _workerCounts)
+
+		raise SystemExit(0)
+
+	if args.edge_cut_report is not None:
+
+		# testData.bin: 31 structures at threshold 47 with the sequential
+		# MC correction
+		xlen = 200
+		ylen = 328
+		zlen = 234
+		precision = 'f'
+
+		data = read_raw(args.edge_cut_report, xlen, ylen, zlen, precision)
+		_entries = edge_cut_report(data, xlen, ylen, zlen, args.thresholds)
+
+		fw = open(args.output, 'w')
+		json.dump(_entries, fw, indent = 1)
+		fw.close()
+
+		raise SystemExit(0)
+
+	_report = run_suite(args.sizes, args.fill_fractions, args.fields, args.engines, \
+	args.max_scan_size, args.seed)
+
+	fw = open(args.output, 'w')
+	json.dump(_report, fw, indent = 1)
+	fw.close()
+
+	if args.compare is not None:
+
+		fr = open(args.compare, 'r')
+		_regressions = compare_reports(json.load(fr), _report, args.tolerance)
+		fr.close()
+
+		for _regression in _regressions:
+			print('Regression:', *_regression)
+
+		if _regressions:
+			raise SystemExit(1)
@@ -0,0 +1,358 @@
+import numpy as np
+import time
+import itertools
+import os
+import tempfile
+import multiprocessing
+from connectedComponents import find_runs, label_runs, paint_runs, find_roots, \
+union_pairs, unique_sorted
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Block decomposed (out-of-core) extraction without the marching cubes
+# correction. Every block is thresholded and labeled on its own and the
+# block labels are written to the output grid, which can be a memmap.
+# Labels touching across block faces, edges and corners are then merged
+# through an equivalence table and renumbered in the order of their
+# first voxel, so the result is identical to the in-core labeling.
+# Only one block and one boundary plane are held in memory at a time.
+
+# The blocks can be labeled by a pool of worker processes. The field and
+# the label grid are then shared through memmaps (temporary files for
+# arrays held in memory), so no volume data is pickled. The merge runs
+# in the main process.
+
+def threshold(c, _threshVal):
+
+	# Same sign rule as extractStructuresMC
+
+	if _threshVal > 0:
+		return c > _threshVal
+	else:
+		return c < _threshVal
+
+def block_ranges(_shape, _blockShape):
+
+	'''
+
+	Returns the blocks as tuples of slices, in C-order of the blocks,
+	together with the number of blocks along each axis.
+
+	'''
+
+	_edges = [list(range(0, n, b)) + [n] for n, b in zip(_shape, _blockShape)]
+	_counts = tuple(len(e) - 1 for e in _edges)
+
+	_blocks = [tuple(slice(_edges[a][ii[a]], _edges[a][ii[a] + 1]) for a in range(3)) \
+	for ii in itertools.product(*[range(n) for n in _counts])]
+
+	return _blocks, _counts
+
+def label_block(_mask, _block, _shape, _out):
+
+	'''
+
+	Labels one block of the field and writes the block labels (starting
+	at 1 in every block) to _out[_block]. Returns the number of labels and
+	the global flat index of the first voxel of every label.
+
+	'''
+
+	_rows, _starts, _ends = find_runs(_mask)
+	_blockShape = np.shape(_mask)
+	_runLabels, _n = label_runs(_rows, _starts, _ends, _blockShape)
+
+	_out[_block] = paint_runs(_rows, _starts, _ends, _runLabels, _blockShape, \
+	_dtype = _out.dtype)
+
+	# The first run of a label is its first voxel in scan order, which
+	# is also its first voxel in the scan order of the whole field
+
+	_firstRun = np.full(_n, len(_rows), dtype = np.int64)
+	np.minimum.at(_firstRun, _runLabels - 1, np.arange(len(_rows)))
+
+	_i = _rows[_firstRun] // _blockShape[1] + _block[0].start
+	_j = _rows[_firstRun] % _blockShape[1] + _block[1].start
+	_k = _starts[_firstRun] + _block[2].start
+
+	return _n, (_i*_shape[1] + _j)*_shape[2] + _k
+
+def _boundary_pairs(_out, _axis, p, _offsetPlane):
+
+	# Pairs of (provisional) labels which touch across the plane between
+	# p - 1 and p along _axis
+
+	_left = np.take(_out, p - 1, axis = _axis).astype(np.int64)
+	_right = np.take(_out, p, axis = _axis).astype(np.int64)
+
+	_left = np.where(_left > 0, _left + _offsetPlane[0], 0)
+	_right = np.where(_right > 0, _right + _offsetPlane[1], 0)
+
+	n0, n1 = np.shape(_left)
+	_a = []
+	_b = []
+
+	for d0, d1 in itertools.product((-1, 0, 1), repeat = 2):
+
+		_l = _left[max(0, -d0):n0 - max(0, d0), max(0, -d1):n1 - max(0, d1)]
+		_r = _right[max(0, d0):n0 - max(0, -d0), max(0, d1):n1 - max(0, -d1)]
+
+		_m = (_l > 0) & (_r > 0)
+		_a.append(_l[_m])
+		_b.append(_r[_m])
+
+	_a = np.concatenate(_a)
+	_b = np.concatenate(_b)
+
+	# Many voxel pairs repeat the same label pair
+
+	_width = _b.max(initial = 0) + 1
+	_keys = unique_sorted(_a*_width + _b)
+
+	return _keys // _width, _keys % _width
+
+def merge_blocks(_out, _blocks, _counts, _blockLabels, _firstIndex, verbose = False):
+
+	'''
+
+	Resolves the block labels in _out into the final labels, in place.
+	_blockLabels holds the number of labels of every block and
+	_firstIndex the first voxel of every label, both in block order.
+	Returns the number of structures.
+
+	'''
+
+	_shape = np.shape(_out)
+
+	# Provisional labels: block label + offset of the block
+
+	_offsets = np.concatenate(([0], np.cumsum(_blockLabels)[:-1])).astype(np.int64)
+	_offsetGrid = _offsets.reshape(_counts)
+	_total = int(np.sum(_blockLabels))
+
+	_parent = np.arange(_total + 1, dtype = np.int64)
+
+	# Equivalences across the planes between blocks. A full plane is
+	# used, so links across block edges and corners are found as well.
+
+	for _axis in range(3):
+
+		_starts = sorted(set(b[_axis].start for b in _blocks))[1:]
+		_others = [a for a in range(3) if a != _axis]
+
+		# Block index of every position in the plane
+
+		_index = [np.searchsorted(sorted(set(b[a].start for b in _blocks)), \
+		np.arange(_shape[a]), side = 'right') - 1 for a in _others]
+
+		for _b, p in enumerate(_starts):
+
+			_plane = [np.moveaxis(_offsetGrid, _axis, 0)[n][np.ix_(*_index)] for n in (_b, _b + 1)]
+			_a, _c = _boundary_pairs(_out, _axis, p, _plane)
+			union_pairs(_parent, _a, _c)
+
+	_roots = find_roots(_parent, np.arange(_total + 1, dtype = np.int64))
+
+	# Number the structures in the order of their first voxel
+
+	_first = np.full(_total + 1, np.iinfo(np.int64).max, dtype = np.int64)
+	np.minimum.at(_first, _roots[1:], _firstIndex)
+
+	_isRoot = np.nonzero(_roots[1:] == np.arange(1, _total + 1))[0] + 1
+	_final = np.zeros(_total + 1, dtype = np.int64)
+	_final[_isRoot[np.argsort(_first[_isRoot], kind = 'stable')]] = np.arange(1, len(_isRoot) + 1)
+	_final = _final[_roots]
+
+	if verbose:
+		print('Number of structures:', len(_isRoot))
+
+	for n, _block in enumerate(_blocks):
+
+		_map = _final[_offsets[n]:_offsets[n] + _blockLabels[n] + 1].astype(_out.dtype)
+		_map[0] = 0
+		_out[_block] = _map[_out[_block]]
+
+	return len(_isRoot)
+
+def _memmap_spec(c, _tempDir, _files):
+
+	# Describes c as a file a worker can map. Arrays in memory (and
+	# views of memmaps) are written to a temporary file first.
+
+	if isinstance(c, np.memmap) and c.filename is not None and \
+	(c.flags.c_contiguous or c.flags.f_contiguous):
+
+		# Position of the view in the file
+
+		_top = c
+		while isinstance(_top.base, np.memmap):
+			_top = _top.base
+		_offset = _top.offset + c.ctypes.data - _top.ctypes.data
+
+		return (c.filename, c.dtype.str, np.shape(c), _offset, \
+		'C' if c.flags.c_contiguous else 'F', 'r')
+
+	fd, _filename = tempfile.mkstemp(suffix = '.bin', dir = _tempDir)
+	os.close(fd)
+	_files.append(_filename)
+
+	_copy = np.memmap(_filename, dtype = c.dtype, mode = 'w+', shape = np.shape(c))
+	for i0 in range(0, np.shape(c)[0], 64):
+		_copy[i0:i0 + 64] = c[i0:i0 + 64]
+	_copy.flush()
+	del _copy
+
+	return (_filename, np.dtype(c.dtype).str, np.shape(c), 0, 'C', 'r')
+
+def _open_memmap(_spec, _mode = None):
+
+	_filename, _dtype, _shape, _offset, _order, _specMode = _spec
+
+	return np.memmap(_filename, dtype = np.dtype(_dtype), mode = _mode or _specMode, \
+	shape = _shape, offset = _offset, order = _order)
+
+def _label_block_worker(_args):
+
+	# Runs in a worker process: maps the field and the label grid and
+	# labels one block
+
+	_sourceSpec, _outSpec, _threshVal, _block = _args
+
+	c = _open_memmap(_sourceSpec)
+	_out = _open_memmap(_outSpec, 'r+')
+
+	_mask = np.asarray(c[_block])
+	if _threshVal is not None:
+		_mask = threshold(_mask, _threshVal)
+
+	_result = label_block(_mask, _block, np.shape(_out), _out)
+	_out.flush()
+
+	return _result
+
+def label_blocks(c, _out, _threshVal = None, _blockShape = (128, 128, 128), \
+_workers = 1, _tempDir = None, verbose = False):
+
+	'''
+
+	Labels the 3D field c (or boolean mask if _threshVal is None) block by
+	block into the uint32 grid _out (array or memmap) with _workers
+	processes. Returns the number of structures.
+
+	'''
+
+	start_time = time.time()
+	_shape = np.shape(c)
+
+	_blocks, _counts = block_ranges(_shape, _blockShape)
+	_blockLabels = np.zeros(len(_blocks), dtype = np.int64)
+	_firstIndex = []
+
+	if _workers > 1:
+
+		_files = []
+		_sourceSpec = _memmap_spec(c, _tempDir, _files)
+
+		if isinstance(_out, np.memmap) and _out.filename is not None:
+			_out.flush()
+			_outSpec = (_out.filename, _out.dtype.str, _shape, _out.offset, 'C', 'r+')
+			_target = None
+		else:
+			_outSpec = _memmap_spec(_out, _tempDir, _files)
+			_target = _out
+
+		try:
+
+			with multiprocessing.Pool(_workers) as _pool:
+				_results = _pool.map(_label_block_worker, [(_sourceSpec, _outSpec, \
+				_threshVal, _block) for _block in _blocks], chunksize = 1)
+
+			for n, (_blockLabels[n], _first) in enumerate(_results):
+				_firstIndex.append(_first)
+
+			if _target is None:
+				_work = _out
+			else:
+				_work = _open_memmap(_outSpec, 'r+')
+
+			if verbose:
+				print('Blocks labeled:', len(_blocks), 'workers:', _workers, \
+				time.time() - start_time)
+
+			_structVal = merge_blocks(_work, _blocks, _counts, _blockLabels, \
+			np.concatenate(_firstIndex), verbose)
+
+			if _target is not None:
+				for i0 in range(0, _shape[0], 64):
+					_target[i0:i0 + 64] = _work[i0:i0 + 64]
+				del _work
+
+		finally:
+
+			for _filename in _files:
+				os.remove(_filename)
+
+		return _structVal
+
+	for n, _block in enumerate(_blocks):
+
+		_mask = np.asarray(c[_block])
+		if _threshVal is not None:
+			_mask = threshold(_mask, _threshVal)
+		_blockLabels[n], _first = label_block(_mask, _block, _shape, _out)
+		_firstIndex.append(_first)
+
+	if verbose:
+		print('Blocks labeled:', len(_blocks), time.time() - start_time)
+
+	return merge_blocks(_out, _blocks, _counts, _blockLabels, \
+	np.concatenate(_firstIndex), verbose)
+
+def extract_blocks(_threshVal, c, xlen, ylen, zlen, _zFastest, \
+_blockShape = (128, 128, 128), _outputFile = None, verbose = False, \
+_workers = 1, _tempDir = None):
+
+	'''
+
+	Labels the structures of the field c (1D or 3D array, or memmap)
+	block by block. The labels (uint32, C-order, shape (xlen, ylen, zlen))
+	are written to the file _outputFile through a memmap, or kept in
+	memory if it is None. _workers processes label the blocks, using
+	_tempDir for temporary files if needed. Returns the label grid and
+	the number of structures.
+
+	'''
+
+	start_time = time.time()
+	_shape = (xlen, ylen, zlen)
+
+	# Reshape data (a view, no copy is made)
+
+	if _zFastest:
+		c = np.reshape(c, _shape)
+	else:
+		c = np.reshape(c, _shape, order = 'F')
+
+	if _outputFile is None:
+		_out = np.zeros(_shape, dtype = np.uint32)
+	else:
+		_out = np.memmap(_outputFile, dtype = np.uint32, mode = 'w+', shape = _shape)
+
+	_structVal = label_blocks(c, _out, _threshVal, _blockShape, _workers, \
+	_tempDir, verbose)
+
+	if _outputFile is not None:
+		_out.flush()
+
+	if verbose:
+		print('Total time:', time.time() - start_time)
+
+	return _out, _structVal
@@ -0,0 +1,347 @@
+import numpy as np
+import time
+from connectedComponents import neighborOffsets, union_pairs, find_roots, index_dtype, label_dtype
+from sparseLabeling import active_voxels
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Component tree (max-tree for positive thresholds, min-tree for the
+# others, following the sign rule of extractStructuresMC) of the
+# 26-connected structures of a field, without the marching cubes
+# correction. It is built once for all thresholds beyond a floor
+# threshold and answers queries at any of them without labeling the
+# volume again.
+
+# The voxels beyond the floor are sorted from the most extreme value
+# and added one at a time to a union-find. A voxel without earlier
+# neighbors starts a new node of the tree; a voxel whose earlier
+# neighbors lie in several structures (a saddle) ends their nodes and
+# starts their parent node. Every voxel belongs to the node current
+# when it was added. Only the voxels whose earlier neighbors form more
+# than one group within their 3x3x3 neighborhood can be saddles; the
+# runs of other voxels between them are added at once.
+
+# The tree is a set of arrays (see build_component_tree):
+# voxels - flat C-order indices of the voxels, most extreme value first
+# values - their values
+# node - node of every voxel
+# parent - parent of every node (-1 for the roots)
+# birth - value at which a node starts
+# merge - value at which a node joins its parent (the floor for roots)
+# shape, floor - grid shape and floor threshold
+
+# Pairs of the 26 neighbor positions (excluding the center) which are
+# neighbors of each other
+_neighborPairs = [(a, b) for a in range(26) for b in range(a + 1, 26) \
+if max(abs(u - v) for u, v in zip(neighborOffsets[a], neighborOffsets[b])) == 1]
+
+def _saddle_candidates(_earlier):
+
+	# True for the rows of the (n, 26) boolean array of earlier
+	# neighbors which form more than one 26-connected group. Each
+	# pattern of earlier neighbors is checked once.
+
+	_codes = _earlier.astype(np.int32) @ (np.int32(1) << np.arange(26, dtype = np.int32))
+	_codes, _inverse = np.unique(_codes, return_inverse = True)
+	_earlier = ((_codes[:, None] >> np.arange(26)) & 1).astype(bool)
+
+	_group = np.where(_earlier, np.arange(26, dtype = np.int8), np.int8(26))
+
+	while True:
+
+		_previous = _group.copy()
+		for a, b in _neighborPairs:
+			_linked = _earlier[:, a] & _earlier[:, b]
+			_low = np.minimum(_group[:, a], _group[:, b])
+			_group[_linked, a] = _low[_linked]
+			_group[_linked, b] = _low[_linked]
+
+		if np.array_equal(_group, _previous):
+			break
+
+	return (((_group == np.arange(26)) & _earlier).sum(axis = 1) > 1)[_inverse]
+
+def build_component_tree(_threshVal, c, xlen, ylen, zlen, _zFastest, _chunkSize = 2**16, \
+_runLength = 64, verbose = False):
+
+	'''
+
+	Returns the arrays of the component tree of the field c (1D or 3D
+	array, or memmap) for all thresholds beyond the floor _threshVal:
+	above it for _threshVal > 0, below it otherwise.
+
+	'''
+
+	start_time = time.time()
+	_shape = (xlen, ylen, zlen)
+
+	if _zFastest:
+		c = np.reshape(c, _shape)
+	else:
+		c = np.reshape(c, _shape, order = 'F')
+
+	# Values are compared in key space, where the structures are always
+	# above the threshold
+
+	_sign = 1 if _threshVal > 0 else -1
+	_voxels = active_voxels(c, _threshVal)
+	_i, _r = np.divmod(_voxels, ylen*zlen)
+	_j, _k = np.divmod(_r, zlen)
+	_values = np.asarray(c[_i, _j, _k])
+
+	_order = np.argsort(-_sign*_values, kind = 'stable')
+	_voxels = _voxels[_order]
+	_values = _values[_order]
+	_key = _sign*_values.astype(np.float64)
+	_n = len(_voxels)
+
+	# Rank of every voxel on a grid padded with -1, so that neighbors
+	# need no bounds checks
+
+	_dtype = index_dtype(_n + 1)
+	_padded = np.full((xlen + 2, ylen + 2, zlen + 2), -1, dtype = _dtype)
+	_position = ((_i[_order] + 1)*(ylen + 2) + _j[_order] + 1)*(zlen + 2) + _k[_order] + 1
+	del _i, _j, _k, _r
+	_padded.reshape(-1)[_position] = np.arange(_n, dtype = _dtype)
+	_offsets = np.array([(di*(ylen + 2) + dj)*(zlen + 2) + dk for di, dj, dk in neighborOffsets])
+
+	# Voxels which may be saddles
+
+	_candidate = np.zeros(_n, dtype = bool)
+	for n0 in range(0, _n, _chunkSize):
+		_ranks = np.arange(n0, min(n0 + _chunkSize, _n))
+		_neighbors = _padded.reshape(-1)[_position[_ranks, None] + _offsets]
+		_candidate[_ranks] = _saddle_candidates((_neighbors >= 0) & (_neighbors < _ranks[:, None]))
+
+	if verbose:
+		print('Voxels:', _n, 'saddle candidates:', int(_candidate.sum()), 'time:', time.time() - start_time)
+
+	_parentVoxel = np.arange(_n, dtype = np.int64)
+	_node = np.zeros(_n, dtype = np.int64)
+	_current = np.zeros(_n, dtype = np.int64)		# node of the structure rooted at a voxel
+	_nodeParent = []
+	_birth = []
+	_merge = []
+
+	def _add_voxel(r):
+
+		_earlier = _padded.reshape(-1)[_position[r] + _offsets]
+		_earlier = _earlier[(_earlier >= 0) & (_earlier < r)].astype(np.int64)
+
+		if len(_earlier) == 0:
+			_current[r] = len(_birth)
+			_node[r] = len(_birth)
+			_nodeParent.append(-1)
+			_birth.append(_key[r])
+			_merge.append(_sign*_threshVal)
+			return
+
+		_roots = np.unique(find_roots(_parentVoxel, _earlier))
+		_parentVoxel[r] = _roots[0]
+
+		if len(_roots) == 1:
+			_node[r] = _current[_roots[0]]
+			return
+
+		# Saddle: the structures end here and form a new node
+
+		_new = len(_birth)
+		for _root in _roots.tolist():
+			_nodeParent[_current[_root]] = _new
+			_merge[_current[_root]] = _key[r]
+		_parentVoxel[_roots] = _roots[0]
+		_current[_roots[0]] = _new
+		_node[r] = _new
+		_nodeParent.append(-1)
+		_birth.append(_key[r])
+		_merge.append(_sign*_threshVal)
+
+	def _add_run(a, b):
+
+		# Voxels a .. b - 1, none of them a saddle
+
+		_ranks = np.arange(a, b)
+		_a = []
+		_b = []
+		_hasEarlier = np.zeros(b - a, dtype = bool)
+
+		for _offset in _offsets:
+			_neighbor = _padded.reshape(-1)[_position[a:b] + _offset].astype(np.int64)
+			_linked = (_neighbor >= 0) & (_neighbor < _ranks)
+			_hasEarlier |= _linked
+			_a.append(_ranks[_linked])
+			_b.append(_neighbor[_linked])
+
+		_births = _ranks[~_hasEarlier]
+		_current[_births] = len(_birth) + np.arange(len(_births))
+		_nodeParent.extend([-1]*len(_births))
+		_birth.extend(_key[_births].tolist())
+		_merge.extend([_sign*_threshVal]*len(_births))
+
+		# Every structure holds one earlier structure or birth, which is
+		# its root (the union-find keeps the smallest rank as root)
+
+		union_pairs(_parentVoxel, np.concatenate(_a), np.concatenate(_b))
+		_node[a:b] = _current[find_roots(_parentVoxel, _ranks)]
+
+	r = 0
+	_saddles = np.nonzero(_candidate)[0].tolist() + [_n]
+
+	for _saddle in _saddles:
+
+		if _saddle - r >= _runLength:
+			_add_run(r, _saddle)
+		else:
+			for v in range(r, _saddle):
+				_add_voxel(v)
+
+		if _saddle < _n:
+			_add_voxel(_saddle)
+		r = _saddle + 1
+
+	if verbose:
+		print('Nodes:', len(_birth), 'total time:', time.time() - start_time)
+
+	return {'voxels': _voxels, 'values': _values, 'node': _node.astype(index_dtype(len(_birth))), \
+	'parent': np.array(_nodeParent, dtype = np.int64), 'birth': np.array(_birth)*_sign, \
+	'merge': np.array(_merge)*_sign, 'shape': np.array(_shape), 'floor': np.array(_threshVal)}
+
+class componentTree:
+
+	'''
+
+	Queries of the component tree given by the arrays of
+	build_component_tree (or load_component_tree). Thresholds follow
+	the sign rule of extractStructuresMC and must lie beyond the floor.
+	Structures are numbered by their first voxel in C-order, as by
+	extractStructuresMC without the marching cubes correction.
+
+	'''
+
+	def __init__(self, _arrays):
+
+		self.voxels = _arrays['voxels']
+		self.values = _arrays['values']
+		self.node = _arrays['node']
+		self.parent = _arrays['parent']
+		self.birth = _arrays['birth']
+		self.merge = _arrays['merge']
+		self.shape = tuple(int(v) for v in _arrays['shape'])
+		self.floor = float(_arrays['floor'])
+
+		self._sign = 1 if self.floor > 0 else -1
+		self._key = self._sign*np.asarray(self.values, dtype = np.float64)
+		self._mergeKey = self._sign*self.merge
+
+	def save(self, _filename):
+
+		np.savez(_filename, voxels = self.voxels, values = self.values, node = self.node, \
+		parent = self.parent, birth = self.birth, merge = self.merge, \
+		shape = np.array(self.shape), floor = np.array(self.floor))
+
+	def _structures(self, _threshVal):
+
+		# Number of voxels beyond _threshVal (the first ones), the
+		# structure node of each of them, and the label of every node
+		# (0 if it is not a structure at _threshVal)
+
+		if self._sign*_threshVal < self._sign*self.floor or (_threshVal > 0) != (self.floor > 0):
+			raise ValueError('Threshold ' + str(_threshVal) + ' is not beyond the floor ' + str(self.floor))
+
+		_t = self._sign*_threshVal
+		_n = int(np.searchsorted(-self._key, -_t, side = 'left'))
+
+		# Climb to the highest ancestor not yet split off at _t
+
+		_up = np.where(self._mergeKey > _t, self.parent, np.arange(len(self.parent)))
+		while True:
+			_next = _up[_up]
+			if np.array_equal(_next, _up):
+				break
+			_up = _next
+
+		_nodes = _up[self.node[:_n]]
+
+		# Number the structures by their first voxel
+
+		_first = np.full(len(self.parent), np.iinfo(np.int64).max, dtype = np.int64)
+		np.minimum.at(_first, _nodes, self.voxels[:_n])
+		_structures = np.nonzero(_first < np.iinfo(np.int64).max)[0]
+		_structures = _structures[np.argsort(_first[_structures])]
+
+		_labels = np.zeros(len(self.parent), dtype = np.int64)
+		_labels[_structures] = np.arange(1, len(_structures) + 1)
+
+		return _n, _nodes, _labels, _first
+
+	def labels(self, _threshVal):
+
+		'''
+
+		Returns the label grid (of the narrowest unsigned type) at
+		_threshVal and the number of structures.
+
+		'''
+
+		_n, _nodes, _labels, _ = self._structures(_threshVal)
+		_structVal = int(_labels.max(initial = 0))
+
+		_grid = np.zeros(self.shape, dtype = label_dtype(_structVal))
+		_grid.reshape(-1)[self.voxels[:_n]] = _labels[_nodes]
+
+		return _grid, _structVal
+
+	def structures(self, _threshVal, _minVolume = 0):
+
+		'''
+
+		Returns the labels (as in labels()), volumes and tree nodes of
+		the structures at _threshVal with a volume above _minVolume.
+
+		'''
+
+		_n, _nodes, _labels, _ = self._structures(_threshVal)
+
+		_volume = np.bincount(_labels[_nodes], minlength = int(_labels.max(initial = 0)) + 1)[1:]
+		_keep = np.nonzero(_volume > _minVolume)[0]
+		_node = np.zeros(len(_volume), dtype = np.int64)
+		_node[_labels[_labels > 0] - 1] = np.nonzero(_labels > 0)[0]
+
+		return {'label': _keep + 1, 'volume': _volume[_keep], 'node': _node[_keep]}
+
+	def parents(self, _threshVal, _lowerThreshVal):
+
+		'''
+
+		Returns, for the structures 1 to n at _threshVal, the label of
+		the structure containing them at the less extreme threshold
+		_lowerThreshVal.
+
+		'''
+
+		if self._sign*_lowerThreshVal > self._sign*_threshVal:
+			raise ValueError('The lower threshold is more extreme than the threshold')
+
+		_n, _nodes, _labels, _first = self._structures(_threshVal)
+		_, _lowerNodes, _lowerLabels, _ = self._structures(_lowerThreshVal)
+
+		# Rank of the first voxel of every structure
+
+		_ranks = np.nonzero(self.voxels[:_n] == _first[_nodes])[0]
+		_ranks = _ranks[np.argsort(_labels[_nodes[_ranks]])]
+
+		return _lowerLabels[_lowerNodes[_ranks]]
+
+def load_component_tree(_filename):
+
+	_arrays = np.load(_filename)
+
+	return componentTree({v: _arrays[v] for v in _arrays.files})
@@ -0,0 +1,535 @@
+import numpy as np
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Array based 26-connected labeling of a thresholded 3D field.
+# The mask is split into runs of consecutive True values along z
+# (the fastest axis). Runs in neighboring (i, j) rows are connected
+# if their z-intervals overlap or touch, and the resulting equivalences
+# are resolved with a vectorized union-find. Structures are numbered
+# in the order of their first voxel in a C-order (i, j, k) scan, which
+# is the numbering produced by the neighbor scanning procedure.
+
+# Neighboring rows to check for each row (i, j). The remaining four
+# are covered by symmetry.
+_forwardRows = ((0, 1), (1, -1), (1, 0), (1, 1))
+
+# All 26 neighbor offsets
+neighborOffsets = tuple((di, dj, dk) for di in (-1, 0, 1) for dj in (-1, 0, 1) \
+for dk in (-1, 0, 1) if (di, dj, dk) != (0, 0, 0))
+
+# The 13 neighbors following a voxel in C-order. The other 13 are
+# covered by symmetry.
+forwardOffsets = tuple(v for v in neighborOffsets if v > (0, 0, 0))
+
+def index_dtype(n):
+
+	# Smallest signed integer type able to index n elements
+
+	return np.int32 if n < 2**31 else np.int64
+
+def label_dtype(n):
+
+	# Smallest unsigned integer type able to hold the labels 0 to n
+
+	for _dtype in (np.uint8, np.uint16, np.uint32):
+		if n <= np.iinfo(_dtype).max:
+			return _dtype
+
+	return np.uint64
+
+def find_runs(_mask, _slabSize = 64):
+
+	'''
+
+	Returns the runs of True values along z as three int64 arrays:
+	row index (i*ylen + j), start and (exclusive) end in z. Runs are
+	ordered by row and start. The mask is processed in slabs along x.
+
+	'''
+
+	xlen, ylen, zlen = np.shape(_mask)
+
+	_rows = []
+	_starts = []
+	_ends = []
+
+	for i0 in range(0, xlen, _slabSize):
+
+		_slab = np.asarray(_mask[i0:i0 + _slabSize], dtype = bool)
+		_slab = _slab.reshape(-1, zlen).view(np.int8)
+
+		_diff = np.diff(_slab, prepend = 0, append = 0, axis = 1)
+
+		r, s = np.nonzero(_diff == 1)
+		e = np.nonzero(_diff == -1)[1]
+
+		_rows.append(r.astype(np.int64) + i0*ylen)
+		_starts.append(s.astype(np.int64))
+		_ends.append(e.astype(np.int64))
+
+	if len(_rows) == 0:
+		return np.zeros(0, dtype = np.int64), np.zeros(0, dtype = np.int64), \
+		np.zeros(0, dtype = np.int64)
+
+	return np.concatenate(_rows), np.concatenate(_starts), np.concatenate(_ends)
+
+def run_adjacency(_rows, _starts, _ends, _shape):
+
+	'''
+
+	Returns all pairs (a, b) of runs that are 26-connected, i.e. the
+	rows are neighbors and the z-intervals overlap or touch.
+
+	'''
+
+	xlen, ylen, zlen = _shape
+
+	# Keys are monotonic over all runs so that a single searchsorted
+	# finds the candidate runs in any row
+
+	_width = zlen + 1
+	_startKey = _rows*_width + _starts
+	_endKey = _rows*_width + _ends
+
+	_i = _rows // ylen
+	_j = _rows % ylen
+
+	_a = []
+	_b = []
+
+	for di, dj in _forwardRows:
+
+		_valid = np.nonzero((_i + di < xlen) & (_j + dj >= 0) & (_j + dj < ylen))[0]
+		_q = (_rows[_valid] + di*ylen + dj)*_width
+
+		# First run in row q ending at or after our start and the
+		# last run in row q starting at or before our end
+
+		_lo = np.searchsorted(_endKey, _q + _starts[_valid], side = 'left')
+		_hi = np.searchsorted(_startKey, _q + _ends[_valid], side = 'right')
+		_n = np.maximum(_hi - _lo, 0)
+
+		_total = _n.sum()
+		if _total == 0:
+			continue
+
+		_first = np.cumsum(_n) - _n
+		_a.append(np.repeat(_valid, _n))
+		_b.append(np.repeat(_lo, _n) + np.arange(_total) - np.repeat(_first, _n))
+
+	if len(_a) == 0:
+		return np.zeros(0, dtype = np.int64), np.zeros(0, dtype = np.int64)
+
+	return np.concatenate(_a), np.concatenate(_b)
+
+def unique_sorted(_x):
+
+	# Sort based unique, considerably faster than np.unique on the
+	# large integer arrays used here
+
+	_x = np.sort(_x)
+	if len(_x) == 0:
+		return _x
+
+	return _x[np.concatenate(([True], _x[1:] != _x[:-1]))]
+
+def find_roots(_parent, _x):
+
+	# Follow parent pointers until every entry has reached its root
+
+	_r = _parent[_x]
+
+	while True:
+		_rr = _parent[_r]
+		if np.array_equal(_rr, _r):
+			return _r
+		_r = _rr
+
+def union_pairs(_parent, _a, _b, _size = None):
+
+	'''
+
+	Merges the sets containing _a and _b in place. Roots are always
+	hooked onto the smaller root, so the root of every set is its
+	smallest member. Returns the roots that were hooked. If _size is
+	given, the set sizes held at the roots are updated as well.
+
+	'''
+
+	_hooked = []
+
+	while len(_a) > 0:
+
+		_ra = find_roots(_parent, _a)
+		_rb = find_roots(_parent, _b)
+
+		# Compress the endpoints for the next round
+
+		_parent[_a] = _ra
+		_parent[_b] = _rb
+
+		_m = _ra != _rb
+		if not _m.any():
+			break
+
+		_a = _a[_m]
+		_b = _b[_m]
+		_lo = np.minimum(_ra[_m], _rb[_m])
+		_hi = np.maximum(_ra[_m], _rb[_m])
+
+		np.minimum.at(_parent, _hi, _lo)
+		_hi = unique_sorted(_hi)
+
+		# Hooked roots may have been hooked onto roots which were
+		# themselves hooked in this round. Pointer jumping on the
+		# hooked roots only collapses these chains.
+
+		while True:
+			_p = _parent[_hi]
+			_pp = _parent[_p]
+			if np.array_equal(_pp, _p):
+				break
+			_parent[_hi] = _pp
+
+		if _size is not None:
+			np.add.at(_size, _parent[_hi], _size[_hi])
+
+		_hooked.append(_hi)
+
+	if len(_hooked) == 0:
+		return np.zeros(0, dtype = np.int64)
+
+	return np.concatenate(_hooked)
+
+def label_runs(_rows, _starts, _ends, _shape):
+
+	'''
+
+	Returns the structure number of every run and the number of
+	structures.
+
+	'''
+
+	_parent = np.arange(len(_rows), dtype = np.int64)
+
+	_a, _b = run_adjacency(_rows, _starts, _ends, _shape)
+	union_pairs(_parent, _a, _b)
+
+	_roots = find_roots(_parent, np.arange(len(_rows), dtype = np.int64))
+
+	# Roots are the first run of each structure in scan order
+
+	_isRoot = _roots == np.arange(len(_rows))
+	_rootLabel = np.cumsum(_isRoot)
+
+	return _rootLabel[_roots], int(_isRoot.sum())
+
+def paint_runs(_rows, _starts, _ends, _runLabels, _shape, _out = None, \
+_dtype = np.uint32, _chunkSize = 2**24):
+
+	'''
+
+	Writes the run labels into a label grid of the given shape.
+
+	'''
+
+	xlen, ylen, zlen = _shape
+
+	if _out is None:
+		_out = np.zeros(_shape, dtype = _dtype)
+
+	_flat = _out.reshape(-1)
+	_lengths = _ends - _starts
+	_cumLength = np.cumsum(_lengths)
+
+	# Paint a bounded number of voxels at a time
+
+	r0 = 0
+	while r0 < len(_rows):
+
+		r1 = int(np.searchsorted(_cumLength, _cumLength[r0] - _lengths[r0] + _chunkSize, \
+		side = 'right'))
+		r1 = max(r1, r0 + 1)
+
+		_len = _lengths[r0:r1]
+		_total = _len.sum()
+		_offset = np.repeat(_rows[r0:r1]*zlen + _starts[r0:r1] - (np.cumsum(_len) - _len), _len)
+		_flat[_offset + np.arange(_total)] = np.repeat(_runLabels[r0:r1], _len)
+
+		r0 = r1
+
+	return _out
+
+def run_bounding_boxes(_rows, _starts, _ends, _runLabels, _n, _shape):
+
+	'''
+
+	Returns an (_n, 6) array with xmin, xmax, ymin, ymax, zmin, zmax of
+	every structure. Row l - 1 belongs to structure l.
+
+	'''
+
+	ylen = _shape[1]
+	_bbox = np.zeros((_n, 6), dtype = np.int64)
+	_bbox[:, 0::2] = np.iinfo(np.int64).max
+
+	_l = _runLabels - 1
+
+	for _col, _min, _max in ((0, _rows // ylen, _rows // ylen), \
+	(2, _rows % ylen, _rows % ylen), (4, _starts, _ends - 1)):
+		np.minimum.at(_bbox[:, _col], _l, _min)
+		np.maximum.at(_bbox[:, _col + 1], _l, _max)
+
+	return _bbox
+
+def label_components(_mask, _dtype = np.uint32):
+
+	'''
+
+	26-connected labeling of a boolean 3D array. Returns the label grid
+	(0 is empty space) and the number of structures.
+
+	'''
+
+	_shape = np.shape(_mask)
+	_rows, _starts, _ends = find_runs(_mask)
+	_runLabels, _n = label_runs(_rows, _starts, _ends, _shape)
+
+	return paint_runs(_rows, _starts, _ends, _runLabels, _shape, _dtype = _dtype), _n
+
+def neighbor_links(_voxels, _active, _shape):
+
+	'''
+
+	Returns the pairs (voxel, neighbor) between the flat indices in
+	_voxels and their 26 neighbors which are set in the flat boolean
+	array _active. The field is not periodic.
+
+	'''
+
+	xlen, ylen, zlen = _shape
+
+	_i, _r = np.divmod(_voxels, ylen*zlen)
+	_j, _k = np.divmod(_r, zlen)
+
+	_a = []
+	_b = []
+
+	for di, dj, dk in neighborOffsets:
+
+		_valid = (_i + di >= 0) & (_i + di < xlen) & (_j + dj >= 0) & \
+		(_j + dj < ylen) & (_k + dk >= 0) & (_k + dk < zlen)
+
+		_v = _voxels[_valid]
+		_n = _v + (di*ylen + dj)*zlen + dk
+
+		_linked = _active[_n]
+		_a.append(_v[_linked])
+		_b.append(_n[_linked])
+
+	return np.concatenate(_a), np.concatenate(_b)
+
+class incrementalComponents:
+
+	'''
+
+	26-connected components of a set of voxels which only grows, as
+	for a threshold lowered step by step. Voxels are added with add()
+	and the number of structures, the largest structure volume and
+	the total volume are kept up to date.
+
+	'''
+
+	def __init__(self, _shape, _chunkSize = 2**20):
+
+		self._shape = tuple(_shape)
+		_n = int(np.prod(self._shape))
+		_dtype = index_dtype(_n)
+
+		self._parent = np.arange(_n, dtype = _dtype)
+		self._size = np.zeros(_n, dtype = _dtype)
+		self._active = np.zeros(_n, dtype = bool)
+		self._chunkSize = _chunkSize
+
+		self.numberOfStructures = 0
+		self.Vmax = 0
+		self.Vall = 0
+
+	def roots(self, _voxels):
+
+		return find_roots(self._parent, _voxels)
+
+	def add(self, _voxels):
+
+		'''
+
+		Adds the voxels (flat indices) and merges them with their active
+		neighbors. Returns the roots which were hooked onto other roots.
+
+		'''
+
+		_voxels = np.asarray(_voxels, dtype = self._parent.dtype)
+
+		self._active[_voxels] = True
+		self._size[_voxels] = 1
+		self.numberOfStructures += len(_voxels)
+		self.Vall += len(_voxels)
+		if len(_voxels) > 0:
+			self.Vmax = max(self.Vmax, 1)
+
+		_hooked = []
+
+		for c0 in range(0, len(_voxels), self._chunkSize):
+
+			_a, _b = neighbor_links(_voxels[c0:c0 + self._chunkSize], self._active, self._shape)
+			_hi = union_pairs(self._parent, _a, _b, self._size)
+
+			if len(_hi) > 0:
+				self.numberOfStructures -= len(_hi)
+				self.Vmax = max(self.Vmax, int(self._size[self._parent[_hi]].max()))
+				_hooked.append(_hi)
+
+		if len(_hooked) == 0:
+			return np.zeros(0, dtype = self._parent.dtype)
+
+		return np.concatenate(_hooked)
+
+def label_bounding_boxes(_labels, _n, _slabSize = 16):
+
+	'''
+
+	Returns an (_n, 6) array with xmin, xmax, ymin, ymax, zmin, zmax of
+	labels 1 to _n of the label grid, processed in slabs along x.
+
+	'''
+
+	_bbox = np.zeros((_n, 6), dtype = np.int64)
+	_bbox[:, 0::2] = np.iinfo(np.int64).max
+	_bbox[:, 1::2] = -1
+
+	for i0 in range(0, np.shape(_labels)[0], _slabSize):
+
+		_slab = np.asarray(_labels[i0:i0 + _slabSize])
+		_i, _j, _k = np.nonzero(_slab)
+		_l = _slab[_i, _j, _k].astype(np.int64) - 1
+
+		for _col, _v in ((0, _i + i0), (2, _j), (4, _k)):
+			np.minimum.at(_bbox[:, _col], _l, _v)
+			np.maximum.at(_bbox[:, _col + 1], _l, _v)
+
+	return _bbox
+
+def label_counts(_labels, _slabSize = 16):
+
+	'''
+
+	Returns the number of voxels of every label 0 to max(_labels) of the
+	label grid, counted in slabs along the first axis.
+
+	'''
+
+	_counts = np.zeros(1, dtype = np.int64)
+
+	for i0 in range(0, np.shape(_labels)[0], _slabSize):
+
+		_slab = np.bincount(np.asarray(_labels[i0:i0 + _slabSize]).ravel())
+		if len(_slab) > len(_counts):
+			_counts = np.concatenate((_counts, np.zeros(len(_slab) - len(_counts), dtype = np.int64)))
+		_counts[:len(_slab)] += _slab
+
+	return _counts
+
+def _wrapped_pairs(_labels, _axis, _periodic, _cuts = None):
+
+	# Pairs of labels touching across the wrapped face of _axis: the
+	# last plane against the first, shifted by -1, 0, 1 along the other
+	# axes (with wrap-around along those which are periodic as well).
+	# Links where _cuts[d0 + 1, d1 + 1] is True are left out.
+
+	_last = np.take(_labels, -1, axis = _axis).astype(np.int64)
+	_first = np.take(_labels, 0, axis = _axis).astype(np.int64)
+	_others = [_periodic[a] for a in range(3) if a != _axis]
+	n0, n1 = np.shape(_last)
+
+	_a = []
+	_b = []
+
+	for d0 in (-1, 0, 1):
+		for d1 in (-1, 0, 1):
+
+			_l = _last
+			_f = _first
+			_c = None if _cuts is None else _cuts[d0 + 1, d1 + 1]
+
+			for _ax, d, n, _wrap in ((0, d0, n0, _others[0]), (1, d1, n1, _others[1])):
+
+				if d == 0:
+					continue
+
+				if _wrap:
+					_f = np.roll(_f, -d, axis = _ax)
+				else:
+					_l = np.take(_l, np.arange(max(0, -d), n - max(0, d)), axis = _ax)
+					_f = np.take(_f, np.arange(max(0, d), n - max(0, -d)), axis = _ax)
+					if _c is not None:
+						_c = np.take(_c, np.arange(max(0, -d), n - max(0, d)), axis = _ax)
+
+			_m = (_l > 0) & (_f > 0)
+			if _c is not None:
+				_m &= ~_c
+			_a.append(_l[_m])
+			_b.append(_f[_m])
+
+	_a = np.concatenate(_a)
+	_b = np.concatenate(_b)
+
+	_width = _b.max(initial = 0) + 1
+	_keys = unique_sorted(_a*_width + _b)
+
+	return _keys // _width, _keys % _width
+
+def merge_periodic(_labels, _periodic, _n = None, _slabSize = 16, _wrappedCuts = None):
+
+	'''
+
+	Merges the structures of the 3D label grid _labels (numbered by
+	their first voxel, as by all engines) which touch across the
+	wrapped faces of the periodic axes (_periodic holds one bool per
+	axis). _wrappedCuts leaves out the links cut by the MC correction
+	(see MCCases.wrapped_link_cuts). The grid is relabeled in place,
+	numbering the merged structures by their first voxel again.
+	Returns the number of structures.
+
+	'''
+
+	if _n is None:
+		_n = int(np.max(_labels, initial = 0))
+
+	_parent = np.arange(_n + 1, dtype = np.int64)
+
+	for _axis in range(3):
+		if _periodic[_axis]:
+			_a, _b = _wrapped_pairs(_labels, _axis, _periodic, \
+			None if _wrappedCuts is None else _wrappedCuts[_axis])
+			union_pairs(_parent, _a, _b)
+
+	# A root is the smallest, i.e. first, label of its set
+
+	_roots = find_roots(_parent, np.arange(_n + 1, dtype = np.int64))
+	_isRoot = _roots == np.arange(_n + 1)
+	_isRoot[0] = False
+	_final = np.cumsum(_isRoot)[_roots].astype(_labels.dtype)
+
+	for i0 in range(0, np.shape(_labels)[0], _slabSize):
+		_labels[i0:i0 + _slabSize] = _final[_labels[i0:i0 + _slabSize]]
+
+	return int(_isRoot.sum())
@@ -3,7 +3,21 @@ import time
 import array
 import copy
 import time	
-from MCOutliers import outliers
+from MCOutliers import isOutlierCase, removeOffsets
+from MCCases import correction_candidates, wrapped_link_cuts
+from floodQueue import floodQueue
+from connectedComponents import find_runs, label_runs, paint_runs, \
+run_bounding_boxes, label_bounding_boxes, label_dtype, label_counts, merge_periodic
+from packedMask import packedMask
+from structureStatistics import structure_statistics, voxel_statistics, write_statistics
+from extractionStats import extractionStats
+from progressReporter import progressReporter, print_progress
+from occupancyPyramid import occupancyPyramid
+from regionOfInterest import roi_ranges, truncated_structures
+from sparseLabeling import active_voxels, label_sparse
+from edgeCutLabeling import label_edge_cut
+from structureIndex import structure_index
+from blockExtraction import label_blocks, threshold
 
 #---------------------------------------------------------------------#
 
@@ -15,20 +29,96 @@ from MCOutliers import outliers
 
 #---------------------------------------------------------------------#
 
+_outlierCaseList = isOutlierCase.tolist()
+
 class extractStructuresMC:
 	
 	def __init__(self, _threshVal, c, xlen, ylen, zlen, _zFastest, \
 	verbose, _writeNeighborInformation,	_writePercolationData, \
-	_marchingCubesExt):
+	_marchingCubesExt, _engine = 'scan', _queueMemoryLimit = None, \
+	_workers = 1, _blockShape = (128, 128, 128), _thresholdSlabSize = 16, \
+	_lowMemory = False, _statisticsFile = None, _periodic = (False, False, False), \
+	_statsHooks = None, _progress = None, _progressInterval = 1.0, _roi = None, \
+	_brickSize = 8, _buffers = None):
+		
+		# _engine selects how structures are labeled:
+		# 'scan' - neighbor scanning procedure (with or without MC correction)
+		# 'array' - array based labeling, same structures as 'scan' without MC
+		# 'blocks' - array based labeling of blocks of shape _blockShape,
+		# spread over _workers processes
+		# 'sparse' - labeling of the active voxels only, for very low fill
+		# fractions (no dense mask is built, see sparseLabeling)
+		# 'edgecut' - order independent form of the MC correction, which
+		# cuts the links separated by outlier cases of the mask and labels
+		# the rest with whole-array operations (see edgeCutLabeling). Needs
+		# _marchingCubesExt.
+		# _queueMemoryLimit caps the memory (in bytes) of the flood fill
+		# queue of the neighbor scan. None means no limit.
+		# _thresholdSlabSize is the number of planes thresholded at a time.
+		# _lowMemory stores the thresholded mask with one bit per voxel and
+		# the structure labels, without padding, in the narrowest unsigned
+		# type holding the number of structures.
+		# _statisticsFile (.npz, .npy or .csv) receives the per-structure
+		# statistics table (see structureStatistics) at the end of extract().
+		# _periodic holds one bool per axis (x, y, z). Structures touching
+		# across the faces of a periodic axis are merged after labeling
+		# (with MC correction of the links across the faces).
+		# _statsHooks are called with the phase timings and counters of
+		# every extraction (see extractionStats).
+		# _progress is called with the progress of the scan at most every
+		# _progressInterval seconds, and with messages (see progressReporter).
+		# Verbose runs print them if no callback is given, otherwise
+		# nothing is reported.
+		# _roi restricts the extraction to a box of the field, one index
+		# range (start, stop) per axis or None (see regionOfInterest, also
+		# for physical bounds). Labels and statistics are those of the box
+		# and self.truncated flags the structures cut by its faces.
+		# _brickSize is the edge of the bricks of the occupancy pyramid
+		# (see occupancyPyramid) with which the scan skips empty space.
+		# None scans every voxel.
+		# _buffers is a dictionary in which the mask (with the threshold it
+		# holds), the label grid and the flood fill queue are kept and
+		# reused by the next extractor given the same dictionary, for
+		# extractions of one field at many thresholds (see
+		# extractionSession). The dictionary belongs to one field.
+		
+		if _engine not in ('scan', 'array', 'blocks', 'sparse', 'edgecut'):
+			raise ValueError('Unknown labeling engine: ' + str(_engine))
+		if np.ndim(_periodic) == 0:
+			_periodic = (_periodic,)*3
+		if len(_periodic) != 3:
+			raise ValueError('_periodic needs one value per axis: ' + str(_periodic))
+		if _engine not in ('scan', 'edgecut') and _marchingCubesExt:
+			raise ValueError('The ' + _engine + ' engine does not support the marching cubes correction')
+		if _engine == 'edgecut' and not _marchingCubesExt:
+			raise ValueError('The edgecut engine is a form of the marching cubes correction')
 		
 		self.verbose = verbose
+		self._engine = _engine
+		self._queueMemoryLimit = _queueMemoryLimit
+		self._workers = _workers
+		self._blockShape = _blockShape
+		self._brickSize = _brickSize
+		self._buffers = _buffers
+		self.occupancy = None
+		self._lowMemory = _lowMemory
+		self._statisticsFile = _statisticsFile
+		self._periodic = tuple(bool(v) for v in _periodic)
+		self.peakQueueLength = 0
+		self.outlierCaseCount = 0
+		self.truncated = None
+		self._statsHooks = _statsHooks
+		self.stats = extractionStats(_statsHooks)
 		self._marchingCubesExt = _marchingCubesExt
 		self._writeNeighborInformation = _writeNeighborInformation
 		self._writePercolationData = _writePercolationData
+		if _progress is None and verbose:
+			_progress = print_progress
+		self._progress = progressReporter(_progress, _progressInterval)
 		if self._marchingCubesExt:
-			print('Marching cubes correction enabled..')
+			self._progress.message('Marching cubes correction enabled..')
 		else:
-			print('Marching cubes correction NOT enabled..')
+			self._progress.message('Marching cubes correction NOT enabled..')
 		self._threshVal = _threshVal
 		if self.verbose:
 			print('Chosen threshold:', _threshVal)
@@ -40,867 +130,107 @@ class extractStructuresMC:
 			print('Data is of shape: ' + str(xlen) + ', ' + str(ylen) + ', '\
 		 + str(zlen))
 		
-		# Reshape data
+		self.stats.start('threshold')
+		
+		# Reshape data (a view for contiguous arrays and memmaps, e.g. from
+		# rawReader.read_raw)
 		if _zFastest:
-			self.c = np.reshape(c, [self.xlen, self.ylen, self.zlen])
+			c = np.reshape(c, [self.xlen, self.ylen, self.zlen])
 		else:
-			self.c = np.reshape(c, [self.xlen, self.ylen, self.zlen], order = 'F')
-			
-		# Threshold the scalar field based on the sign of the value
-		if _threshVal > 0:
-			self.c = (self.c > self._threshVal)
-		else:
-			self.c = (self.c < self._threshVal)
+			c = np.reshape(c, [self.xlen, self.ylen, self.zlen], order = 'F')
+		
+		# Only the ROI (a view) is thresholded and labeled
+		self.fieldShape = (xlen, ylen, zlen)
+		self._roi = _roi
+		self.roi = roi_ranges(_roi, self.fieldShape)
+		if _roi is not None:
+			for _axis in range(3):
+				if self._periodic[_axis] and self.roi[_axis] != (0, self.fieldShape[_axis]):
+					raise ValueError('A periodic axis cannot be cut by the ROI')
+			c = c[tuple(slice(*v) for v in self.roi)]
+			xlen, ylen, zlen = np.shape(c)
+			self.xlen, self.ylen, self.zlen = xlen, ylen, zlen
 		
-		# Pad array with zeros in all dimensions
-		mz = np.zeros((xlen + 1, ylen + 1, zlen + 1), dtype = bool)
-		mz[:np.shape(self.c)[0], :np.shape(self.c)[1], :np.shape(self.c)[2]] = self.c
+		if _engine == 'sparse':
+			self._activeVoxels = active_voxels(c, self._threshVal, _thresholdSlabSize)
+			self.c = None
+			self.stats.stop('threshold')
+			self._thresholdTime = self.stats.phaseTimes['threshold']
+			return
+		
+		# Pad array with zeros in all dimensions. A mask left in _buffers
+		# by an earlier extractor is reused: its padding is never written.
+		mz = None if _buffers is None else _buffers.get('mask')
+		if mz is None or np.shape(mz) != (xlen + 1, ylen + 1, zlen + 1) or \
+		isinstance(mz, packedMask) != bool(_lowMemory):
+			if _lowMemory:
+				mz = packedMask((xlen + 1, ylen + 1, zlen + 1))
+			else:
+				mz = np.zeros((xlen + 1, ylen + 1, zlen + 1), dtype = bool)
+			if _buffers is not None:
+				_buffers['mask'] = mz
+				_buffers['maskThreshold'] = None
+		
+		# Threshold the scalar field based on the sign of the value, in
+		# slabs along the slowest axis so that the float field is never
+		# copied as a whole. A reused mask may hold this threshold already.
+		if _buffers is None or _buffers.get('maskThreshold') != _threshVal:
+			_axis = 0 if _zFastest else 2
+			for n0 in range(0, np.shape(c)[_axis], _thresholdSlabSize):
+				_slab = [slice(0, xlen), slice(0, ylen), slice(0, zlen)]
+				_slab[_axis] = slice(n0, min(n0 + _thresholdSlabSize, np.shape(c)[_axis]))
+				mz[tuple(_slab)] = threshold(c[tuple(_slab)], self._threshVal)
+			if _buffers is not None:
+				_buffers['maskThreshold'] = _threshVal
 		self.c = mz
 		
+		self.stats.stop('threshold')
+		self._thresholdTime = self.stats.phaseTimes['threshold']
+		
 	def find_case_number(self, _cube):
 											
 		return sum(2**v for v in range(8) if _cube[v] == True)
 	
-	def extract(self):
+	def extract(self, _returnStatistics = False, _returnExtractionStats = False, \
+	_returnIndex = False):
+
+		# Returns the labels of the original grid, flattened. With
+		# _returnStatistics, also returns the statistics table, with
+		# _returnExtractionStats the timings and counters (self.stats) and
+		# with _returnIndex the offsets and voxels of the CSR index of the
+		# structures (see structureIndex).
 
 		# Start timer
 
 		start_time = time.time()
+		self._progress.reset()
+		
+		self.stats = extractionStats(self._statsHooks)
+		self.stats.phaseTimes['threshold'] = self._thresholdTime
 
-		# All boxes satisfying the thresholding criterion are checked
-		# for their neighboring cells (26 - 6 faces, 12 edges, 8 corners). 
-
-		_structVal = 0
-		_structValuedGrid = np.zeros((self.xlen + 1, self.ylen + 1, \
-		self.zlen + 1), dtype = np.uint32)	# uint32 has values from 0 upto 4294967295
-		_outlierCaseCount = 0
-
-		for i in range(self.xlen + 1):
-			for j in range(self.ylen + 1):
-				for k in range(self.zlen + 1):
-					
-					if self.c[i,j,k]:
-						
-						if not _structValuedGrid[i,j,k] > 0:
-							
-								_structVal += 1
-								
-								if self.verbose:
-									print(_structVal)
-								
-								_neighborVal = []
-								_structValuedGrid[i,j,k] = _structVal
-								
-								_loopCounter = 0
-								_neighborCounter = 0
-								
-								_origiVal = i
-								_origjVal = j
-								_origkVal = k
-								
-								while True:
-									
-									# Reset all corner flags
-								
-									_c1 = False
-									_c2 = False
-									_c3 = False
-									_c4 = False
-									_c5 = False
-									_c6 = False
-									_c7 = False
-									_c8 = False
-								
-									# Reset all face flags
-								
-									_f1 = False
-									_f2 = False
-									_f3 = False
-									_f4 = False
-									_f5 = False
-									_f6 = False
-									
-									# Reset all edge flags
-									
-									_e1 = False
-									_e2 = False
-									_e3 = False
-									_e4 = False
-									_e5 = False
-									_e6 = False
-									_e7 = False
-									_e8 = False
-									_e9 = False
-									_e10 = False
-									_e11 = False
-									_e12 = False
-									
-									_numberOfNeighbors = 0
-									
-									# Create aux cube [3, 3, 3]
-								
-									_i = 0
-									_j = 0
-									_k = 0
-									_auxCube = np.zeros((3, 3, 3))
-									
-									if _loopCounter > 0:
-										
-										try:
-										
-											i = _neighborVal[_neighborCounter][0]
-											j = _neighborVal[_neighborCounter][1]
-											k = _neighborVal[_neighborCounter][2]
-											
-											_neighborCounter += 1
-										
-										except IndexError:
-											
-											break
-									
-									# Faces
-									
-									try:
-										
-										if self.c[i+1,j,k]:
-											
-											if not _structValuedGrid[i+1, j, k] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i+1,j,k] = _structVal
-												_auxCube[_i+1,_j,_k] = 1
-												_f1 = True
-									
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i-1,j,k]:
-											
-											if not _structValuedGrid[i-1, j, k] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i-1,j,k] = _structVal
-												_auxCube[_i-1,_j,_k] = 1
-												_f2 = True
-												
-									except IndexError:
-										
-										pass
-									
-									try:
-										
-										if self.c[i,j+1,k]:
-											
-											if not _structValuedGrid[i, j+1, k] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i,j+1,k] = _structVal
-												_auxCube[_i,_j+1,_k] = 1
-												_f3 = True
-												
-									except IndexError:
-										
-										pass
-									
-									try:
-										
-										if self.c[i,j-1,k]:
-											
-											if not _structValuedGrid[i, j-1, k] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i,j-1,k] = _structVal
-												_auxCube[_i,_j-1,_k] = 1
-												_f4 = True
-												
-									except IndexError:
-										
-										pass
-									
-									try:
-										
-										if self.c[i,j,k+1]:
-											
-											if not _structValuedGrid[i, j, k+1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i,j,k+1] = _structVal
-												_auxCube[_i,_j,_k+1] = 1
-												_f5 = True
-												
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i,j,k-1]:
-											
-											if not _structValuedGrid[i, j, k-1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i,j,k-1] = _structVal
-												_auxCube[_i,_j,_k-1] = 1
-												_f6 = True
-									
-									except IndexError:
-										
-										pass
-										
-									# Edges
-									
-									try:
-										
-										if self.c[i+1,j+1,k]:
-											
-											if not _structValuedGrid[i+1, j+1, k] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i+1,j+1,k] = _structVal
-												_auxCube[_i+1,_j+1,_k] = 1
-												_e1 = True
-												
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i+1,j-1,k]:
-											
-											if not _structValuedGrid[i+1, j-1, k] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i+1,j-1,k] = _structVal
-												_auxCube[_i+1,_j-1,_k] = 1
-												_e2 = True
-									
-									except IndexError:
-										
-										pass
-									
-									try:
-										
-										if self.c[i-1,j+1,k]:
-											
-											if not _structValuedGrid[i-1, j+1, k] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i-1,j+1,k] = _structVal
-												_auxCube[_i-1,_j+1,_k] = 1
-												_e3 = True
-												
-									except IndexError:
-										
-										pass
-									
-									try:
-										
-										if self.c[i-1,j-1,k]:
-											
-											if not _structValuedGrid[i-1, j-1, k] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i-1,j-1,k] = _structVal
-												_auxCube[_i-1,_j-1,_k] = 1
-												_e4 = True
-									
-									except IndexError:
-										
-										pass
-									
-									try:
-										
-										if self.c[i+1,j,k+1]:
-											
-											if not _structValuedGrid[i+1, j, k+1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i+1,j,k+1] = _structVal
-												_auxCube[_i+1,_j,_k+1] = _structVal
-												_e5 = True
-									
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i-1,j,k+1]:
-											
-											if not _structValuedGrid[i-1, j, k+1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i-1,j,k+1] = _structVal
-												_auxCube[_i-1,_j,_k+1] = 1
-												_e6 = True
-												
-									except IndexError:
-										
-										pass
-									
-									try:
-										
-										if self.c[i,j+1,k+1]:
-											
-											if not _structValuedGrid[i, j+1, k+1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i,j+1,k+1] = _structVal
-												_auxCube[_i,_j+1,_k+1] = 1
-												_e7 = True
-									
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i,j-1,k+1]:
-											
-											if not _structValuedGrid[i, j-1, k+1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i,j-1,k+1] = _structVal
-												_auxCube[_i,_j-1,_k+1] = 1
-												_e8 = True
-												
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i+1,j,k-1]:
-											
-											if not _structValuedGrid[i+1, j, k-1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i+1,j,k-1] = _structVal
-												_auxCube[_i+1,_j,_k-1] = 1
-												_e9 = True
-												
-									except IndexError:
-										
-										pass
-									
-									try:
-										
-										if self.c[i-1,j,k-1]:
-											
-											if not _structValuedGrid[i-1, j, k-1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i-1,j,k-1] = _structVal
-												_auxCube[_i-1,_j,_k-1] = 1
-												_e10 = True
-												
-									except IndexError:
-										
-										pass
-									
-									try:
-										
-										if self.c[i,j+1,k-1]:
-											
-											if not _structValuedGrid[i, j+1, k-1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i,j+1,k-1] = _structVal
-												_auxCube[_i,_j+1,_k-1] = 1
-												_e11 = True
-									
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i,j-1,k-1]:
-											
-											if not _structValuedGrid[i, j-1, k-1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i,j-1,k-1] = _structVal
-												_auxCube[_i,_j-1,_k-1] = 1
-												_e12 = True
-												
-									except IndexError:
-										
-										pass
-										
-									# Corners
-									
-									try:
-										
-										if self.c[i+1,j+1,k+1]:
-											
-											if not _structValuedGrid[i+1, j+1, k+1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i+1,j+1,k+1] = _structVal
-												_auxCube[_i+1,_j+1,_k+1] = 1
-												_c1 = True
-												
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i+1,j-1,k+1]:
-											
-											if not _structValuedGrid[i+1, j-1, k+1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i+1,j-1,k+1] = _structVal
-												_auxCube[_i+1,_j-1,_k+1] = 1
-												_c2 = True
-												
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i-1,j+1,k+1]:
-											
-											if not _structValuedGrid[i-1, j+1, k+1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i-1,j+1,k+1] = _structVal
-												_auxCube[_i-1,_j+1,_k+1] = 1
-												_c3 = True
-												
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i-1,j-1,k+1]:
-											
-											if not _structValuedGrid[i-1, j-1, k+1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i-1,j-1,k+1] = _structVal
-												_auxCube[_i-1,_j-1,_k+1] = 1
-												_c4 = True
-												
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i+1,j+1,k-1]:
-											
-											if not _structValuedGrid[i+1, j+1, k-1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i+1,j+1,k-1] = _structVal
-												_auxCube[_i+1,_j+1,_k-1] = 1
-												_c5 = True
-												
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i+1,j-1,k-1]:
-											
-											if not _structValuedGrid[i+1, j-1, k-1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i+1,j-1,k-1] = _structVal
-												_auxCube[_i+1,_j-1,_k-1] = 1
-												_c6 = True
-												
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i-1,j+1,k-1]:
-											
-											if not _structValuedGrid[i-1, j+1, k-1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i-1,j+1,k-1] = _structVal
-												_auxCube[_i-1,_j+1,_k-1] = 1
-												_c7 = True
-												
-									except IndexError:
-										
-										pass
-										
-									try:
-										
-										if self.c[i-1,j-1,k-1]:
-											
-											if not _structValuedGrid[i-1, j-1, k-1] > 0:
-											
-												_numberOfNeighbors += 1
-												_structValuedGrid[i-1,j-1,k-1] = _structVal
-												_auxCube[_i-1,_j-1,_k-1] = 1
-												_c8 = True
-												
-									except IndexError:
-										
-										pass
-									
-									if self._marchingCubesExt:
-									
-										# Marching cubes extension
-										# All the points are checked again to see how the surface mesh is constructed
-										
-										_cornerFlags = [_c1, _c2, _c3, _c4, _c5, _c6, _c7, _c8]
-										_faceFlags = [_f1, _f2, _f3, _f4, _f5, _f6]
-										_edgeFlags = [_e1, _e2, _e3, _e4, _e5, _e6, _e7, _e8, _e9, _e10, _e11, _e12]
-										
-										_cube1 = [_f6, _e9, _c6, _e12, True, _f1, _e2, _f4]
-										_cube2 = [_e10, _f6, _e12, _c8, _f2, True, _f4, _e4]
-										_cube3 = [_c7, _e11, _f6, _e10, _e3, _f3, True, _f2]
-										_cube4 = [_e11, _c5, _e9, _f6, _f3, _e1, _f1, True]
-										_cube5 = [True, _f1, _e2, _f4, _f5, _e5, _c2, _e8]
-										_cube6 = [_f2, True, _f4, _e4, _e6, _f5, _e8, _c4]
-										_cube7 = [_e3, _f3, True, _f2, _c3, _e7, _f5, _e6]
-										_cube8 = [_f3, _e1, _f1, True, _e7, _c1, _e5, _f5]
-										
-										# Identify the cases of the cube
-										
-										_cases = [self.find_case_number(_cube1), self.find_case_number(_cube2), \
-										self.find_case_number(_cube3), self.find_case_number(_cube4), \
-										self.find_case_number(_cube5), self.find_case_number(_cube6), \
-										self.find_case_number(_cube7), self.find_case_number(_cube8)]
-										
-										sysErrFlag = False
-										
-										for ii in range(8):
-											
-											_caseVal = outliers(_cases[ii])
-											
-											if len(_caseVal) > 0:
-												
-												sysErrFlag = True
-												_outlierCaseCount += 1
-												
-												# Keep the points which contain [i, j, k]. Discard all remaining ones.
-												# NOTE: [i, j, k] differs for all cubes.
-												
-												if ii == 0: # corresponding to cube 1
-													for jj in range(len(_caseVal)):
-														if 4 not in _caseVal[jj]:
-															_removeVal = _caseVal[jj]
-															for kk in range(len(_removeVal)):
-																if _removeVal[kk] == 0:
-																	_structValuedGrid[i, j, k-1] = 0
-																	_auxCube[_i, _j, _k-1] = 0
-																if _removeVal[kk] == 1:
-																	_structValuedGrid[i+1, j, k-1] = 0
-																	_auxCube[_i+1, _j, _k-1] = 0
-																if _removeVal[kk] == 2:
-																	_structValuedGrid[i+1, j-1, k-1] = 0
-																	_auxCube[_i+1, _j-1, _k-1] = 0
-																if _removeVal[kk] == 3:
-																	_structValuedGrid[i, j-1, k-1] = 0
-																	_auxCube[_i, _j-1, _k-1] = 0
-																if _removeVal[kk] == 5:
-																	_structValuedGrid[i+1, j, k] = 0
-																	_auxCube[_i+1, _j, _k] = 0
-																if _removeVal[kk] == 6:
-																	_structValuedGrid[i+1, j-1, k] = 0
-																	_auxCube[_i+1, _j-1, _k] = 0
-																if _removeVal[kk] == 7:
-																	_structValuedGrid[i, j-1, k] = 0
-																	_auxCube[_i, _j-1, _k] = 0
-												
-												if ii == 1: # corresponding to cube 2
-													for jj in range(len(_caseVal)):
-														if 5 not in _caseVal[jj]:
-															_removeVal = _caseVal[jj]
-															for kk in range(len(_removeVal)):
-																if _removeVal[kk] == 0:
-																	_structValuedGrid[i-1, j, k-1] = 0
-																	_auxCube[_i-1, _j, _k-1] = 0
-																if _removeVal[kk] == 1:
-																	_structValuedGrid[i, j, k-1] = 0
-																	_auxCube[_i, _j, _k-1] = 0
-																if _removeVal[kk] == 2:
-																	_structValuedGrid[i, j-1, k-1] = 0
-																	_auxCube[_i, _j-1, _k-1] = 0
-																if _removeVal[kk] == 3:
-																	_structValuedGrid[i-1, j-1, k-1] = 0
-																	_auxCube[_i-1, _j-1, _k-1] = 0
-																if _removeVal[kk] == 4:
-																	_structValuedGrid[i-1, j, k] = 0
-																	_auxCube[_i-1, _j, _k] = 0
-																if _removeVal[kk] == 6:
-																	_structValuedGrid[i, j-1, k] = 0
-																	_auxCube[_i, _j-1, _k] = 0
-																if _removeVal[kk] == 7:
-																	_structValuedGrid[i-1, j-1, k] = 0
-																	_auxCube[_i-1, _j-1, _k] = 0
-												
-												if ii == 2: # corresponding to cube 3
-													for jj in range(len(_caseVal)):
-														if 6 not in _caseVal[jj]:
-															_removeVal = _caseVal[jj]
-															for kk in range(len(_removeVal)):
-																if _removeVal[kk] == 0:
-																	_structValuedGrid[i-1, j+1, k-1] = 0
-																	_auxCube[_i-1, _j+1, _k-1] = 0
-																if _removeVal[kk] == 1:
-																	_structValuedGrid[i, j+1, k-1] = 0
-																	_auxCube[_i, _j+1, _k-1] = 0
-																if _removeVal[kk] == 2:
-																	_structValuedGrid[i, j, k-1] = 0
-																	_auxCube[_i, _j, _k-1] = 0
-																if _removeVal[kk] == 3:
-																	_structValuedGrid[i-1, j, k-1] = 0
-																	_auxCube[_i-1, _j, _k-1] = 0
-																if _removeVal[kk] == 4:
-																	_structValuedGrid[i-1, j+1, k] = 0
-																	_auxCube[_i-1, _j+1, _k] = 0
-																if _removeVal[kk] == 5:
-																	_structValuedGrid[i, j+1, k] = 0
-																	_auxCube[_i, _j+1, _k] = 0
-																if _removeVal[kk] == 7:
-																	_structValuedGrid[i-1, j, k] = 0
-																	_auxCube[_i-1, _j, _k] = 0
-												
-												if ii == 3: # corresponding to cube 4
-													for jj in range(len(_caseVal)):
-														if 7 not in _caseVal[jj]:
-															_removeVal = _caseVal[jj]
-															for kk in range(len(_removeVal)):
-																	if _removeVal[kk] == 0:
-																		_structValuedGrid[i, j+1, k-1] = 0
-																		_auxCube[_i, _j+1, _k-1] = 0
-																	if _removeVal[kk] == 1:
-																		_structValuedGrid[i+1, j+1, k-1] = 0
-																		_auxCube[_i+1, _j+1, _k-1] = 0
-																	if _removeVal[kk] == 2:
-																		_structValuedGrid[i+1, j, k-1] = 0
-																		_auxCube[_i+1, _j, _k-1] = 0
-																	if _removeVal[kk] == 3:
-																		_structValuedGrid[i, j, k-1] = 0
-																		_auxCube[_i, _j, _k-1] = 0
-																	if _removeVal[kk] == 4:
-																		_structValuedGrid[i, j+1, k] = 0
-																		_auxCube[_i, _j+1, _k] = 0
-																	if _removeVal[kk] == 5:
-																		_structValuedGrid[i+1, j+1, k] = 0
-																		_auxCube[_i+1, _j+1, _k] = 0
-																	if _removeVal[kk] == 6:
-																		_structValuedGrid[i+1, j, k] = 0
-																		_auxCube[_i+1, _j, _k] = 0
-												
-												if ii == 4: # corresponding to cube 5
-													for jj in range(len(_caseVal)):
-														if 0 not in _caseVal[jj]:
-															_removeVal = _caseVal[jj]
-															for kk in range(len(_removeVal)):
-																if _removeVal[kk] == 1:
-																	_structValuedGrid[i+1, j, k] = 0
-																	_auxCube[_i+1, _j, _k] = 0
-																if _removeVal[kk] == 2:
-																	_structValuedGrid[i+1, j-1, k] = 0
-																	_auxCube[_i+1, _j-1, _k] = 0
-																if _removeVal[kk] == 3:
-																	_structValuedGrid[i, j-1, k] = 0
-																	_auxCube[_i, _j-1, _k] = 0
-																if _removeVal[kk] == 4:
-																	_structValuedGrid[i, j, k+1] = 0
-																	_auxCube[_i, _j, _k+1] = 0
-																if _removeVal[kk] == 5:
-																	_structValuedGrid[i+1, j, k+1] = 0
-																	_auxCube[_i+1, _j, _k+1] = 0
-																if _removeVal[kk] == 6:
-																	_structValuedGrid[i+1, j-1, k+1] = 0
-																	_auxCube[_i+1, _j-1, _k+1] = 0
-																if _removeVal[kk] == 7:
-																	_structValuedGrid[i, j-1, k+1] = 0
-																	_auxCube[_i, _j-1, _k+1] = 0
-												
-												if ii == 5: # corresponding to cube 6
-													for jj in range(len(_caseVal)):
-														if 1 not in _caseVal[jj]:
-															_removeVal = _caseVal[jj]
-															for kk in range(len(_removeVal)):
-																if _removeVal[kk] == 0:
-																	_structValuedGrid[i-1, j, k] = 0
-																	_auxCube[_i-1, _j, _k] = 0
-																if _removeVal[kk] == 2:
-																	_structValuedGrid[i, j-1, k] = 0
-																	_auxCube[_i, _j-1, _k] = 0
-																if _removeVal[kk] == 3:
-																	_structValuedGrid[i-1, j-1, k] = 0
-																	_auxCube[_i-1, _j-1, _k] = 0
-																if _removeVal[kk] == 4:
-																	_structValuedGrid[i-1, j, k+1] = 0
-																	_auxCube[_i-1, _j, _k+1] = 0
-																if _removeVal[kk] == 5:
-																	_structValuedGrid[i, j, k+1] = 0
-																	_auxCube[_i, _j, _k+1] = 0
-																if _removeVal[kk] == 6:
-																	_structValuedGrid[i, j-1, k+1] = 0
-																	_auxCube[_i, _j-1, _k+1] = 0
-																if _removeVal[kk] == 7:
-																	_structValuedGrid[i-1, j-1, k+1] = 0
-																	_auxCube[_i-1, _j-1, _k+1] = 0
-												
-												if ii == 6: # corresponding to cube 7
-													for jj in range(len(_caseVal)):
-														if 2 not in _caseVal[jj]:
-															_removeVal = _caseVal[jj]
-															for kk in range(len(_removeVal)):
-																if _removeVal[kk] == 0:
-																	_structValuedGrid[i-1, j+1, k] = 0
-																	_auxCube[_i-1, _j+1, _k] = 0
-																if _removeVal[kk] == 1:
-																	_structValuedGrid[i, j+1, k] = 0
-																	_auxCube[_i, _j+1, _k] = 0
-																if _removeVal[kk] == 3:
-																	_structValuedGrid[i-1, j, k] = 0
-																	_auxCube[_i-1, _j, _k] = 0
-																if _removeVal[kk] == 4:
-																	_structValuedGrid[i-1, j+1, k+1] = 0
-																	_auxCube[_i-1, _j+1, _k+1] = 0
-																if _removeVal[kk] == 5:
-																	_structValuedGrid[i, j+1, k+1] = 0
-																	_auxCube[_i, _j+1, _k+1] = 0
-																if _removeVal[kk] == 6:
-																	_structValuedGrid[i, j, k+1] = 0
-																	_auxCube[_i, _j, _k+1] = 0
-																if _removeVal[kk] == 7:
-																	_structValuedGrid[i-1, j, k+1] = 0
-																	_auxCube[_i-1, _j, _k+1] = 0
-												
-												if ii == 7: # corresponding to cube 8
-													for jj in range(len(_caseVal)):
-														if 3 not in _caseVal[jj]:
-															_removeVal = _caseVal[jj]
-															for kk in range(len(_removeVal)):
-																	if _removeVal[kk] == 0:
-																		_structValuedGrid[i, j+1, k] = 0
-																		_auxCube[_i, _j+1, _k] = 0
-																	if _removeVal[kk] == 1:
-																		_structValuedGrid[i+1, j+1, k] = 0
-																		_auxCube[_i+1, _j+1, _k] = 0
-																	if _removeVal[kk] == 2:
-																		_structValuedGrid[i+1, j, k] = 0
-																		_auxCube[_i+1, _j, _k] = 0
-																	if _removeVal[kk] == 4:
-																		_structValuedGrid[i, j+1, k+1] = 0
-																		_auxCube[_i, _j+1, _k+1] = 0
-																	if _removeVal[kk] == 5:
-																		_structValuedGrid[i+1, j+1, k+1] = 0
-																		_auxCube[_i+1, _j+1, _k+1] = 0
-																	if _removeVal[kk] == 6:
-																		_structValuedGrid[i+1, j, k+1] = 0
-																		_auxCube[_i+1, _j, _k+1] = 0
-																	if _removeVal[kk] == 7:
-																		_structValuedGrid[i, j, k+1] = 0
-																		_auxCube[_i, _j, _k+1] = 0
-									
-									if _auxCube[_i+1,_j,_k]:
-										_neighborVal.append([i+1,j,k])
-											
-									if _auxCube[_i-1,_j,_k]:
-										_neighborVal.append([i-1,j,k])
-											
-									if _auxCube[_i,_j+1,_k]:
-										_neighborVal.append([i,j+1,k])
-											
-									if _auxCube[_i,_j-1,_k]:
-										_neighborVal.append([i,j-1,k])
-										
-									if _auxCube[_i,_j,_k+1]:
-										_neighborVal.append([i,j,k+1])
-											
-									if _auxCube[_i,_j,_k-1]:
-										_neighborVal.append([i,j,k-1])
-											
-									if _auxCube[_i+1,_j+1,_k]:
-										_neighborVal.append([i+1,j+1,k])
-											
-									if _auxCube[_i+1,_j-1,_k]:
-										_neighborVal.append([i+1,j-1,k])
-											
-									if _auxCube[_i-1,_j+1,_k]:
-										_neighborVal.append([i-1,j+1,k])
-											
-									if _auxCube[_i-1,_j-1,_k]:
-										_neighborVal.append([i-1,j-1,k])
-											
-									if _auxCube[_i+1,_j,_k+1]:
-										_neighborVal.append([i+1,j,k+1])
-										
-									if _auxCube[_i-1,_j,_k+1]:
-										_neighborVal.append([i-1,j,k+1])
-											
-									if _auxCube[_i,_j+1,_k+1]:
-										_neighborVal.append([i,j+1,k+1])
-											
-									if _auxCube[_i,_j-1,_k+1]:
-										_neighborVal.append([i,j-1,k+1])
-											
-									if _auxCube[_i+1,_j,_k-1]:
-										_neighborVal.append([i+1,j,k-1])
-											
-									if _auxCube[_i-1,_j,_k-1]:
-										_neighborVal.append([i-1,j,k-1])
-											
-									if _auxCube[_i,_j+1,_k-1]:
-										_neighborVal.append([i,j+1,k-1])
-											
-									if _auxCube[_i,_j-1,_k-1]:
-										_neighborVal.append([i,j-1,k-1])
-									
-									if _auxCube[_i+1,_j+1,_k+1]:
-										_neighborVal.append([i+1,j+1,k+1])
-											
-									if _auxCube[_i+1,_j-1,_k+1]:
-										_neighborVal.append([i+1,j-1,k+1])
-									
-									if _auxCube[_i-1,_j+1,_k+1]:
-										_neighborVal.append([i-1,j+1,k+1])
-									
-									if _auxCube[_i-1,_j-1,_k+1]:
-										_neighborVal.append([i-1,j-1,k+1])
-								
-									if _auxCube[_i+1,_j+1,_k-1]:
-										_neighborVal.append([i+1,j+1,k-1])
-											
-									if _auxCube[_i+1,_j-1,_k-1]:
-										_neighborVal.append([i+1,j-1,k-1])
-									
-									if _auxCube[_i-1,_j+1,_k-1]:
-										_neighborVal.append([i-1,j+1,k-1])
-											
-									if _auxCube[_i-1,_j-1,_k-1]:
-										_neighborVal.append([i-1,j-1,k-1])
-									
-									_loopCounter += 1
-										
-								i = _origiVal
-								j = _origjVal
-								k = _origkVal
+		if self._engine == 'scan':
+			_structValuedGrid, _outlierCaseCount = self._neighbor_scan()
+		else:
+			self._progress.message('Labeling with the ' + self._engine + ' engine..')
+			self.stats.start('labeling')
+			if self._engine == 'array':
+				_structValuedGrid, _outlierCaseCount = self._array_labeling()
+			elif self._engine == 'sparse':
+				_structValuedGrid, _outlierCaseCount = self._sparse_labeling()
+			elif self._engine == 'edgecut':
+				_structValuedGrid, _outlierCaseCount = self._edge_cut_labeling()
+			else:
+				_structValuedGrid, _outlierCaseCount = self._block_labeling()
+			self.stats.stop('labeling')
+			
+			# The labeling time without writing NeighborInformation.txt
+			self.stats.phaseTimes['labeling'] -= self.stats.phaseTimes['writes']
+			self._progress.update(1.0, int(_structValuedGrid.max(initial = 0)), _force = True)
 
-								if self._writeNeighborInformation:
-									
-									_neighborVal.append([i, j, k])
-									_neighborVal = np.array(_neighborVal)
-									
-									fw = open('NeighborInformation.txt', 'a')
-									fw.write(str(_structVal) + ' ' + str(min(_neighborVal[:, 0])) + ' ' + str(max(_neighborVal[:, 0])) + ' ' + str(min(_neighborVal[:, 1])) + ' ' + str(max(_neighborVal[:, 1])) + ' ' + str(min(_neighborVal[:, 2])) + ' ' + str(max(_neighborVal[:, 2])) + '\n')
-									fw.close()
+		# Number of MC outlier cases met by the last extraction
+		self.outlierCaseCount = _outlierCaseCount
+		self.stats.outlierCaseCount = _outlierCaseCount
+		self.stats.peakQueueLength = self.peakQueueLength
 
 		#---------------------------------------------------------------------#
 
@@ -908,13 +238,56 @@ class extractStructuresMC:
 
 		_structValuedGrid = _structValuedGrid[:self.xlen, :self.ylen, :self.zlen]
 
+		# Merge structures across periodic faces. The bounding boxes are
+		# only known after the merge. With MC correction, the links cut by
+		# the outlier cases of the cubes across the faces are left out.
+
+		if any(self._periodic):
+			
+			self.stats.start('periodicMerge')
+			_wrappedCuts = None
+			if self._marchingCubesExt:
+				_wrappedCuts = wrapped_link_cuts(self.c, (self.xlen, self.ylen, self.zlen), self._periodic)
+			_structVal = merge_periodic(_structValuedGrid, self._periodic, _wrappedCuts = _wrappedCuts)
+			self.stats.stop('periodicMerge')
+			
+			if self.verbose:
+				print('Number of structures after merging periodic faces:', _structVal)
+			
+			if self._writeNeighborInformation:
+				self._write_bounding_boxes(label_bounding_boxes(_structValuedGrid, _structVal))
+
+		if self._roi is not None:
+			self.truncated = truncated_structures(_structValuedGrid, \
+			int(np.max(_structValuedGrid, initial = 0)), self.roi, self.fieldShape)
+
+		if _returnStatistics or self._statisticsFile is not None:
+			
+			self.stats.start('statistics')
+			_stats = structure_statistics(_structValuedGrid)
+			if self._roi is not None:
+				_stats['truncated'] = self.truncated
+			self.stats.stop('statistics')
+			
+			if self._statisticsFile is not None:
+				self.stats.start('writes')
+				write_statistics(_stats, self._statisticsFile)
+				self.stats.stop('writes')
+
 		#---------------------------------------------------------------------#
 
 		# Write out all data
 									
 		_structValuedGrid = _structValuedGrid.ravel()				
 
-		u, counts = np.unique(_structValuedGrid, return_counts = True)
+		self.stats.start('counts')
+		if self._lowMemory or self._engine == 'sparse':
+			# Avoid the sorted copy of np.unique
+			counts = label_counts(_structValuedGrid.reshape(self.xlen, -1))
+			u = np.nonzero(counts)[0]
+			counts = counts[u]
+		else:
+			u, counts = np.unique(_structValuedGrid, return_counts = True)
 		
 		if self.verbose:
 			print('Unique structure identifiers:', u)
@@ -922,26 +295,1045 @@ class extractStructuresMC:
 
 		countsall = copy.deepcopy(counts)
 		countsall.sort()
-		if self.verbose:
-			print('Index of the biggest structure(s):', np.where(np.in1d(counts, countsall[::-1][1])))
-		Vmax = countsall[::-1][1]
-		if self.verbose:
-			print('Rearranged counts of structures:', countsall[::-1][:10])
-		Vall = sum(countsall[::-1][1:])
+		if len(countsall) > 1:
+			if self.verbose:
+				print('Index of the biggest structure(s):', np.where(np.in1d(counts, countsall[::-1][1])))
+			Vmax = countsall[::-1][1]
+			if self.verbose:
+				print('Rearranged counts of structures:', countsall[::-1][:10])
+			Vall = sum(countsall[::-1][1:])
+		else:
+			# No voxel passes the threshold, there is only empty space
+			Vmax = 0
+			Vall = 0
 		if self.verbose:
 			print('Sum of counts of all structures: ', Vall)
+		self.stats.numberOfStructures = len(u) - 1 if u[0] == 0 else len(u)
+		self.stats.stop('counts')
 
 		if self._writePercolationData:
 			
+			self.stats.start('writes')
 			fw = open('Percolation_threshold.txt', 'a')
-			fw.write(str(_threshVal) + ' ' + str(Vmax) + ' ' + str(Vall) + '\n')
+			fw.write(str(self._threshVal) + ' ' + str(Vmax) + ' ' + str(Vall) + '\n')
 			fw.close()
+			self.stats.stop('writes')
+
+		if _returnIndex:
+			self.stats.start('statistics')
+			_offsets, _voxels = structure_index(_structValuedGrid)
+			self.stats.stop('statistics')
 
 		if self.verbose:
 			print('Total time:', time.time() - start_time)
 		
+		self.stats.emit()
+		
+		_result = (_structValuedGrid,)
+		if _returnStatistics:
+			_result += (_stats,)
+		if _returnExtractionStats:
+			_result += (self.stats,)
+		if _returnIndex:
+			_result += (_offsets, _voxels)
+		
+		return _result if len(_result) > 1 else _structValuedGrid
+
+	def extract_seeds(self, _seeds):
+
+		'''
+
+		Labels only the structures containing the points _seeds ((n, 3)
+		indices of the original grid, inside the ROI), with the flood fill
+		of the neighbor scan, with or without MC correction. The cost
+		depends on the size of these structures, not on the size of the
+		grid. Structures are numbered in the order of their first seed.
+		Returns the label of every seed (0 for seeds in empty space), the
+		voxels ((n, 3) array, indices of the original grid) of every
+		structure and their statistics table.
+
+		With MC correction the flood fill starts at the seed, while
+		extract() starts it at the first voxel of the structure, so the
+		outlier removal can differ slightly near the surface.
+
+		'''
+
+		if self._engine == 'sparse':
+			raise ValueError('Seeded extraction needs the mask, which the sparse engine does not build')
+		if any(self._periodic):
+			raise ValueError('Structures merged across periodic faces are only known after the scan')
+
+		# Seeds relative to the ROI, which is all the mask holds
+
+		_start = np.array([v[0] for v in self.roi], dtype = np.int64)
+		_seeds = np.reshape(np.asarray(_seeds, dtype = np.int64), (-1, 3)) - _start
+
+		if np.any(_seeds < 0) or np.any(_seeds >= (self.xlen, self.ylen, self.zlen)):
+			raise ValueError('Seeds outside the ROI ' + str(self.roi))
+
+		self.stats = extractionStats(self._statsHooks)
+		self._caseCounts = [0]*256
+
+		# Without the candidate volume every voxel is corrected. This
+		# gives the same result, as the candidates only skip corrections
+		# which cannot hit an outlier case.
+
+		if self._marchingCubesExt:
+			self._mcCandidates = np.broadcast_to(np.uint8(255), np.shape(self.c))
+
+		# Pages of the zero grid are only allocated where labels are written
+
+		_structValuedGrid = np.zeros(np.shape(self.c), dtype = np.uint32)
+		_queue = floodQueue(np.shape(_structValuedGrid), _memoryLimit = self._queueMemoryLimit)
+
+		_seedLabels = np.zeros(len(_seeds), dtype = np.int64)
+		_voxelLists = []
+		_structVal = 0
+
+		for n, (i, j, k) in enumerate(_seeds.tolist()):
+
+			if not self.c[i,j,k]:
+				continue
+
+			if _structValuedGrid[i,j,k] > 0:
+				_seedLabels[n] = _structValuedGrid[i,j,k]
+				continue
+
+			_structVal += 1
+			_structValuedGrid[i,j,k] = _structVal
+
+			_structOutliers, _bbox = self._flood_fill(i, j, k, _structVal, _structValuedGrid, _queue)
+			self.stats.outlierCaseCount += _structOutliers
+			_seedLabels[n] = _structVal
+
+			# The voxels of the structure lie in its bounding box
+
+			_box = _structValuedGrid[_bbox[0]:_bbox[1] + 1, _bbox[2]:_bbox[3] + 1, _bbox[4]:_bbox[5] + 1]
+			_voxelLists.append(np.argwhere(_box == _structVal) + [_bbox[0], _bbox[2], _bbox[4]] + _start)
+
+		self.stats.caseHistogram[:] = self._caseCounts
+		self.stats.peakQueueLength = _queue.peakLength
+		self.stats.numberOfStructures = _structVal
+		self.stats.emit()
+
+		return _seedLabels, _voxelLists, voxel_statistics(_voxelLists)
+
+	def occupancy_pyramid(self):
+		
+		# Occupancy pyramid of the thresholded mask, built on first use and
+		# shared by the traversals of this extractor
+		
+		if self.occupancy is None:
+			self.occupancy = occupancyPyramid(self.c, self._brickSize or 8)
+		
+		return self.occupancy
+
+	def iter_structures(self):
+
+		'''
+
+		Yields the structures of the neighbor scan one at a time, each as
+		soon as its flood fill is complete, as a dictionary: label,
+		voxels (sorted flat C-order indices into the grid returned by
+		extract()), bbox (xmin, xmax, ymin, ymax, zmin, zmax) and
+		outlierCaseCount. The scan continues when the next structure is
+		requested. Nothing is written to disk.
+
+		With MC correction the voxels are those holding the label at the
+		end of the flood fill.
+
+		'''
+
+		if self._engine != 'scan':
+			raise ValueError('Only the scan engine finds the structures one at a time')
+		if any(self._periodic):
+			raise ValueError('Structures merged across periodic faces are only known after the scan')
+
+		self._progress.reset()
+		self.stats = extractionStats(self._statsHooks)
+		self.stats.phaseTimes['threshold'] = self._thresholdTime
+		_structVal = 0
+
+		for _structVal, _structValuedGrid, _structOutliers, _bbox in self._scan_structures():
+
+			# The voxels of the structure lie in its bounding box
+
+			_box = _structValuedGrid[_bbox[0]:_bbox[1] + 1, _bbox[2]:_bbox[3] + 1, _bbox[4]:_bbox[5] + 1]
+			_i, _j, _k = np.nonzero(_box == _structVal)
+			self.stats.outlierCaseCount += _structOutliers
+
+			yield {'label': _structVal, \
+			'voxels': ((_i + _bbox[0])*self.ylen + _j + _bbox[2])*self.zlen + _k + _bbox[4], \
+			'bbox': tuple(_bbox), 'outlierCaseCount': _structOutliers}
+
+		self.outlierCaseCount = self.stats.outlierCaseCount
+		self.stats.peakQueueLength = self.peakQueueLength
+		self.stats.numberOfStructures = _structVal
+		self.stats.emit()
+
+	def _neighbor_scan(self):
+
+		# Labels the whole grid, keeping the bounding boxes for
+		# NeighborInformation.txt
+
+		_outlierCaseCount = 0
+		_bboxes = []
+		_structures = self._scan_structures()
+
+		while True:
+			
+			try:
+				_structVal, _structValuedGrid, _structOutliers, _bbox = next(_structures)
+			except StopIteration as e:
+				_structValuedGrid = e.value
+				break
+			
+			_outlierCaseCount += _structOutliers
+			if self._writeNeighborInformation:
+				_bboxes.append(_bbox)
+
+		# Written once, not once per structure
+		if self._writeNeighborInformation and not any(self._periodic):
+			self._write_bounding_boxes(_bboxes)
+
+		return _structValuedGrid, _outlierCaseCount
+
+	def _scan_structures(self):
+
+		# All boxes satisfying the thresholding criterion are checked
+		# for their neighboring cells (26 - 6 faces, 12 edges, 8 corners). 
+		# Yields the label, the label grid, the number of MC outlier cases
+		# and the bounding box of every structure once its flood fill is
+		# complete, and returns the label grid. The time spent outside
+		# (by the consumer) is not counted as scan time.
+
+		_structVal = 0
+		
+		# Voxels whose sub-cubes cannot hit an outlier case whatever
+		# their neighbors' labels are skip the MC correction
+		
+		if self._marchingCubesExt:
+			self.stats.start('mcCandidates')
+			if self._lowMemory:
+				self._mcCandidates = correction_candidates(self.c, _out = packedMask(self.c.shape))
+			else:
+				self._mcCandidates = correction_candidates(self.c)
+			self.stats.stop('mcCandidates')
+		
+		if self._lowMemory:
+			# The padding of self.c is never True, so the labels are never
+			# read or written there
+			_structValuedGrid = np.zeros((self.xlen, self.ylen, self.zlen), dtype = np.uint8)
+		elif self._buffers is not None and 'labels' in self._buffers:
+			_structValuedGrid = self._buffers['labels']
+			_structValuedGrid[...] = 0
+		else:
+			_structValuedGrid = np.zeros((self.xlen + 1, self.ylen + 1, \
+			self.zlen + 1), dtype = np.uint32)	# uint32 has values from 0 upto 4294967295
+			if self._buffers is not None:
+				self._buffers['labels'] = _structValuedGrid
+		if self._buffers is not None and 'queue' in self._buffers:
+			_queue = self._buffers['queue']
+			_queue.peakLength = 0
+		else:
+			_queue = floodQueue(np.shape(_structValuedGrid), _memoryLimit = self._queueMemoryLimit)
+			if self._buffers is not None:
+				self._buffers['queue'] = _queue
+		self._caseCounts = [0]*256
+		self.stats.start('scan')
+
+		_rows = (self.xlen + 1)*(self.ylen + 1)
+
+		# Only the occupied bricks are scanned, row by row in C-order, so
+		# the structures are found (and numbered) in the same order
+		if self._brickSize is None:
+			_pyramid = None
+			_fullRow = [(0, self.zlen + 1)]
+		else:
+			_pyramid = self.occupancy_pyramid()
+			_b = self._brickSize
+		_voxelsScanned = 0
+
+		for i in range(self.xlen + 1):
+			
+			if _pyramid is not None and not _pyramid.planes[i // _b]:
+				continue
+			
+			for j in range(self.ylen + 1):
+				
+				self._progress.update((i*(self.ylen + 1) + j)/_rows, _structVal)
+				
+				if _pyramid is None:
+					_ranges = _fullRow
+				elif _pyramid.rows[i // _b, j // _b]:
+					_ranges = _pyramid.row_ranges(i, j)
+				else:
+					continue
+				
+				for _kStart, _kStop in _ranges:
+					
+					_voxelsScanned += _kStop - _kStart
+					
+					for k in range(_kStart, _kStop):
+					
+						if self.c[i,j,k]:
+							
+							if not _structValuedGrid[i,j,k] > 0:
+								
+									_structVal += 1
+									
+									if _structVal > np.iinfo(_structValuedGrid.dtype).max:
+										_structValuedGrid = _structValuedGrid.astype(label_dtype(_structVal))
+									
+									_structValuedGrid[i,j,k] = _structVal
+									
+									_fillStart = time.perf_counter()
+									_structOutliers, _bbox = self._flood_fill(i, j, k, \
+									_structVal, _structValuedGrid, _queue)
+									self.stats.phaseTimes['floodFill'] += time.perf_counter() - _fillStart
+									
+									self.stats.stop('scan')
+									yield _structVal, _structValuedGrid, _structOutliers, _bbox
+									self.stats.start('scan')
+
+		self._progress.update(1.0, _structVal, _force = True)
+
+		# Time of the outer scan alone, the flood fill time without the
+		# MC correction
+		self.stats.stop('scan')
+		self.stats.phaseTimes['scan'] -= self.stats.phaseTimes['floodFill']
+		self.stats.phaseTimes['floodFill'] -= self.stats.phaseTimes['mcCorrection']
+		self.stats.voxelsScanned = _voxelsScanned
+		self.stats.caseHistogram[:] = self._caseCounts
+
+		self.peakQueueLength = _queue.peakLength
+		if self.verbose:
+			print('Peak flood fill queue length:', self.peakQueueLength)
+
 		return _structValuedGrid
 
+	def _flood_fill(self, i, j, k, _structVal, _structValuedGrid, _queue):
+		
+		# Labels all points connected to the seed [i, j, k], which is
+		# already labeled with _structVal. Returns the number of MC outlier
+		# cases met and the bounding box of the structure.
+		
+		_queue.reset()
+		_bbox = [i, i, j, j, k, k]
+		_outlierCaseCount = 0
+		_loopCounter = 0
+		_indexErrors = 0
+		_mcCorrections = 0
+		_mcTime = 0.0
+		_caseCounts = self._caseCounts
+		
+		while True:
+			
+			# Reset all corner flags
+		
+			_c1 = False
+			_c2 = False
+			_c3 = False
+			_c4 = False
+			_c5 = False
+			_c6 = False
+			_c7 = False
+			_c8 = False
+		
+			# Reset all face flags
+		
+			_f1 = False
+			_f2 = False
+			_f3 = False
+			_f4 = False
+			_f5 = False
+			_f6 = False
+			
+			# Reset all edge flags
+			
+			_e1 = False
+			_e2 = False
+			_e3 = False
+			_e4 = False
+			_e5 = False
+			_e6 = False
+			_e7 = False
+			_e8 = False
+			_e9 = False
+			_e10 = False
+			_e11 = False
+			_e12 = False
+			
+			_numberOfNeighbors = 0
+			
+			# Create aux cube [3, 3, 3]
+		
+			_i = 0
+			_j = 0
+			_k = 0
+			_auxCube = np.zeros((3, 3, 3))
+			
+			if _loopCounter > 0:
+				
+				try:
+				
+					i, j, k = _queue.pop()
+				
+				except IndexError:
+					
+					break
+				
+				# Running bounding box of the structure
+				
+				if i < _bbox[0]:
+					_bbox[0] = i
+				elif i > _bbox[1]:
+					_bbox[1] = i
+				if j < _bbox[2]:
+					_bbox[2] = j
+				elif j > _bbox[3]:
+					_bbox[3] = j
+				if k < _bbox[4]:
+					_bbox[4] = k
+				elif k > _bbox[5]:
+					_bbox[5] = k
+			
+			# Faces
+			
+			try:
+				
+				if self.c[i+1,j,k]:
+					
+					if not _structValuedGrid[i+1, j, k] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i+1,j,k] = _structVal
+						_auxCube[_i+1,_j,_k] = 1
+						_f1 = True
+			
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i-1,j,k]:
+					
+					if not _structValuedGrid[i-1, j, k] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i-1,j,k] = _structVal
+						_auxCube[_i-1,_j,_k] = 1
+						_f2 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+			
+			try:
+				
+				if self.c[i,j+1,k]:
+					
+					if not _structValuedGrid[i, j+1, k] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i,j+1,k] = _structVal
+						_auxCube[_i,_j+1,_k] = 1
+						_f3 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+			
+			try:
+				
+				if self.c[i,j-1,k]:
+					
+					if not _structValuedGrid[i, j-1, k] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i,j-1,k] = _structVal
+						_auxCube[_i,_j-1,_k] = 1
+						_f4 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+			
+			try:
+				
+				if self.c[i,j,k+1]:
+					
+					if not _structValuedGrid[i, j, k+1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i,j,k+1] = _structVal
+						_auxCube[_i,_j,_k+1] = 1
+						_f5 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i,j,k-1]:
+					
+					if not _structValuedGrid[i, j, k-1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i,j,k-1] = _structVal
+						_auxCube[_i,_j,_k-1] = 1
+						_f6 = True
+			
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			# Edges
+			
+			try:
+				
+				if self.c[i+1,j+1,k]:
+					
+					if not _structValuedGrid[i+1, j+1, k] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i+1,j+1,k] = _structVal
+						_auxCube[_i+1,_j+1,_k] = 1
+						_e1 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i+1,j-1,k]:
+					
+					if not _structValuedGrid[i+1, j-1, k] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i+1,j-1,k] = _structVal
+						_auxCube[_i+1,_j-1,_k] = 1
+						_e2 = True
+			
+			except IndexError:
+				
+				_indexErrors += 1
+			
+			try:
+				
+				if self.c[i-1,j+1,k]:
+					
+					if not _structValuedGrid[i-1, j+1, k] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i-1,j+1,k] = _structVal
+						_auxCube[_i-1,_j+1,_k] = 1
+						_e3 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+			
+			try:
+				
+				if self.c[i-1,j-1,k]:
+					
+					if not _structValuedGrid[i-1, j-1, k] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i-1,j-1,k] = _structVal
+						_auxCube[_i-1,_j-1,_k] = 1
+						_e4 = True
+			
+			except IndexError:
+				
+				_indexErrors += 1
+			
+			try:
+				
+				if self.c[i+1,j,k+1]:
+					
+					if not _structValuedGrid[i+1, j, k+1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i+1,j,k+1] = _structVal
+						_auxCube[_i+1,_j,_k+1] = _structVal
+						_e5 = True
+			
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i-1,j,k+1]:
+					
+					if not _structValuedGrid[i-1, j, k+1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i-1,j,k+1] = _structVal
+						_auxCube[_i-1,_j,_k+1] = 1
+						_e6 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+			
+			try:
+				
+				if self.c[i,j+1,k+1]:
+					
+					if not _structValuedGrid[i, j+1, k+1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i,j+1,k+1] = _structVal
+						_auxCube[_i,_j+1,_k+1] = 1
+						_e7 = True
+			
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i,j-1,k+1]:
+					
+					if not _structValuedGrid[i, j-1, k+1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i,j-1,k+1] = _structVal
+						_auxCube[_i,_j-1,_k+1] = 1
+						_e8 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i+1,j,k-1]:
+					
+					if not _structValuedGrid[i+1, j, k-1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i+1,j,k-1] = _structVal
+						_auxCube[_i+1,_j,_k-1] = 1
+						_e9 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+			
+			try:
+				
+				if self.c[i-1,j,k-1]:
+					
+					if not _structValuedGrid[i-1, j, k-1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i-1,j,k-1] = _structVal
+						_auxCube[_i-1,_j,_k-1] = 1
+						_e10 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+			
+			try:
+				
+				if self.c[i,j+1,k-1]:
+					
+					if not _structValuedGrid[i, j+1, k-1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i,j+1,k-1] = _structVal
+						_auxCube[_i,_j+1,_k-1] = 1
+						_e11 = True
+			
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i,j-1,k-1]:
+					
+					if not _structValuedGrid[i, j-1, k-1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i,j-1,k-1] = _structVal
+						_auxCube[_i,_j-1,_k-1] = 1
+						_e12 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			# Corners
+			
+			try:
+				
+				if self.c[i+1,j+1,k+1]:
+					
+					if not _structValuedGrid[i+1, j+1, k+1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i+1,j+1,k+1] = _structVal
+						_auxCube[_i+1,_j+1,_k+1] = 1
+						_c1 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i+1,j-1,k+1]:
+					
+					if not _structValuedGrid[i+1, j-1, k+1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i+1,j-1,k+1] = _structVal
+						_auxCube[_i+1,_j-1,_k+1] = 1
+						_c2 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i-1,j+1,k+1]:
+					
+					if not _structValuedGrid[i-1, j+1, k+1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i-1,j+1,k+1] = _structVal
+						_auxCube[_i-1,_j+1,_k+1] = 1
+						_c3 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i-1,j-1,k+1]:
+					
+					if not _structValuedGrid[i-1, j-1, k+1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i-1,j-1,k+1] = _structVal
+						_auxCube[_i-1,_j-1,_k+1] = 1
+						_c4 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i+1,j+1,k-1]:
+					
+					if not _structValuedGrid[i+1, j+1, k-1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i+1,j+1,k-1] = _structVal
+						_auxCube[_i+1,_j+1,_k-1] = 1
+						_c5 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i+1,j-1,k-1]:
+					
+					if not _structValuedGrid[i+1, j-1, k-1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i+1,j-1,k-1] = _structVal
+						_auxCube[_i+1,_j-1,_k-1] = 1
+						_c6 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i-1,j+1,k-1]:
+					
+					if not _structValuedGrid[i-1, j+1, k-1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i-1,j+1,k-1] = _structVal
+						_auxCube[_i-1,_j+1,_k-1] = 1
+						_c7 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+				
+			try:
+				
+				if self.c[i-1,j-1,k-1]:
+					
+					if not _structValuedGrid[i-1, j-1, k-1] > 0:
+					
+						_numberOfNeighbors += 1
+						_structValuedGrid[i-1,j-1,k-1] = _structVal
+						_auxCube[_i-1,_j-1,_k-1] = 1
+						_c8 = True
+						
+			except IndexError:
+				
+				_indexErrors += 1
+			
+			if self._marchingCubesExt and self._mcCandidates[i, j, k]:
+			
+				_mcStart = time.perf_counter()
+				_mcCorrections += 1
+				
+				# Marching cubes extension
+				# All the points are checked again to see how the surface mesh is constructed
+				
+				_cornerFlags = [_c1, _c2, _c3, _c4, _c5, _c6, _c7, _c8]
+				_faceFlags = [_f1, _f2, _f3, _f4, _f5, _f6]
+				_edgeFlags = [_e1, _e2, _e3, _e4, _e5, _e6, _e7, _e8, _e9, _e10, _e11, _e12]
+				
+				_cube1 = [_f6, _e9, _c6, _e12, True, _f1, _e2, _f4]
+				_cube2 = [_e10, _f6, _e12, _c8, _f2, True, _f4, _e4]
+				_cube3 = [_c7, _e11, _f6, _e10, _e3, _f3, True, _f2]
+				_cube4 = [_e11, _c5, _e9, _f6, _f3, _e1, _f1, True]
+				_cube5 = [True, _f1, _e2, _f4, _f5, _e5, _c2, _e8]
+				_cube6 = [_f2, True, _f4, _e4, _e6, _f5, _e8, _c4]
+				_cube7 = [_e3, _f3, True, _f2, _c3, _e7, _f5, _e6]
+				_cube8 = [_f3, _e1, _f1, True, _e7, _c1, _e5, _f5]
+				
+				# Identify the cases of the cube
+				
+				_cases = [self.find_case_number(_cube1), self.find_case_number(_cube2), \
+				self.find_case_number(_cube3), self.find_case_number(_cube4), \
+				self.find_case_number(_cube5), self.find_case_number(_cube6), \
+				self.find_case_number(_cube7), self.find_case_number(_cube8)]
+				
+				sysErrFlag = False
+				
+				for ii in range(8):
+					
+					_caseCounts[_cases[ii]] += 1
+					
+					if _outlierCaseList[_cases[ii]]:
+						
+						sysErrFlag = True
+						_outlierCaseCount += 1
+						
+						# Keep the points which contain [i, j, k]. Discard all remaining ones.
+						# NOTE: [i, j, k] differs for all cubes.
+						
+						for di, dj, dk in removeOffsets[ii][_cases[ii]]:
+							_structValuedGrid[i+di, j+dj, k+dk] = 0
+							_auxCube[_i+di, _j+dj, _k+dk] = 0
+				
+				_mcTime += time.perf_counter() - _mcStart
+			
+			if _auxCube[_i+1,_j,_k]:
+				_queue.push(i+1, j, k)
+					
+			if _auxCube[_i-1,_j,_k]:
+				_queue.push(i-1, j, k)
+					
+			if _auxCube[_i,_j+1,_k]:
+				_queue.push(i, j+1, k)
+					
+			if _auxCube[_i,_j-1,_k]:
+				_queue.push(i, j-1, k)
+				
+			if _auxCube[_i,_j,_k+1]:
+				_queue.push(i, j, k+1)
+					
+			if _auxCube[_i,_j,_k-1]:
+				_queue.push(i, j, k-1)
+					
+			if _auxCube[_i+1,_j+1,_k]:
+				_queue.push(i+1, j+1, k)
+					
+			if _auxCube[_i+1,_j-1,_k]:
+				_queue.push(i+1, j-1, k)
+					
+			if _auxCube[_i-1,_j+1,_k]:
+				_queue.push(i-1, j+1, k)
+					
+			if _auxCube[_i-1,_j-1,_k]:
+				_queue.push(i-1, j-1, k)
+					
+			if _auxCube[_i+1,_j,_k+1]:
+				_queue.push(i+1, j, k+1)
+				
+			if _auxCube[_i-1,_j,_k+1]:
+				_queue.push(i-1, j, k+1)
+					
+			if _auxCube[_i,_j+1,_k+1]:
+				_queue.push(i, j+1, k+1)
+					
+			if _auxCube[_i,_j-1,_k+1]:
+				_queue.push(i, j-1, k+1)
+					
+			if _auxCube[_i+1,_j,_k-1]:
+				_queue.push(i+1, j, k-1)
+					
+			if _auxCube[_i-1,_j,_k-1]:
+				_queue.push(i-1, j, k-1)
+					
+			if _auxCube[_i,_j+1,_k-1]:
+				_queue.push(i, j+1, k-1)
+					
+			if _auxCube[_i,_j-1,_k-1]:
+				_queue.push(i, j-1, k-1)
+			
+			if _auxCube[_i+1,_j+1,_k+1]:
+				_queue.push(i+1, j+1, k+1)
+					
+			if _auxCube[_i+1,_j-1,_k+1]:
+				_queue.push(i+1, j-1, k+1)
+			
+			if _auxCube[_i-1,_j+1,_k+1]:
+				_queue.push(i-1, j+1, k+1)
+			
+			if _auxCube[_i-1,_j-1,_k+1]:
+				_queue.push(i-1, j-1, k+1)
+		
+			if _auxCube[_i+1,_j+1,_k-1]:
+				_queue.push(i+1, j+1, k-1)
+					
+			if _auxCube[_i+1,_j-1,_k-1]:
+				_queue.push(i+1, j-1, k-1)
+			
+			if _auxCube[_i-1,_j+1,_k-1]:
+				_queue.push(i-1, j+1, k-1)
+					
+			if _auxCube[_i-1,_j-1,_k-1]:
+				_queue.push(i-1, j-1, k-1)
+			
+			_loopCounter += 1
+		
+		_stats = self.stats
+		_stats.voxelsVisited += _loopCounter
+		_stats.neighborProbes += 26*_loopCounter
+		_stats.indexErrors += _indexErrors
+		_stats.mcCorrections += _mcCorrections
+		_stats.phaseTimes['mcCorrection'] += _mcTime
+		
+		return _outlierCaseCount, _bbox
+
+	def _array_labeling(self):
+
+		# Same partition as the neighbor scan without MC correction,
+		# computed with whole-array operations on runs along z
+
+		_shape = np.shape(self.c)
+		_rows, _starts, _ends = find_runs(self.c)
+		_runLabels, _structVal = label_runs(_rows, _starts, _ends, _shape)
+
+		if self._lowMemory:
+
+			# No run lies in the padding: paint into the unpadded grid
+
+			_rows = (_rows // _shape[1])*self.ylen + _rows % _shape[1]
+			_shape = (self.xlen, self.ylen, self.zlen)
+			_structValuedGrid = paint_runs(_rows, _starts, _ends, _runLabels, _shape, \
+			_dtype = label_dtype(_structVal))
+
+		else:
+			_structValuedGrid = paint_runs(_rows, _starts, _ends, _runLabels, _shape)
+
+		if self.verbose:
+			print('Number of structures:', _structVal)
+
+		if self._writeNeighborInformation and not any(self._periodic):
+			self._write_bounding_boxes(run_bounding_boxes(_rows, _starts, _ends, \
+			_runLabels, _structVal, _shape))
+
+		return _structValuedGrid, 0
+
+	def _block_labeling(self):
+
+		# Same as the array engine, block by block with self._workers
+		# processes
+
+		_structValuedGrid = np.zeros(np.shape(self.c), dtype = np.uint32)
+		_structVal = label_blocks(self.c, _structValuedGrid, None, self._blockShape, \
+		self._workers, verbose = self.verbose)
+
+		if self._writeNeighborInformation and not any(self._periodic):
+			self._write_bounding_boxes(label_bounding_boxes(_structValuedGrid, _structVal))
+
+		if self._lowMemory:
+			_structValuedGrid = _structValuedGrid[:self.xlen, :self.ylen, \
+			:self.zlen].astype(label_dtype(_structVal))
+
+		return _structValuedGrid, 0
+
+	def _sparse_labeling(self):
+
+		# Same partition as the neighbor scan without MC correction, from
+		# the sorted active voxels. The dense grid is of the original
+		# extent and the narrowest label type.
+
+		_shape = (self.xlen, self.ylen, self.zlen)
+		_labels, _structVal = label_sparse(self._activeVoxels, _shape)
+
+		_structValuedGrid = np.zeros(_shape, dtype = label_dtype(_structVal))
+		_structValuedGrid.reshape(-1)[self._activeVoxels] = _labels
+
+		if self.verbose:
+			print('Active voxels:', len(self._activeVoxels), 'number of structures:', _structVal)
+
+		if self._writeNeighborInformation and not any(self._periodic):
+			self._write_bounding_boxes(label_bounding_boxes(_structValuedGrid, _structVal))
+
+		return _structValuedGrid, 0
+
+	def _edge_cut_labeling(self):
+
+		# MC correction without a scan order: the links cut by outlier
+		# cases of the mask are removed once, the rest is labeled with
+		# the vectorized union-find
+
+		if self._lowMemory:
+			_structValuedGrid, _structVal, _outlierCaseCount = label_edge_cut(self.c)
+			_structValuedGrid = _structValuedGrid[:self.xlen, :self.ylen, :self.zlen]
+		else:
+			_structValuedGrid, _structVal, _outlierCaseCount = label_edge_cut(self.c, \
+			_dtype = np.uint32)
+
+		if self.verbose:
+			print('Number of structures:', _structVal)
+
+		if self._writeNeighborInformation and not any(self._periodic):
+			self._write_bounding_boxes(label_bounding_boxes(_structValuedGrid, _structVal))
+
+		return _structValuedGrid, _outlierCaseCount
+
+	def _write_bounding_boxes(self, _bbox):
+
+		# NeighborInformation.txt in the format of the neighbor scan
+
+		if len(_bbox) == 0:
+			return
+
+		self.stats.start('writes')
+		fw = open('NeighborInformation.txt', 'a')
+		for ii in range(len(_bbox)):
+			fw.write(str(ii + 1) + ' ' + ' '.join(str(v) for v in _bbox[ii]) + '\n')
+		fw.close()
+		self.stats.stop('writes')
+
 # # Select file to run tests on
 # _filenameRead = 'testData.bin'
 
@@ -0,0 +1,147 @@
+import numpy as np
+from extractStructuresWithMC import extractStructuresMC
+from percolationSweep import percolation_sweep
+from regionOfInterest import roi_ranges
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Extraction of one field at many thresholds. The session reshapes the
+# field once and keeps what does not depend on the threshold: the range
+# of values, a histogram and the value-sorted order of the voxels, each
+# computed on first use. The mask of a threshold is built when it is
+# first extracted and kept until another threshold is extracted (so
+# the same threshold with and without MC correction is thresholded
+# once); the mask, label grid and flood fill queue buffers are reused
+# across extractions.
+
+class extractionSession:
+
+	'''
+
+	Holds the field c (1D or 3D array, or memmap) of shape (xlen, ylen,
+	zlen). _kwargs are passed on to every extractStructuresMC, e.g.
+	_engine, _lowMemory, _periodic or _roi.
+
+	'''
+
+	def __init__(self, c, xlen, ylen, zlen, _zFastest, verbose = False, **_kwargs):
+
+		# Reshape data (a view, no copy is made)
+
+		if _zFastest:
+			c = np.reshape(c, [xlen, ylen, zlen])
+		else:
+			c = np.reshape(c, [xlen, ylen, zlen], order = 'F')
+
+		self.c = c
+		self._zFastest = _zFastest
+		self.shape = (xlen, ylen, zlen)
+		self.verbose = verbose
+		self._kwargs = _kwargs
+
+		self._buffers = {}
+		self.extractor = None
+		self._range = None
+		self._histograms = {}
+		self._order = None
+		self._sortedValues = None
+
+		# The cached data are those of the ROI (a view), which is all the
+		# extractors see
+
+		self._roi = roi_ranges(_kwargs.get('_roi'), self.shape)
+		self._values = c[tuple(slice(*v) for v in self._roi)]
+
+	def value_range(self, _slabSize = 16):
+
+		# Smallest and largest value of the field, in slabs along x
+
+		if self._range is None:
+
+			_min = np.inf
+			_max = -np.inf
+			for i0 in range(0, np.shape(self._values)[0], _slabSize):
+				_slab = np.asarray(self._values[i0:i0 + _slabSize])
+				_min = min(_min, float(_slab.min()))
+				_max = max(_max, float(_slab.max()))
+			self._range = (_min, _max)
+
+		return self._range
+
+	def histogram(self, _bins = 256, _slabSize = 16):
+
+		'''
+
+		Returns the counts and the bin edges of the values of the field,
+		with _bins equal bins over the range of values.
+
+		'''
+
+		if _bins not in self._histograms:
+
+			_edges = np.linspace(*self.value_range(), _bins + 1)
+			_counts = np.zeros(_bins, dtype = np.int64)
+			for i0 in range(0, np.shape(self._values)[0], _slabSize):
+				_counts += np.histogram(np.asarray(self._values[i0:i0 + _slabSize]), _edges)[0]
+			self._histograms[_bins] = (_counts, _edges)
+
+		return self._histograms[_bins]
+
+	def sorted_order(self):
+
+		# Argsort of the flattened (C-order) field
+
+		if self._order is None:
+			_flat = np.ravel(self._values)
+			self._order = np.argsort(_flat, kind = 'stable')
+			self._sortedValues = _flat[self._order]
+
+		return self._order
+
+	def active_count(self, _threshVal):
+
+		# Number of voxels passing the threshold, from the sorted values
+
+		self.sorted_order()
+
+		if _threshVal > 0:
+			return len(self._sortedValues) - int(np.searchsorted(self._sortedValues, _threshVal, side = 'right'))
+
+		return int(np.searchsorted(self._sortedValues, _threshVal, side = 'left'))
+
+	def extract(self, _threshVal, _marchingCubesExt = False, _returnStatistics = False, \
+	_returnExtractionStats = False, _returnIndex = False):
+
+		'''
+
+		Extracts the structures at _threshVal, with or without MC
+		correction. Returns what extractStructuresMC.extract returns.
+
+		'''
+
+		self.extractor = extractStructuresMC(_threshVal, self.c, *self.shape, self._zFastest, \
+		self.verbose, False, False, _marchingCubesExt, _buffers = self._buffers, **self._kwargs)
+
+		return self.extractor.extract(_returnStatistics, _returnExtractionStats, _returnIndex)
+
+	def percolation(self, _thresholds):
+
+		'''
+
+		Number of structures, Vmax and Vall at every threshold (without
+		MC correction, see percolationSweep), from the cached order.
+
+		'''
+
+		_order = self.sorted_order()
+
+		return percolation_sweep(_thresholds, self._values, *np.shape(self._values), True, \
+		_order = _order)
@@ -0,0 +1,79 @@
+import numpy as np
+import time
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Phases timed by extractStructuresMC, in order
+extractionPhases = ('threshold', 'mcCandidates', 'scan', 'floodFill', 'mcCorrection', \
+'labeling', 'periodicMerge', 'counts', 'statistics', 'writes')
+
+class extractionStats:
+
+	'''
+
+	Wall time of every phase of an extraction (seconds, see
+	extractionPhases) and counters of the neighbor scan:
+
+	voxelsScanned - positions checked by the outer scan
+	voxelsVisited - voxels processed by the flood fill
+	neighborProbes - neighbor lookups of the flood fill (26 per voxel)
+	indexErrors - probes outside the grid, caught as IndexError
+	mcCorrections - voxels whose 8 sub-cubes were checked by the MC correction
+	caseHistogram - number of sub-cubes checked with each of the 256 case numbers
+	outlierCaseCount - MC outlier cases met
+	peakQueueLength - largest flood fill queue
+	numberOfStructures
+
+	Hooks added with add_hook are called with as_dict() by emit(), at
+	the end of every extraction.
+
+	'''
+
+	def __init__(self, _hooks = None):
+
+		self.phaseTimes = {v: 0.0 for v in extractionPhases}
+		self.voxelsScanned = 0
+		self.voxelsVisited = 0
+		self.neighborProbes = 0
+		self.indexErrors = 0
+		self.mcCorrections = 0
+		self.caseHistogram = np.zeros(256, dtype = np.int64)
+		self.outlierCaseCount = 0
+		self.peakQueueLength = 0
+		self.numberOfStructures = 0
+		self._hooks = list(_hooks or [])
+		self._start = {}
+
+	def add_hook(self, _hook):
+
+		self._hooks.append(_hook)
+
+	def start(self, _phase):
+
+		self._start[_phase] = time.perf_counter()
+
+	def stop(self, _phase):
+
+		self.phaseTimes[_phase] += time.perf_counter() - self._start.pop(_phase)
+
+	def as_dict(self):
+
+		return {'phaseTimes': dict(self.phaseTimes), 'voxelsScanned': self.voxelsScanned, \
+		'voxelsVisited': self.voxelsVisited, 'neighborProbes': self.neighborProbes, \
+		'indexErrors': self.indexErrors, 'mcCorrections': self.mcCorrections, \
+		'caseHistogram': self.caseHistogram.tolist(), 'outlierCaseCount': self.outlierCaseCount, \
+		'peakQueueLength': self.peakQueueLength, 'numberOfStructures': self.numberOfStructures}
+
+	def emit(self):
+
+		_stats = self.as_dict()
+		for _hook in self._hooks:
+			_hook(_stats)
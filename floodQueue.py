@@ -0,0 +1,100 @@
+import numpy as np
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+class floodQueue:
+
+	'''
+
+	FIFO work queue of grid points for the flood fill of one structure.
+	Points are stored as flat int64 indices in a preallocated ring buffer
+	which doubles in size when full. If _memoryLimit (in bytes) is given,
+	growing beyond it raises a MemoryError.
+
+	'''
+
+	def __init__(self, _shape, _initialLength = 4096, _memoryLimit = None):
+
+		self._strides = (_shape[1]*_shape[2], _shape[2])
+		self._buffer = np.zeros(_initialLength, dtype = np.int64)
+		self._head = 0
+		self._length = 0
+
+		if _memoryLimit is None:
+			self._maxLength = None
+		else:
+			self._maxLength = max(int(_memoryLimit) // self._buffer.itemsize, 1)
+			if self._maxLength < _initialLength:
+				self._buffer = self._buffer[:self._maxLength]
+
+		# Largest number of points held at once since creation
+		self.peakLength = 0
+
+	def __len__(self):
+
+		return self._length
+
+	def reset(self):
+
+		# Empty the queue, keeping the buffer for the next structure
+
+		self._head = 0
+		self._length = 0
+
+	def push(self, i, j, k):
+
+		_capacity = len(self._buffer)
+
+		if self._length == _capacity:
+			self._grow()
+			_capacity = len(self._buffer)
+
+		self._buffer[(self._head + self._length) % _capacity] = \
+		i*self._strides[0] + j*self._strides[1] + k
+
+		self._length += 1
+		if self._length > self.peakLength:
+			self.peakLength = self._length
+
+	def pop(self):
+
+		if self._length == 0:
+			raise IndexError('pop from an empty flood queue')
+
+		_flat = int(self._buffer[self._head])
+		self._head = (self._head + 1) % len(self._buffer)
+		self._length -= 1
+
+		i, _flat = divmod(_flat, self._strides[0])
+		j, k = divmod(_flat, self._strides[1])
+
+		return i, j, k
+
+	def _grow(self):
+
+		_capacity = len(self._buffer)
+		_newCapacity = 2*_capacity
+
+		if self._maxLength is not None:
+			if _capacity >= self._maxLength:
+				raise MemoryError('Flood fill queue exceeded its memory limit of ' \
+				+ str(self._maxLength*self._buffer.itemsize) + ' bytes (' \
+				+ str(_capacity) + ' points)')
+			_newCapacity = min(_newCapacity, self._maxLength)
+
+		# Unroll the ring so that the queue starts at 0 again
+
+		_buffer = np.zeros(_newCapacity, dtype = np.int64)
+		_buffer[:_capacity - self._head] = self._buffer[self._head:]
+		_buffer[_capacity - self._head:_capacity] = self._buffer[:self._head]
+
+		self._buffer = _buffer
+		self._head = 0
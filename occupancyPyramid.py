@@ -0,0 +1,84 @@
+import numpy as np
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+class occupancyPyramid:
+
+	'''
+
+	Coarse occupancy of a boolean 3D mask (array, memmap or packedMask)
+	for skipping empty space. The mask is divided into cubic bricks of
+	edge _brickSize; the levels, from fine to coarse, are
+
+	bricks - any() over every brick, shape (nx, ny, nz)
+	rows - any() over the bricks of every (x, y) row of bricks
+	planes - any() over the bricks of every x plane of bricks
+
+	row_ranges gives the occupied ranges along z of a row of voxels in
+	increasing order, so traversals keep the C-order of the voxels.
+
+	'''
+
+	def __init__(self, _mask, _brickSize = 8):
+
+		self.shape = tuple(np.shape(_mask))
+		self.brickSize = _brickSize
+		_counts = tuple(-(-n // _brickSize) for n in self.shape)
+
+		self.bricks = np.zeros(_counts, dtype = bool)
+
+		# One plane of bricks at a time
+
+		for ib in range(_counts[0]):
+
+			_slab = np.asarray(_mask[ib*_brickSize:(ib + 1)*_brickSize], dtype = bool)
+			_slab = np.pad(_slab, [(0, _brickSize - np.shape(_slab)[0])] + \
+			[(0, c*_brickSize - n) for c, n in zip(_counts[1:], self.shape[1:])])
+
+			self.bricks[ib] = _slab.reshape(_brickSize, _counts[1], _brickSize, _counts[2], \
+			_brickSize).any(axis = (0, 2, 4))
+
+		self.rows = self.bricks.any(axis = 2)
+		self.planes = self.rows.any(axis = 1)
+
+		self._ranges = {}
+
+	def row_ranges(self, i, j):
+
+		'''
+
+		Returns the (start, stop) ranges along z of the occupied bricks
+		containing the row of voxels (i, j, :), adjacent bricks merged.
+
+		'''
+
+		_key = (i // self.brickSize, j // self.brickSize)
+		_ranges = self._ranges.get(_key)
+
+		if _ranges is None:
+
+			_occupied = np.concatenate(([False], self.bricks[_key], [False])).view(np.int8)
+			_edges = np.nonzero(np.diff(_occupied))[0]*self.brickSize
+
+			_ranges = [(int(_edges[n]), int(min(_edges[n + 1], self.shape[2]))) \
+			for n in range(0, len(_edges), 2)]
+			self._ranges[_key] = _ranges
+
+		return _ranges
+
+	def occupied_bricks(self):
+
+		# Slices of the occupied bricks, in C-order of the bricks
+
+		b = self.brickSize
+
+		return [tuple(slice(v*b, min((v + 1)*b, n)) for v, n in zip(ii, self.shape)) \
+		for ii in zip(*np.nonzero(self.bricks))]
@@ -0,0 +1,92 @@
+import numpy as np
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+class packedMask:
+
+	'''
+
+	Boolean 3D mask stored with one bit per voxel, packed along z (the
+	last axis) in little bit order. Indexing with three integers returns
+	a bool and follows numpy: negative indices wrap around and indices
+	past the end raise an IndexError. Any other index unpacks the
+	selected rows and returns a boolean array. Assignments write back
+	a boolean array over a contiguous range of z.
+
+	'''
+
+	def __init__(self, _shape):
+
+		self.shape = tuple(int(n) for n in _shape)
+		self.dtype = np.dtype(bool)
+		self.ndim = 3
+		self._zlen = self.shape[2]
+		self._bits = np.zeros((self.shape[0], self.shape[1], (self._zlen + 7) // 8), \
+		dtype = np.uint8)
+
+		# Indexing a memoryview with a tuple of ints returns a Python int
+		# and is faster than indexing the numpy array
+		self._view = memoryview(self._bits)
+
+	@property
+	def nbytes(self):
+
+		return self._bits.nbytes
+
+	def __getitem__(self, _key):
+
+		if type(_key) is tuple and len(_key) == 3 and type(_key[2]) is int:
+
+			i, j, k = _key
+			if k < 0:
+				k += self._zlen
+			if k < 0 or k >= self._zlen:
+				raise IndexError('index ' + str(_key[2]) + ' is out of bounds for axis 2 with size ' \
+				+ str(self._zlen))
+
+			return (self._view[i, j, k >> 3] >> (k & 7)) & 1 == 1
+
+		if type(_key) is not tuple:
+			_key = (_key,)
+
+		_rows = self._bits[_key[:2]]
+		_unpacked = np.unpackbits(_rows, axis = -1, count = self._zlen, bitorder = 'little')
+
+		return _unpacked.view(bool)[(Ellipsis,) + _key[2:]]
+
+	def __setitem__(self, _key, _values):
+
+		if type(_key) is not tuple:
+			_key = (_key,)
+		_key = _key + (slice(None),)*(3 - len(_key))
+
+		k0, k1, _step = _key[2].indices(self._zlen)
+		if _step != 1:
+			raise IndexError('packedMask only supports contiguous ranges along z')
+
+		_values = np.asarray(_values, dtype = bool)
+
+		# Whole bytes covering k0 .. k1 - 1. Bits of these bytes outside
+		# the range are kept.
+
+		b0 = k0 // 8
+		b1 = (k1 + 7) // 8
+
+		if k0 == 8*b0 and (k1 == 8*b1 or k1 == self._zlen):
+			self._bits[_key[:2] + (slice(b0, b1),)] = np.packbits(_values, axis = -1, \
+			bitorder = 'little')
+			return
+
+		_unpacked = np.unpackbits(self._bits[_key[:2] + (slice(b0, b1),)], axis = -1, \
+		bitorder = 'little').view(bool)
+		_unpacked[..., k0 - 8*b0:k1 - 8*b0] = _values
+		self._bits[_key[:2] + (slice(b0, b1),)] = np.packbits(_unpacked, axis = -1, \
+		bitorder = 'little')
@@ -0,0 +1,116 @@
+import numpy as np
+import time
+from connectedComponents import incrementalComponents
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Percolation analysis over many thresholds in one pass. The voxels are
+# sorted by value once and added, strongest first, to an incremental
+# union-find. At every requested threshold the number of structures,
+# the volume of the largest structure (Vmax) and the volume of all
+# structures (Vall) are recorded.
+
+# The thresholds follow the sign rule of extractStructuresMC: for a
+# positive threshold the structures are made of the values above it,
+# otherwise of the values below it. The structures are those of the
+# neighbor scan without the marching cubes correction.
+
+def percolation_sweep(_thresholds, c, xlen, ylen, zlen, _zFastest, \
+verbose = False, _writePercolationData = False, _order = None):
+
+	'''
+
+	Returns three arrays, aligned with _thresholds: the number of
+	structures, Vmax and Vall. _order may hold the argsort of the
+	flattened (C-order) field if it is already known.
+
+	'''
+
+	start_time = time.time()
+
+	_thresholdNames = [str(v) for v in _thresholds]
+	_thresholds = np.asarray(_thresholds, dtype = np.float64)
+	_shape = (xlen, ylen, zlen)
+
+	# Reshape data
+
+	if _zFastest:
+		c = np.reshape(c, _shape)
+	else:
+		c = np.reshape(c, _shape, order = 'F')
+
+	_values = np.ravel(c)
+
+	if _order is None:
+		_order = np.argsort(_values, kind = 'stable')
+	_sortedValues = _values[_order]
+
+	if verbose:
+		print('Sorting done:', time.time() - start_time)
+
+	_numberOfStructures = np.zeros(len(_thresholds), dtype = np.int64)
+	Vmax = np.zeros(len(_thresholds), dtype = np.int64)
+	Vall = np.zeros(len(_thresholds), dtype = np.int64)
+
+	# Positive thresholds add voxels from the largest value down,
+	# the others from the smallest value up
+
+	for _positive in (True, False):
+
+		if _positive:
+			_which = np.nonzero(_thresholds > 0)[0]
+			_which = _which[np.argsort(-_thresholds[_which], kind = 'stable')]
+		else:
+			_which = np.nonzero(_thresholds <= 0)[0]
+			_which = _which[np.argsort(_thresholds[_which], kind = 'stable')]
+
+		if len(_which) == 0:
+			continue
+
+		_components = incrementalComponents(_shape)
+		_added = 0
+
+		for n in _which:
+
+			# Compare in the precision of the field, as the thresholding
+			# in extractStructuresMC does
+
+			_t = _sortedValues.dtype.type(_thresholds[n])
+
+			if _positive:
+				_count = len(_values) - np.searchsorted(_sortedValues, _t, side = 'right')
+				_new = _order[len(_values) - _count:len(_values) - _added]
+			else:
+				_count = np.searchsorted(_sortedValues, _t, side = 'left')
+				_new = _order[_added:_count]
+
+			_components.add(_new)
+			_added = _count
+
+			_numberOfStructures[n] = _components.numberOfStructures
+			Vmax[n] = _components.Vmax
+			Vall[n] = _components.Vall
+
+			if verbose:
+				print('Threshold:', _thresholds[n], 'structures:', _numberOfStructures[n], \
+				'Vmax:', Vmax[n], 'Vall:', Vall[n])
+
+	if _writePercolationData:
+
+		fw = open('Percolation_threshold.txt', 'a')
+		for n in range(len(_thresholds)):
+			fw.write(_thresholdNames[n] + ' ' + str(Vmax[n]) + ' ' + str(Vall[n]) + '\n')
+		fw.close()
+
+	if verbose:
+		print('Total time:', time.time() - start_time)
+
+	return _numberOfStructures, Vmax, Vall
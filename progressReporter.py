@@ -0,0 +1,67 @@
+import time
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+def print_progress(_info):
+
+	# Default callback of verbose runs
+
+	if 'message' in _info:
+		print(_info['message'])
+	else:
+		print('Scanned: ' + str(round(100*_info['fraction'], 1)) + '%', \
+		'structures:', _info['structures'], \
+		'elapsed:', round(_info['elapsed'], 1), 's', \
+		'remaining:', '-' if _info['eta'] is None else str(round(_info['eta'], 1)) + ' s')
+
+class progressReporter:
+
+	'''
+
+	Sends progress to _callback, at most once every _interval seconds:
+	a dictionary with the fraction of voxels scanned, the number of
+	structures found so far, the elapsed time and the estimated time
+	remaining (None until something was scanned). Messages are passed
+	on at once as {'message': text}. Without a callback nothing is
+	reported.
+
+	'''
+
+	def __init__(self, _callback = None, _interval = 1.0):
+
+		self._callback = _callback
+		self._interval = _interval
+		self.reset()
+
+	def reset(self):
+
+		self._start = time.monotonic()
+		self._last = self._start
+
+	def message(self, _text):
+
+		if self._callback is not None:
+			self._callback({'message': _text})
+
+	def update(self, _fraction, _structures, _force = False):
+
+		if self._callback is None:
+			return
+
+		_now = time.monotonic()
+		if not _force and _now - self._last < self._interval:
+			return
+
+		self._last = _now
+		_elapsed = _now - self._start
+
+		self._callback({'fraction': _fraction, 'structures': _structures, 'elapsed': _elapsed, \
+		'eta': _elapsed*(1 - _fraction)/_fraction if _fraction > 0 else None})
@@ -0,0 +1,38 @@
+import numpy as np
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Zero-copy reader for raw binary fields. The file is memory mapped, so
+# nothing is read until the data is used and the field is never held
+# twice in memory.
+
+_byteOrders = {'little': '<', 'big': '>', 'native': '=', '<': '<', '>': '>', '=': '='}
+
+def read_raw(_filenameRead, xlen, ylen, zlen, precision = 'f', \
+_byteOrder = 'native', _headerOffset = 0, _zFastest = True):
+
+	'''
+
+	Returns a read-only np.memmap of shape (xlen, ylen, zlen) on the raw
+	binary file. precision is a type code as for the array module ('f'
+	for 32-bit floating point data) or any numpy dtype. _byteOrder is
+	'little', 'big' or 'native'. _headerOffset is the number of bytes to
+	skip at the start of the file. _zFastest = False reads Fortran order.
+
+	'''
+
+	if _byteOrder not in _byteOrders:
+		raise ValueError('Unknown byte order: ' + str(_byteOrder))
+
+	_dtype = np.dtype(precision).newbyteorder(_byteOrders[_byteOrder])
+
+	return np.memmap(_filenameRead, dtype = _dtype, mode = 'r', offset = _headerOffset, \
+	shape = (xlen, ylen, zlen), order = 'C' if _zFastest else 'F')
@@ -0,0 +1,93 @@
+import numpy as np
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Regions of interest (ROI) are boxes of the grid given as one index
+# range (start, stop) per axis, stop excluded, or None for the whole
+# axis. Structures touching a face of the ROI which lies inside the
+# field are truncated: they may continue outside the ROI.
+
+def roi_ranges(_roi, _shape):
+
+	'''
+
+	Returns the ROI as three (start, stop) tuples of the grid of shape
+	_shape, checking that it is a non-empty box inside the grid.
+
+	'''
+
+	if _roi is None:
+		_roi = (None, None, None)
+
+	if len(_roi) != 3:
+		raise ValueError('The ROI needs one index range per axis: ' + str(_roi))
+
+	_ranges = []
+
+	for _range, n in zip(_roi, _shape):
+
+		if _range is None:
+			_range = (0, n)
+
+		_start, _stop = (int(v) for v in _range)
+		if not 0 <= _start < _stop <= n:
+			raise ValueError('ROI range ' + str(_range) + ' outside an axis of length ' + str(n))
+
+		_ranges.append((_start, _stop))
+
+	return tuple(_ranges)
+
+def roi_from_bounds(_bounds, xcoords, ycoords, zcoords):
+
+	'''
+
+	Returns the index ranges of the grid points lying within the
+	physical _bounds ((xmin, xmax), (ymin, ymax), (zmin, zmax), bounds
+	included, None for a whole axis). x/y/zcoords are the increasing
+	coordinates of the grid points along each axis.
+
+	'''
+
+	_ranges = []
+
+	for _bound, _coords in zip(_bounds, (xcoords, ycoords, zcoords)):
+
+		if _bound is None:
+			_ranges.append(None)
+			continue
+
+		_ranges.append((int(np.searchsorted(_coords, _bound[0], side = 'left')), \
+		int(np.searchsorted(_coords, _bound[1], side = 'right'))))
+
+	return tuple(_ranges)
+
+def truncated_structures(_labels, _n, _ranges, _shape):
+
+	'''
+
+	Returns a boolean array, True for the labels 1 to _n of the ROI label
+	grid _labels which touch a face of the ROI inside the field of shape
+	_shape.
+
+	'''
+
+	_truncated = np.zeros(_n + 1, dtype = bool)
+
+	for _axis in range(3):
+
+		_start, _stop = _ranges[_axis]
+
+		if _start > 0:
+			_truncated[np.take(_labels, 0, axis = _axis)] = True
+		if _stop < _shape[_axis]:
+			_truncated[np.take(_labels, -1, axis = _axis)] = True
+
+	return _truncated[1:]
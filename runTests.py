@@ -1,7 +1,28 @@
-import array
 import numpy as np
+import os
+import io
+import contextlib
+import tempfile
 from extractStructuresWithMC import extractStructuresMC
+from rawReader import read_raw
+from packedMask import packedMask
+from connectedComponents import label_dtype, neighborOffsets
+from batchExtraction import extract_series
+from structureTracking import overlap_matrix, track_structures, track_series, successors, \
+predecessors, manifest_labels
+from regionOfInterest import roi_from_bounds
+from sparseLabeling import extract_sparse
+from occupancyPyramid import occupancyPyramid
+from edgeCutLabeling import label_edge_cut
+from extractionSession import extractionSession
+from componentTree import build_component_tree, componentTree, load_component_tree
+from structureIndex import write_structure_index, read_structure_index
+from floodQueue import floodQueue
 import unittest
+import MCOutliers
+from MCCases import case_numbers
+from percolationSweep import percolation_sweep
+from blockExtraction import extract_blocks
 
 #---------------------------------------------------------------------#
 
@@ -12,6 +33,23 @@ import unittest
 
 #---------------------------------------------------------------------#
 
+def smoothed_field(_shape, _seed = 1081):
+	
+	'''
+	
+	Smoothed random field of shape _shape (normal noise summed with its
+	shift along every axis), flattened in C-order as float32. Small
+	enough for the neighbor scan.
+	
+	'''
+	
+	rng = np.random.default_rng(_seed)
+	data = rng.normal(0, 1, _shape)
+	for ax in range(3):
+		data = data + np.roll(data, 1, ax)
+	
+	return data.ravel().astype(np.float32)
+
 class TestBoxCount(unittest.TestCase):
 	
 	'''
@@ -51,14 +89,9 @@ class TestBoxCount(unittest.TestCase):
 	# For others, see here: https://docs.python.org/3/library/array.html
 	precision = 'f'
 
-	# Use array to read data. This is fast for binary files.
-	data = array.array(precision)
-	fr = open(_filenameRead, 'rb')
-	data.fromfile(fr, (xlen*ylen*zlen))
-	fr.close()
-
-	# Convert to numpy array
-	data = np.array(data, dtype = np.float32)
+	# Memory map the binary data. Nothing is copied, the data is read
+	# when it is thresholded.
+	data = read_raw(_filenameRead, xlen, ylen, zlen, precision, _zFastest = _zFastest)
 	
 	# Print out details
 	_verbose = False
@@ -96,6 +129,1208 @@ class TestBoxCount(unittest.TestCase):
 		# -1 is included because len also counts empty space as one structure
 		self.assertEqual(len(np.unique(structureGrid))-1, 31)
 
+class TestArrayEngine(unittest.TestCase):
+	
+	'''
+	
+	This script tests that the array based labeling engine gives the
+	same structures as the neighbor scanning procedure without MC.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_3d_array_engine(self):
+		
+		for _threshVal in [0.5, 2.0, -1.5]:
+			
+			_scan = extractStructuresMC(_threshVal, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, False)
+			_array = extractStructuresMC(_threshVal, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, False, \
+			_engine = 'array')
+			
+			np.testing.assert_array_equal(_scan.extract(), _array.extract())
+
+class TestFloodQueue(unittest.TestCase):
+	
+	'''
+	
+	This script tests the ring buffer of the flood fill queue, its
+	memory limit and the peak length reported by the extraction.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_wrap_and_growth(self):
+		
+		_queue = floodQueue((5, 6, 7), _initialLength = 4)
+		_points = [(i, j, k) for i in range(5) for j in range(6) for k in range(7)]
+		
+		# Wrap around the end of the buffer, then grow with the queue not
+		# starting at 0
+		
+		for _point in _points[:3]:
+			_queue.push(*_point)
+		self.assertEqual([_queue.pop(), _queue.pop()], _points[:2])
+		for _point in _points[3:20]:
+			_queue.push(*_point)
+		
+		self.assertEqual(len(_queue), 18)
+		self.assertEqual(_queue.peakLength, 18)
+		self.assertEqual([_queue.pop() for n in range(18)], _points[2:20])
+		self.assertRaises(IndexError, _queue.pop)
+		
+		_queue.reset()
+		_queue.push(*_points[-1])
+		self.assertEqual(_queue.pop(), _points[-1])
+		self.assertEqual(_queue.peakLength, 18)
+	
+	def test_memory_limit(self):
+		
+		# 4 points of 8 bytes
+		
+		_queue = floodQueue((5, 6, 7), _memoryLimit = 32)
+		for n in range(4):
+			_queue.push(0, 0, n)
+		self.assertRaises(MemoryError, _queue.push, 0, 0, 4)
+	
+	def test_peak_queue_length(self):
+		
+		extractStructuresObj = extractStructuresMC(-1.5, self.data, \
+		self.xlen, self.ylen, self.zlen, True, False, False, False, True)
+		structureGrid, _stats = extractStructuresObj.extract(_returnExtractionStats = True)
+		_peak = extractStructuresObj.peakQueueLength
+		
+		self.assertGreater(_peak, 1)
+		self.assertEqual(_stats.peakQueueLength, _peak)
+		
+		# The scan runs with a queue of exactly the peak length, and not
+		# with one point less
+		
+		extractStructuresObj = extractStructuresMC(-1.5, self.data, \
+		self.xlen, self.ylen, self.zlen, True, False, False, False, True, \
+		_queueMemoryLimit = 8*_peak)
+		np.testing.assert_array_equal(extractStructuresObj.extract(), structureGrid)
+		
+		extractStructuresObj = extractStructuresMC(-1.5, self.data, \
+		self.xlen, self.ylen, self.zlen, True, False, False, False, True, \
+		_queueMemoryLimit = 8*(_peak - 1))
+		self.assertRaises(MemoryError, extractStructuresObj.extract)
+
+class TestRawReader(unittest.TestCase):
+	
+	'''
+	
+	This script tests that the memory map of a raw file with a header,
+	big-endian values and Fortran order gives the field written.
+	
+	'''
+	
+	def test_read_raw(self):
+		
+		_field = np.arange(3*4*5, dtype = np.float32).reshape(3, 4, 5)/7
+		
+		with tempfile.TemporaryDirectory() as _dir:
+			
+			_filename = os.path.join(_dir, 'field.bin')
+			with open(_filename, 'wb') as fw:
+				fw.write(b'header..')
+				fw.write(_field.astype('>f4').tobytes(order = 'F'))
+			
+			data = read_raw(_filename, 3, 4, 5, 'f', _byteOrder = 'big', _headerOffset = 8, \
+			_zFastest = False)
+			
+			self.assertEqual(data.shape, (3, 4, 5))
+			np.testing.assert_array_equal(data, _field)
+			
+			# Read as little-endian, the values are byte swapped
+			
+			data = read_raw(_filename, 3, 4, 5, 'f', _byteOrder = 'little', _headerOffset = 8, \
+			_zFastest = False)
+			np.testing.assert_array_equal(data, _field.astype('>f4').view('<f4'))
+			del data
+		
+		self.assertRaises(ValueError, read_raw, _filename, 3, 4, 5, 'f', _byteOrder = 'middle')
+
+class TestMCOutlierTables(unittest.TestCase):
+	
+	'''
+	
+	This script tests the precompiled marching cubes tables against
+	MCOutliers.outliers() and the corner offsets of the 8 sub-cubes
+	used by the MC correction.
+	
+	'''
+	
+	# Corner -> offset from [i, j, k] for cube 1 to cube 8. The corner
+	# located at [i, j, k] is left out.
+	_offsets = [{0: (0, 0, -1), 1: (1, 0, -1), 2: (1, -1, -1), 3: (0, -1, -1), \
+	5: (1, 0, 0), 6: (1, -1, 0), 7: (0, -1, 0)}, \
+	{0: (-1, 0, -1), 1: (0, 0, -1), 2: (0, -1, -1), 3: (-1, -1, -1), \
+	4: (-1, 0, 0), 6: (0, -1, 0), 7: (-1, -1, 0)}, \
+	{0: (-1, 1, -1), 1: (0, 1, -1), 2: (0, 0, -1), 3: (-1, 0, -1), \
+	4: (-1, 1, 0), 5: (0, 1, 0), 7: (-1, 0, 0)}, \
+	{0: (0, 1, -1), 1: (1, 1, -1), 2: (1, 0, -1), 3: (0, 0, -1), \
+	4: (0, 1, 0), 5: (1, 1, 0), 6: (1, 0, 0)}, \
+	{1: (1, 0, 0), 2: (1, -1, 0), 3: (0, -1, 0), 4: (0, 0, 1), \
+	5: (1, 0, 1), 6: (1, -1, 1), 7: (0, -1, 1)}, \
+	{0: (-1, 0, 0), 2: (0, -1, 0), 3: (-1, -1, 0), 4: (-1, 0, 1), \
+	5: (0, 0, 1), 6: (0, -1, 1), 7: (-1, -1, 1)}, \
+	{0: (-1, 1, 0), 1: (0, 1, 0), 3: (-1, 0, 0), 4: (-1, 1, 1), \
+	5: (0, 1, 1), 6: (0, 0, 1), 7: (-1, 0, 1)}, \
+	{0: (0, 1, 0), 1: (1, 1, 0), 2: (1, 0, 0), 4: (0, 1, 1), \
+	5: (1, 1, 1), 6: (1, 0, 1), 7: (0, 0, 1)}]
+	
+	def test_outlier_groups(self):
+		
+		for _case in range(256):
+			
+			_caseVal = MCOutliers.outliers(_case)
+			
+			self.assertEqual(MCOutliers.isOutlierCase[_case], len(_caseVal) > 0)
+			if len(_caseVal) > 0:
+				self.assertEqual(MCOutliers.outlierGroups[MCOutliers.outlierGroupIndex[_case]], _caseVal)
+			else:
+				self.assertEqual(MCOutliers.outlierGroupIndex[_case], -1)
+	
+	def test_cube_offsets(self):
+		
+		for ii in range(8):
+			
+			_centre = MCOutliers.cubeCentres[ii]
+			self.assertEqual(tuple(MCOutliers.cubeOffsets[ii, _centre]), (0, 0, 0))
+			
+			for _corner, _offset in self._offsets[ii].items():
+				self.assertEqual(tuple(MCOutliers.cubeOffsets[ii, _corner]), _offset)
+	
+	def test_remove_tables(self):
+		
+		for ii in range(8):
+			for _case in range(256):
+				
+				# Corners discarded by the MC correction: all outlier groups
+				# which do not contain [i, j, k]
+				
+				_removeVal = []
+				for _group in MCOutliers.outliers(_case):
+					if MCOutliers.cubeCentres[ii] not in _group:
+						_removeVal += _group
+				
+				self.assertEqual(sorted(np.nonzero(MCOutliers.removeMask[ii, _case])[0]), sorted(_removeVal))
+				self.assertEqual(sorted(MCOutliers.removeOffsets[ii][_case]), \
+				sorted(self._offsets[ii][v] for v in _removeVal))
+
+class TestCaseNumbers(unittest.TestCase):
+	
+	'''
+	
+	This script tests the whole-volume MC case numbers against
+	find_case_number evaluated cube by cube.
+	
+	'''
+	
+	rng = np.random.default_rng(2110)
+	_mask = rng.random((6, 7, 5)) < 0.5
+	
+	def _corner(self, _mask, i, j, k, _periodic):
+		
+		_shape = np.shape(_mask)
+		if _periodic:
+			return _mask[i % _shape[0], j % _shape[1], k % _shape[2]]
+		if min(i, j, k) < 0 or i >= _shape[0] or j >= _shape[1] or k >= _shape[2]:
+			return False
+		return _mask[i, j, k]
+	
+	def check_case_numbers(self, _mask):
+		
+		_obj = extractStructuresMC(1, np.zeros(8), 2, 2, 2, True, False, False, False, False)
+		
+		for _periodic in [False, True]:
+			
+			_codes = case_numbers(_mask, _periodic, _slabSize = 4)
+			_p = 0 if _periodic else 1
+			
+			for (i, j, k), _code in np.ndenumerate(_codes):
+				_cube = [self._corner(_mask, i - _p + dx, j - _p + dy, k - _p + dz, _periodic) \
+				for dx, dy, dz in MCOutliers.cornerOffsets]
+				self.assertEqual(_code, _obj.find_case_number(_cube))
+	
+	def test_case_numbers(self):
+		
+		self.check_case_numbers(self._mask)
+	
+	def test_long_axes(self):
+		
+		# Axes of 128 or more voxels, beyond the range of int8 offsets
+		
+		for _shape in [(130, 3, 4), (3, 130, 4), (3, 4, 130)]:
+			self.check_case_numbers(self.rng.random(_shape) < 0.5)
+		
+		# The MC correction limited to the candidates gives the structures
+		# of the correction of every voxel (seeded at their first voxel)
+		
+		_shape = (6, 140, 9)
+		extractStructuresObj = extractStructuresMC(1.0, smoothed_field(_shape), *_shape, \
+		True, False, False, False, True)
+		structureGrid = extractStructuresObj.extract().reshape(_shape)
+		
+		_labels, _voxelLists, _stats = extractStructuresObj.extract_seeds( \
+		[np.argwhere(structureGrid == l)[0] for l in range(1, structureGrid.max() + 1)])
+		
+		for l, _voxels in enumerate(_voxelLists):
+			np.testing.assert_array_equal(_voxels, np.argwhere(structureGrid == l + 1))
+
+class TestPercolationSweep(unittest.TestCase):
+	
+	'''
+	
+	This script tests the one-pass percolation sweep against separate
+	extractions (without MC) at each threshold.
+	
+	'''
+	
+	xlen = 21
+	ylen = 18
+	zlen = 25
+	
+	data = smoothed_field((xlen, ylen, zlen), 1987)
+	
+	def test_percolation_sweep(self):
+		
+		_thresholds = [2.5, 0.5, 1.5, -1.0, -3.0, 0]
+		_numberOfStructures, Vmax, Vall = percolation_sweep(_thresholds, self.data, \
+		self.xlen, self.ylen, self.zlen, True)
+		
+		for n, _threshVal in enumerate(_thresholds):
+			
+			extractStructuresObj = extractStructuresMC(_threshVal, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, False, \
+			_engine = 'array')
+			_counts = np.bincount(extractStructuresObj.extract())[1:]
+			
+			self.assertEqual(_numberOfStructures[n], len(_counts))
+			self.assertEqual(Vmax[n], _counts.max() if len(_counts) > 0 else 0)
+			self.assertEqual(Vall[n], _counts.sum())
+
+class TestBlockExtraction(unittest.TestCase):
+	
+	'''
+	
+	This script tests that the block decomposed extraction gives the same
+	labels as the in-core extraction (without MC).
+	
+	'''
+	
+	xlen = 19
+	ylen = 26
+	zlen = 22
+	
+	data = smoothed_field((xlen, ylen, zlen), 2048)
+	
+	def test_block_extraction(self):
+		
+		for _threshVal in [1.5, -0.5]:
+			
+			extractStructuresObj = extractStructuresMC(_threshVal, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, False, \
+			_engine = 'array')
+			structureGrid = extractStructuresObj.extract()
+			
+			for _blockShape in [(5, 7, 4), (19, 3, 22), (8, 8, 8)]:
+				
+				_labels, _structVal = extract_blocks(_threshVal, self.data, \
+				self.xlen, self.ylen, self.zlen, True, _blockShape = _blockShape)
+				
+				self.assertEqual(_structVal, structureGrid.max())
+				np.testing.assert_array_equal(_labels.ravel(), structureGrid)
+			
+			# Blocks labeled by worker processes
+			
+			_labels, _structVal = extract_blocks(_threshVal, self.data, \
+			self.xlen, self.ylen, self.zlen, True, _blockShape = (8, 8, 8), _workers = 2)
+			np.testing.assert_array_equal(_labels.ravel(), structureGrid)
+
+class TestLowMemory(unittest.TestCase):
+	
+	'''
+	
+	This script tests that the bit-packed mask and the narrow label
+	grid of _lowMemory give the same structures, with and without MC.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_packed_mask(self):
+		
+		_mask = np.random.default_rng(1081).random((4, 5, 21)) > 0.5
+		_packed = packedMask(np.shape(_mask))
+		_packed[:, :, 0:3] = _mask[:, :, 0:3]
+		_packed[:, :, 3:21] = _mask[:, :, 3:21]
+		
+		np.testing.assert_array_equal(_packed[:], _mask)
+		self.assertEqual(_packed[3, 4, -1], _mask[3, 4, -1])
+		self.assertRaises(IndexError, _packed.__getitem__, (0, 0, 21))
+	
+	def test_low_memory(self):
+		
+		for _threshVal in [0.5, 2.0, -1.5]:
+			for _marchingCubesExt in [False, True]:
+				
+				_default = extractStructuresMC(_threshVal, self.data, \
+				self.xlen, self.ylen, self.zlen, True, False, False, False, _marchingCubesExt)
+				_lowMemory = extractStructuresMC(_threshVal, self.data, \
+				self.xlen, self.ylen, self.zlen, True, False, False, False, _marchingCubesExt, \
+				_lowMemory = True)
+				
+				structureGrid = _lowMemory.extract()
+				np.testing.assert_array_equal(_default.extract(), structureGrid)
+				self.assertEqual(structureGrid.dtype, label_dtype(structureGrid.max()))
+
+class TestStructureStatistics(unittest.TestCase):
+	
+	'''
+	
+	This script tests the statistics table against the voxel lists of
+	the structures.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_structure_statistics(self):
+		
+		extractStructuresObj = extractStructuresMC(1.0, self.data, \
+		self.xlen, self.ylen, self.zlen, True, False, False, False, True)
+		structureGrid, _stats = extractStructuresObj.extract(_returnStatistics = True)
+		structureGrid = structureGrid.reshape(self.xlen, self.ylen, self.zlen)
+		
+		self.assertEqual(len(_stats['label']), structureGrid.max())
+		
+		for _l in _stats['label']:
+			
+			_voxels = np.argwhere(structureGrid == _l)
+			_row = _l - 1
+			
+			self.assertEqual(_stats['volume'][_row], len(_voxels))
+			np.testing.assert_array_equal([_stats[v][_row] for v in ('xmin', 'ymin', 'zmin')], \
+			_voxels.min(axis = 0))
+			np.testing.assert_array_equal([_stats[v][_row] for v in ('xmax', 'ymax', 'zmax')], \
+			_voxels.max(axis = 0))
+			np.testing.assert_allclose([_stats[v][_row] for v in ('xc', 'yc', 'zc')], \
+			_voxels.mean(axis = 0))
+			
+			_cov = np.cov(_voxels.T, bias = True)
+			np.testing.assert_allclose([_stats[v][_row] for v in ('xx', 'yy', 'zz', 'xy', 'xz', 'yz')], \
+			[_cov[0, 0], _cov[1, 1], _cov[2, 2], _cov[0, 1], _cov[0, 2], _cov[1, 2]], atol = 1e-9)
+
+class TestBatchExtraction(unittest.TestCase):
+	
+	'''
+	
+	This script tests that the batch driver writes the same labels as
+	extract() for every snapshot and records failures in the manifest.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_batch_extraction(self):
+		
+		with tempfile.TemporaryDirectory() as _tempDir:
+			
+			_filenames = [os.path.join(_tempDir, 'snapshot' + str(n) + '.bin') for n in range(3)]
+			for n in range(2):
+				(self.data*(n + 1)).tofile(_filenames[n])
+			
+			# The third snapshot is missing
+			
+			_manifest = extract_series(_filenames, os.path.join(_tempDir, 'out'), 1.5, \
+			self.xlen, self.ylen, self.zlen, _marchingCubesExt = True, _workers = 2)
+			
+			self.assertEqual(_manifest['failures'], [_filenames[2]])
+			
+			for n in range(2):
+				
+				extractStructuresObj = extractStructuresMC(1.5, self.data*(n + 1), \
+				self.xlen, self.ylen, self.zlen, True, False, False, False, True)
+				structureGrid = extractStructuresObj.extract()
+				
+				_entry = _manifest['snapshots'][n]
+				_labels = np.fromfile(_entry['labels'], dtype = _entry['labelsDtype'])
+				np.testing.assert_array_equal(_labels, structureGrid)
+				self.assertEqual(_entry['numberOfStructures'], structureGrid.max())
+
+class TestStructureTracking(unittest.TestCase):
+	
+	'''
+	
+	This script tests the overlap matrix between two label grids against
+	a count over all voxel pairs, and the links of a split.
+	
+	'''
+	
+	rng = np.random.default_rng(1081)
+	
+	def test_overlap_matrix(self):
+		
+		_labelsA = self.rng.integers(0, 7, (9, 8, 7)).astype(np.uint8)
+		_labelsB = self.rng.integers(0, 300, (9, 8, 7)).astype(np.uint16)
+		
+		_a, _b, _overlap = overlap_matrix(_labelsA, _labelsB, _chunkSize = 50)
+		
+		_pairs = {}
+		for _key in zip(_labelsA.ravel().tolist(), _labelsB.ravel().tolist()):
+			if _key[0] > 0 and _key[1] > 0:
+				_pairs[_key] = _pairs.get(_key, 0) + 1
+		
+		self.assertEqual(list(zip(_a.tolist(), _b.tolist())), sorted(_pairs))
+		self.assertEqual(_overlap.tolist(), [_pairs[v] for v in sorted(_pairs)])
+	
+	def test_split(self):
+		
+		# Structure 1 splits into 1 and 2, structure 2 vanishes
+		
+		_labelsA = np.zeros((4, 4, 4), dtype = np.uint32)
+		_labelsA[0, :, :] = 1
+		_labelsA[3, 3, 3] = 2
+		_labelsB = np.zeros((4, 4, 4), dtype = np.uint32)
+		_labelsB[0, :2, :] = 1
+		_labelsB[0, 2:, :2] = 2
+		
+		_series = track_series(iter([_labelsA, _labelsB]))
+		self.assertEqual(len(_series), 1)
+		
+		_b, _fraction = successors(_series[0], 1)
+		np.testing.assert_array_equal(_b, [1, 2])
+		np.testing.assert_allclose(_fraction, [0.5, 0.25])
+		self.assertEqual(len(successors(_series[0], 2)[0]), 0)
+		
+		_a, _fraction = predecessors(_series[0], 2)
+		np.testing.assert_array_equal(_a, [1])
+		np.testing.assert_allclose(_fraction, [1.0])
+	
+	def test_failed_snapshot(self):
+		
+		# The third of four snapshots failed, no track crosses it
+		
+		_shape = (4, 5, 6)
+		
+		with tempfile.TemporaryDirectory() as _dir:
+			
+			_snapshots = []
+			for n in range(4):
+				_filename = os.path.join(_dir, 'labels' + str(n) + '.bin')
+				np.ones(_shape, dtype = np.uint8).tofile(_filename)
+				_snapshots.append({'status': 'failed' if n == 2 else 'ok', 'labels': _filename, \
+				'labelsDtype': 'uint8'})
+			
+			_manifest = {'settings': {'xlen': 4, 'ylen': 5, 'zlen': 6}, 'snapshots': _snapshots}
+			_series = track_series(manifest_labels(_manifest))
+		
+		self.assertEqual(len(_series), 3)
+		np.testing.assert_array_equal(successors(_series[0], 1)[0], [1])
+		self.assertIsNone(_series[1])
+		self.assertIsNone(_series[2])
+	
+	def test_links_lookup(self):
+		
+		# Successors and predecessors against a scan of all links
+		
+		_links = track_structures(self.rng.integers(0, 9, (9, 8, 7)), \
+		self.rng.integers(0, 40, (9, 8, 7)))
+		
+		for a in range(10):
+			_rows = np.nonzero(_links['a'] == a)[0]
+			for v, w in zip(successors(_links, a), (_links['b'][_rows], _links['fractionA'][_rows])):
+				np.testing.assert_array_equal(v, w)
+		
+		for b in range(41):
+			_rows = np.nonzero(_links['b'] == b)[0]
+			for v, w in zip(predecessors(_links, b), (_links['a'][_rows], _links['fractionB'][_rows])):
+				np.testing.assert_array_equal(v, w)
+
+class TestPeriodic(unittest.TestCase):
+	
+	'''
+	
+	This script tests the merging across periodic faces against a
+	flood fill with wrapped neighbor indices, with and without the MC
+	correction of the links.
+	
+	'''
+	
+	rng = np.random.default_rng(1081)
+	
+	_pairIndex = {(_u, _v): n for n, (_u, _v, _d) in enumerate(MCOutliers.cubePairs)}
+	
+	def link_cut(self, _mask, _periodic, _point, _offset):
+		
+		# True if a cube holding the voxel _point and its neighbor at
+		# _offset has an outlier case separating them. The corners of the
+		# cubes of links across the periodic faces wrap around, all other
+		# corners beyond the faces are empty.
+		
+		_shape = np.shape(_mask)
+		_neighbor = [_point[a] + _offset[a] for a in range(3)]
+		_wrapped = any(not 0 <= _neighbor[a] < _shape[a] for a in range(3))
+		
+		def _corner(x):
+			if _wrapped:
+				x = [x[a] % _shape[a] if _periodic[a] else x[a] for a in range(3)]
+			if not all(0 <= x[a] < _shape[a] for a in range(3)):
+				return False
+			return _mask[tuple(x)]
+		
+		for _lower in np.ndindex(2, 2, 2):
+			
+			_lower = [_point[a] - _lower[a] for a in range(3)]
+			_u = [_point[a] - _lower[a] for a in range(3)]
+			_v = [_neighbor[a] - _lower[a] for a in range(3)]
+			if not all(0 <= v <= 1 for v in _v):
+				continue
+			
+			_case = sum(2**n for n, _c in enumerate(MCOutliers.cornerOffsets) \
+			if _corner([_lower[a] + _c[a] for a in range(3)]))
+			_corners = [[tuple(_c) for _c in MCOutliers.cornerOffsets.tolist()].index(tuple(v)) \
+			for v in (_u, _v)]
+			_pair = self._pairIndex.get(tuple(_corners), self._pairIndex.get(tuple(_corners[::-1])))
+			
+			if MCOutliers.pairCut[_case, _pair]:
+				return True
+		
+		return False
+	
+	def periodic_flood_fill(self, _mask, _periodic, _marchingCubesExt = False):
+		
+		_shape = np.shape(_mask)
+		_labels = np.zeros(_shape, dtype = np.int64)
+		_structVal = 0
+		
+		for _seed in zip(*np.nonzero(_mask)):
+			
+			if _labels[_seed] > 0:
+				continue
+			
+			_structVal += 1
+			_labels[_seed] = _structVal
+			_stack = [_seed]
+			
+			while _stack:
+				
+				_point = _stack.pop()
+				
+				for _offset in neighborOffsets:
+					
+					_neighbor = [_point[a] + _offset[a] for a in range(3)]
+					if not all(_periodic[a] or 0 <= _neighbor[a] < _shape[a] for a in range(3)):
+						continue
+					_neighbor = tuple(_neighbor[a] % _shape[a] for a in range(3))
+					
+					if _mask[_neighbor] and _labels[_neighbor] == 0:
+						if _marchingCubesExt and self.link_cut(_mask, _periodic, _point, _offset):
+							continue
+						_labels[_neighbor] = _structVal
+						_stack.append(_neighbor)
+		
+		return _labels
+	
+	def test_periodic(self):
+		
+		for _shape in [(7, 5, 6), (4, 9, 3)]:
+			
+			_data = self.rng.normal(0, 1, _shape).astype(np.float32)
+			
+			for _periodic in [(True, True, True), (True, False, False), (False, True, True)]:
+				
+				_expected = self.periodic_flood_fill(_data > 1.0, _periodic)
+				
+				for _engine in ['scan', 'array']:
+					
+					extractStructuresObj = extractStructuresMC(1.0, _data.ravel(), \
+					*_shape, True, False, False, False, False, _engine = _engine, \
+					_periodic = _periodic)
+					structureGrid = extractStructuresObj.extract()
+					
+					np.testing.assert_array_equal(structureGrid, _expected.ravel())
+	
+	def test_periodic_with_MC(self):
+		
+		for _shape in [(7, 5, 6), (4, 9, 3)]:
+			
+			_data = smoothed_field(_shape, 1987).reshape(_shape)
+			
+			for _periodic in [(True, True, True), (True, False, False), (False, True, True)]:
+				
+				_expected = self.periodic_flood_fill(_data > 1.0, _periodic, True)
+				
+				for _engine in ['scan', 'edgecut']:
+					
+					extractStructuresObj = extractStructuresMC(1.0, _data.ravel(), \
+					*_shape, True, False, False, False, True, _engine = _engine, \
+					_periodic = _periodic)
+					structureGrid = extractStructuresObj.extract()
+					
+					np.testing.assert_array_equal(structureGrid, _expected.ravel())
+
+class TestExtractionStats(unittest.TestCase):
+	
+	'''
+	
+	This script tests the counters of the extraction stats against the
+	labels and the hooks.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_extraction_stats(self):
+		
+		_emitted = []
+		
+		extractStructuresObj = extractStructuresMC(1.0, self.data, \
+		self.xlen, self.ylen, self.zlen, True, False, False, False, True, \
+		_statsHooks = [_emitted.append])
+		structureGrid, _stats = extractStructuresObj.extract(_returnExtractionStats = True)
+		
+		self.assertEqual(len(_emitted), 1)
+		self.assertEqual(_emitted[0]['numberOfStructures'], structureGrid.max())
+		self.assertEqual(_stats.voxelsScanned, (self.xlen + 1)*(self.ylen + 1)*(self.zlen + 1))
+		self.assertEqual(_stats.neighborProbes, 26*_stats.voxelsVisited)
+		self.assertEqual(_stats.caseHistogram.sum(), 8*_stats.mcCorrections)
+		self.assertEqual(_stats.caseHistogram[MCOutliers.isOutlierCase].sum(), _stats.outlierCaseCount)
+		self.assertEqual(_stats.outlierCaseCount, extractStructuresObj.outlierCaseCount)
+		self.assertTrue(all(v >= 0 for v in _stats.phaseTimes.values()))
+
+class TestProgress(unittest.TestCase):
+	
+	'''
+	
+	This script tests the progress callback and that extractions are
+	quiet by default.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_progress(self):
+		
+		_reports = []
+		
+		extractStructuresObj = extractStructuresMC(1.0, self.data, \
+		self.xlen, self.ylen, self.zlen, True, False, False, False, True, \
+		_progress = _reports.append, _progressInterval = 0)
+		structureGrid = extractStructuresObj.extract()
+		
+		self.assertEqual(_reports[0], {'message': 'Marching cubes correction enabled..'})
+		
+		_fractions = [v['fraction'] for v in _reports[1:]]
+		self.assertEqual(_fractions, sorted(_fractions))
+		self.assertEqual(_fractions[-1], 1.0)
+		self.assertEqual(_reports[-1]['structures'], structureGrid.max())
+		self.assertEqual(_reports[-1]['eta'], 0.0)
+	
+	def test_quiet(self):
+		
+		_stdout = io.StringIO()
+		
+		with contextlib.redirect_stdout(_stdout):
+			extractStructuresObj = extractStructuresMC(1.0, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, True)
+			extractStructuresObj.extract()
+		
+		self.assertEqual(_stdout.getvalue(), '')
+
+class TestSeededExtraction(unittest.TestCase):
+	
+	'''
+	
+	This script tests that the structures flooded from seeds are those
+	of the full extraction without MC.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_seeded_extraction(self):
+		
+		extractStructuresObj = extractStructuresMC(2.0, self.data, \
+		self.xlen, self.ylen, self.zlen, True, False, False, False, False)
+		structureGrid = extractStructuresObj.extract().reshape(self.xlen, self.ylen, self.zlen)
+		
+		# Two seeds in one structure, one in another and one in empty space
+		
+		_first = np.argwhere(structureGrid == 1)
+		_other = np.argwhere(structureGrid == structureGrid.max())
+		_empty = np.argwhere(structureGrid == 0)[0]
+		
+		_labels, _voxelLists, _stats = extractStructuresObj.extract_seeds( \
+		[_other[-1], _empty, _first[0], _other[0]])
+		
+		np.testing.assert_array_equal(_labels, [1, 0, 2, 1])
+		np.testing.assert_array_equal(_voxelLists[0], _other)
+		np.testing.assert_array_equal(_voxelLists[1], _first)
+		np.testing.assert_array_equal(_stats['volume'], [len(_other), len(_first)])
+	
+	def test_seeded_extraction_with_MC(self):
+		
+		# Seeded at their first voxel, the structures are those of the
+		# full extraction with MC
+		
+		extractStructuresObj = extractStructuresMC(1.0, self.data, \
+		self.xlen, self.ylen, self.zlen, True, False, False, False, True)
+		structureGrid = extractStructuresObj.extract().reshape(self.xlen, self.ylen, self.zlen)
+		
+		_labels, _voxelLists, _stats = extractStructuresObj.extract_seeds( \
+		[np.argwhere(structureGrid == l)[0] for l in range(1, structureGrid.max() + 1)])
+		
+		np.testing.assert_array_equal(_labels, np.arange(1, structureGrid.max() + 1))
+		for l, _voxels in enumerate(_voxelLists):
+			np.testing.assert_array_equal(_voxels, np.argwhere(structureGrid == l + 1))
+	
+	def test_seeded_extraction_with_roi(self):
+		
+		# Seeds and voxels are indices of the original grid
+		
+		for _marchingCubesExt in [False, True]:
+			
+			extractStructuresObj = extractStructuresMC(1.0, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, _marchingCubesExt, \
+			_roi = ((2, 11), None, (3, 12)))
+			structureGrid = extractStructuresObj.extract().reshape(9, self.ylen, 9)
+			
+			_voxels = np.argwhere(structureGrid == structureGrid.max()) + [2, 0, 3]
+			_labels, _voxelLists, _stats = extractStructuresObj.extract_seeds([_voxels[-1]])
+			
+			np.testing.assert_array_equal(_labels, [1])
+			np.testing.assert_array_equal(_voxelLists[0], _voxels)
+			self.assertRaises(ValueError, extractStructuresObj.extract_seeds, [[1, 0, 3]])
+	
+	def test_seeded_extraction_periodic(self):
+		
+		extractStructuresObj = extractStructuresMC(1.0, self.data, \
+		self.xlen, self.ylen, self.zlen, True, False, False, False, False, \
+		_periodic = True)
+		self.assertRaises(ValueError, extractStructuresObj.extract_seeds, [[0, 0, 0]])
+
+class TestRegionOfInterest(unittest.TestCase):
+	
+	'''
+	
+	This script tests that an ROI gives the structures of the cut out
+	field, and the structures flagged as truncated by the ROI.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_region_of_interest(self):
+		
+		_roi = ((2, 11), None, (0, 12))
+		_field = self.data.reshape(self.xlen, self.ylen, self.zlen)[2:11, :, 0:12]
+		
+		for _marchingCubesExt in [False, True]:
+			
+			extractStructuresObj = extractStructuresMC(1.0, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, _marchingCubesExt, \
+			_roi = _roi)
+			structureGrid = extractStructuresObj.extract()
+			
+			_expected = extractStructuresMC(1.0, _field.ravel(), *np.shape(_field), \
+			True, False, False, False, _marchingCubesExt).extract()
+			np.testing.assert_array_equal(structureGrid, _expected)
+			
+			# Cut by the faces x = 2, x = 10 and z = 11 of the ROI
+			
+			structureGrid = structureGrid.reshape(np.shape(_field))
+			_cut = np.unique(np.concatenate((structureGrid[0].ravel(), structureGrid[-1].ravel(), \
+			structureGrid[:, :, -1].ravel())))
+			np.testing.assert_array_equal(np.nonzero(extractStructuresObj.truncated)[0] + 1, \
+			_cut[_cut > 0])
+	
+	def test_roi_from_bounds(self):
+		
+		_x = np.linspace(0, 1, 11)
+		
+		self.assertEqual(roi_from_bounds(((0.15, 0.5), None, (0, 0.2)), _x, _x, _x), \
+		((2, 6), None, (0, 3)))
+
+class TestSparseLabeling(unittest.TestCase):
+	
+	'''
+	
+	This script tests that labeling the active voxels only gives the
+	structures of the neighbor scan without MC.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_sparse_labeling(self):
+		
+		for _threshVal in [0.5, 3.0, -2.5]:
+			
+			_scan = extractStructuresMC(_threshVal, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, False)
+			structureGrid = _scan.extract()
+			
+			_sparse = extractStructuresMC(_threshVal, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, False, \
+			_engine = 'sparse')
+			np.testing.assert_array_equal(_sparse.extract(), structureGrid)
+			
+			_voxels, _labels, _structVal = extract_sparse(_threshVal, self.data, \
+			self.xlen, self.ylen, self.zlen, True)
+			np.testing.assert_array_equal(_voxels, np.nonzero(structureGrid)[0])
+			np.testing.assert_array_equal(_labels, structureGrid[_voxels])
+			self.assertEqual(_structVal, structureGrid.max())
+
+class TestOccupancyPyramid(unittest.TestCase):
+	
+	'''
+	
+	This script tests the occupancy pyramid and that skipping its empty
+	bricks leaves the structures of the neighbor scan, with and without
+	MC, unchanged on a field of thin layers.
+	
+	'''
+	
+	xlen = 30
+	ylen = 21
+	zlen = 26
+	
+	data = smoothed_field((xlen, ylen, zlen)).reshape(xlen, ylen, zlen)
+	data[6:24] = 0
+	data = data.ravel()
+	
+	def test_pyramid(self):
+		
+		_mask = self.data.reshape(self.xlen, self.ylen, self.zlen) > 1.0
+		_pyramid = occupancyPyramid(_mask, 4)
+		
+		for i in range(self.xlen):
+			for j in range(self.ylen):
+				_row = np.zeros(self.zlen, dtype = bool)
+				for _kStart, _kStop in _pyramid.row_ranges(i, j):
+					_row[_kStart:_kStop] = True
+				np.testing.assert_array_equal(_mask[i, j] & _row, _mask[i, j])
+				self.assertEqual(_pyramid.rows[i // 4, j // 4], _mask[i//4*4:i//4*4 + 4, j//4*4:j//4*4 + 4].any())
+		
+		self.assertEqual(sum(_mask[v].sum() for v in _pyramid.occupied_bricks()), _mask.sum())
+	
+	def test_brick_skipping(self):
+		
+		for _marchingCubesExt in [False, True]:
+			
+			_full = extractStructuresMC(1.0, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, _marchingCubesExt, \
+			_brickSize = None)
+			structureGrid, _fullStats = _full.extract(_returnExtractionStats = True)
+			
+			for _brickSize in [4, 8]:
+				
+				_skip = extractStructuresMC(1.0, self.data, \
+				self.xlen, self.ylen, self.zlen, True, False, False, False, _marchingCubesExt, \
+				_brickSize = _brickSize)
+				_skipGrid, _skipStats = _skip.extract(_returnExtractionStats = True)
+				
+				np.testing.assert_array_equal(_skipGrid, structureGrid)
+				self.assertLess(_skipStats.voxelsScanned, _fullStats.voxelsScanned)
+				self.assertEqual(_skipStats.voxelsVisited, _fullStats.voxelsVisited)
+
+class TestEdgeCut(unittest.TestCase):
+	
+	'''
+	
+	This script tests the edge-cut form of the MC correction against
+	the sequential correction of the neighbor scan, and that the cut
+	links do not depend on the order of the slabs.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_edge_cut(self):
+		
+		for _threshVal in [0.5, 2.0, -1.5]:
+			
+			_scan = extractStructuresMC(_threshVal, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, True)
+			structureGrid = _scan.extract()
+			
+			_edgeCut = extractStructuresMC(_threshVal, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, True, \
+			_engine = 'edgecut')
+			np.testing.assert_array_equal(_edgeCut.extract(), structureGrid)
+			
+			# Every cube of the mask with an outlier case, counted once
+			
+			_field = self.data.reshape(self.xlen, self.ylen, self.zlen)
+			_mask = _field > _threshVal if _threshVal > 0 else _field < _threshVal
+			_outliers = MCOutliers.isOutlierCase[case_numbers(_mask)].sum()
+			_labels, _structVal, _outlierCaseCount = label_edge_cut(_mask, _slabSize = 4)
+			np.testing.assert_array_equal(_labels.ravel(), structureGrid)
+			self.assertEqual(_structVal, structureGrid.max())
+			self.assertEqual(_outlierCaseCount, _outliers)
+			self.assertGreater(_outliers, 0)
+			self.assertEqual(_edgeCut.outlierCaseCount, _outliers)
+			self.assertEqual(_edgeCut.stats.outlierCaseCount, _outliers)
+	
+	def test_needs_mc(self):
+		
+		with self.assertRaises(ValueError):
+			extractStructuresMC(1.0, self.data, self.xlen, self.ylen, self.zlen, \
+			True, False, False, False, False, _engine = 'edgecut')
+	
+	def test_long_axes(self):
+		
+		# Axes of 128 or more voxels, beyond the range of int8 offsets
+		
+		for _shape in [(140, 6, 9), (6, 140, 9), (6, 9, 140)]:
+			
+			data = smoothed_field(_shape)
+			structureGrid = extractStructuresMC(1.0, data, *_shape, True, False, False, False, True, \
+			_engine = 'scan').extract()
+			
+			_edgeCut = extractStructuresMC(1.0, data, *_shape, True, False, False, False, True, \
+			_engine = 'edgecut')
+			np.testing.assert_array_equal(_edgeCut.extract(), structureGrid)
+			self.assertGreater(structureGrid.max(), 1)
+
+class TestExtractionSession(unittest.TestCase):
+	
+	'''
+	
+	This script tests that a session extracting one field at many
+	thresholds, with reused buffers, gives the structures of a new
+	extractor for every threshold.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_session(self):
+		
+		for _lowMemory in [False, True]:
+			
+			_session = extractionSession(self.data, self.xlen, self.ylen, self.zlen, True, \
+			_lowMemory = _lowMemory)
+			
+			for _threshVal in [1.0, 2.5, 1.0, -1.5]:
+				for _marchingCubesExt in [False, True]:
+					
+					extractStructuresObj = extractStructuresMC(_threshVal, self.data, \
+					self.xlen, self.ylen, self.zlen, True, False, False, False, _marchingCubesExt, \
+					_lowMemory = _lowMemory)
+					np.testing.assert_array_equal(_session.extract(_threshVal, _marchingCubesExt), \
+					extractStructuresObj.extract())
+				
+				_mask = extractStructuresObj.c[:self.xlen, :self.ylen, :self.zlen]
+				self.assertEqual(_session.active_count(_threshVal), np.count_nonzero(_mask))
+		
+		_counts, _edges = _session.histogram(16)
+		self.assertEqual(_counts.sum(), len(self.data))
+		self.assertEqual((_edges[0], _edges[-1]), (self.data.min(), self.data.max()))
+	
+	def test_empty_threshold(self):
+		
+		# A sweep reaching beyond the largest value finds no structures
+		
+		_session = extractionSession(self.data, self.xlen, self.ylen, self.zlen, True)
+		
+		for _marchingCubesExt in [False, True]:
+			
+			structureGrid, _stats = _session.extract(100.0, _marchingCubesExt, _returnStatistics = True)
+			
+			self.assertEqual(structureGrid.max(), 0)
+			self.assertEqual(len(_stats['volume']), 0)
+			self.assertEqual(_session.extractor.stats.numberOfStructures, 0)
+		
+		self.assertEqual(_session.active_count(100.0), 0)
+		
+		# Vmax and Vall are 0
+		
+		_cwd = os.getcwd()
+		with tempfile.TemporaryDirectory() as _dir:
+			os.chdir(_dir)
+			try:
+				extractStructuresMC(100.0, self.data, self.xlen, self.ylen, self.zlen, \
+				True, False, False, True, False).extract()
+				with open('Percolation_threshold.txt') as fr:
+					self.assertEqual(fr.read(), '100.0 0 0\n')
+			finally:
+				os.chdir(_cwd)
+
+class TestComponentTree(unittest.TestCase):
+	
+	'''
+	
+	This script tests that the component tree gives the structures of
+	the array engine at any threshold beyond its floor, their volumes
+	and the structures containing them at a lower threshold, also after
+	saving and loading it.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_component_tree(self):
+		
+		for _floor, _thresholds in [(0.5, [0.5, 1.7, 3.0]), (-0.5, [-0.5, -2.2, -4.0])]:
+			
+			_tree = componentTree(build_component_tree(_floor, self.data, \
+			self.xlen, self.ylen, self.zlen, True, _runLength = 8))
+			
+			with tempfile.TemporaryDirectory() as _dir:
+				_tree.save(os.path.join(_dir, 'tree.npz'))
+				_loaded = load_component_tree(os.path.join(_dir, 'tree.npz'))
+			
+			for _threshVal in _thresholds:
+				
+				structureGrid = extractStructuresMC(_threshVal, self.data, \
+				self.xlen, self.ylen, self.zlen, True, False, False, False, False, \
+				_engine = 'array').extract()
+				
+				_labels, _structVal = _loaded.labels(_threshVal)
+				np.testing.assert_array_equal(_labels.ravel(), structureGrid)
+				self.assertEqual(_structVal, structureGrid.max())
+				
+				_volume = np.bincount(structureGrid)[1:]
+				_structures = _tree.structures(_threshVal, _minVolume = 3)
+				np.testing.assert_array_equal(_structures['label'], np.nonzero(_volume > 3)[0] + 1)
+				np.testing.assert_array_equal(_structures['volume'], _volume[_volume > 3])
+			
+			_upper = _tree.labels(_thresholds[2])[0]
+			_lower = _tree.labels(_thresholds[1])[0]
+			for l, _parent in enumerate(_tree.parents(_thresholds[2], _thresholds[1])):
+				self.assertTrue(np.all(_lower[_upper == l + 1] == _parent))
+			
+			with self.assertRaises(ValueError):
+				_tree.labels(_floor/2)
+
+class TestIterStructures(unittest.TestCase):
+	
+	'''
+	
+	This script tests that the structures yielded one at a time by the
+	neighbor scan are those of extract(), with and without MC.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_iter_structures(self):
+		
+		for _marchingCubesExt in [False, True]:
+			
+			extractStructuresObj = extractStructuresMC(1.0, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, _marchingCubesExt)
+			structureGrid = extractStructuresObj.extract()
+			
+			_structures = list(extractStructuresObj.iter_structures())
+			self.assertEqual([v['label'] for v in _structures], list(range(1, structureGrid.max() + 1)))
+			self.assertEqual(sum(v['outlierCaseCount'] for v in _structures), \
+			extractStructuresObj.outlierCaseCount)
+			
+			for _structure in _structures:
+				np.testing.assert_array_equal(_structure['voxels'], \
+				np.nonzero(structureGrid == _structure['label'])[0])
+				_i, _j, _k = np.unravel_index(_structure['voxels'], (self.xlen, self.ylen, self.zlen))
+				self.assertEqual(_structure['bbox'], (_i.min(), _i.max(), _j.min(), _j.max(), _k.min(), _k.max()))
+
+class TestStructureIndex(unittest.TestCase):
+	
+	'''
+	
+	This script tests that the CSR index returned by extract() gives
+	the voxels of every structure, also after saving it with the labels.
+	
+	'''
+	
+	xlen = 17
+	ylen = 23
+	zlen = 19
+	
+	data = smoothed_field((xlen, ylen, zlen))
+	
+	def test_structure_index(self):
+		
+		for _lowMemory in [False, True]:
+			
+			extractStructuresObj = extractStructuresMC(1.0, self.data, \
+			self.xlen, self.ylen, self.zlen, True, False, False, False, True, \
+			_lowMemory = _lowMemory)
+			structureGrid, _offsets, _voxels = extractStructuresObj.extract(_returnIndex = True)
+			
+			with tempfile.TemporaryDirectory() as _dir:
+				write_structure_index(os.path.join(_dir, 'index.npz'), structureGrid, _offsets, _voxels)
+				_labels, _offsets, _voxels = read_structure_index(os.path.join(_dir, 'index.npz'))
+			
+			np.testing.assert_array_equal(_labels, structureGrid)
+			self.assertEqual(len(_offsets), structureGrid.max() + 1)
+			
+			for l in range(1, structureGrid.max() + 1):
+				np.testing.assert_array_equal(_voxels[_offsets[l - 1]:_offsets[l]], \
+				np.nonzero(structureGrid == l)[0])
+
 if __name__ == '__main__':
 	
 	# Run unit tests.
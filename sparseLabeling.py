@@ -0,0 +1,134 @@
+import numpy as np
+import time
+from connectedComponents import forwardOffsets, union_pairs, find_roots, label_dtype
+from blockExtraction import threshold
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Labeling of the active (above threshold) voxels only, for fields with
+# a very low fill fraction. The active voxels are kept as sorted flat
+# C-order indices; their neighbors are found by binary search in that
+# list, and the links are resolved with the vectorized union-find. Time
+# and memory scale with the number of active voxels. The structures and
+# their numbering (by first voxel) are those of the neighbor scan
+# without MC correction.
+
+def active_voxels(c, _threshVal, _slabSize = 16):
+
+	'''
+
+	Returns the sorted flat C-order indices of the voxels of the 3D field
+	c (array or memmap) passing the threshold, thresholding c in slabs
+	along its slowest axis.
+
+	'''
+
+	_shape = np.shape(c)
+	_axis = 2 if c.flags.f_contiguous and not c.flags.c_contiguous else 0
+	_voxels = []
+
+	for n0 in range(0, _shape[_axis], _slabSize):
+
+		_slab = [slice(None)]*3
+		_slab[_axis] = slice(n0, min(n0 + _slabSize, _shape[_axis]))
+
+		_i, _j, _k = np.nonzero(threshold(np.asarray(c[tuple(_slab)]), _threshVal))
+		_index = [_i, _j, _k]
+		_index[_axis] = _index[_axis] + n0
+
+		_voxels.append((_index[0]*_shape[1] + _index[1])*_shape[2] + _index[2])
+
+	_voxels = np.concatenate(_voxels).astype(np.int64)
+
+	if _axis != 0:
+		_voxels.sort()
+
+	return _voxels
+
+def label_sparse(_voxels, _shape, _chunkSize = 2**20):
+
+	'''
+
+	Returns the label of every voxel in the sorted flat index array
+	_voxels of a grid of shape _shape, and the number of structures.
+
+	'''
+
+	xlen, ylen, zlen = _shape
+	_n = len(_voxels)
+	_parent = np.arange(_n, dtype = np.int64)
+
+	for n0 in range(0, _n, _chunkSize):
+
+		_v = _voxels[n0:n0 + _chunkSize]
+		_i, _r = np.divmod(_v, ylen*zlen)
+		_j, _k = np.divmod(_r, zlen)
+
+		for di, dj, dk in forwardOffsets:
+
+			_valid = np.nonzero((_i + di < xlen) & (_j + dj >= 0) & (_j + dj < ylen) & \
+			(_k + dk >= 0) & (_k + dk < zlen))[0]
+
+			_neighbor = _v[_valid] + (di*ylen + dj)*zlen + dk
+			_position = np.searchsorted(_voxels, _neighbor)
+			_found = _position < _n
+			_found[_found] = _voxels[_position[_found]] == _neighbor[_found]
+
+			union_pairs(_parent, _valid[_found] + n0, _position[_found])
+
+	# The root of a structure is its first voxel in C-order
+
+	_roots = find_roots(_parent, np.arange(_n, dtype = np.int64))
+	_isRoot = _roots == np.arange(_n)
+
+	return np.cumsum(_isRoot)[_roots], int(_isRoot.sum())
+
+def extract_sparse(_threshVal, c, xlen, ylen, zlen, _zFastest, _output = 'pairs', \
+verbose = False):
+
+	'''
+
+	Labels the structures of the field c (1D or 3D array, or memmap)
+	through its active voxels. With _output = 'pairs' returns the flat
+	C-order indices of the active voxels, their labels and the number
+	of structures; with _output = 'dense' returns the label grid (of
+	the narrowest unsigned type, shape (xlen, ylen, zlen)) and the
+	number of structures.
+
+	'''
+
+	if _output not in ('pairs', 'dense'):
+		raise ValueError('Unknown output: ' + str(_output))
+
+	start_time = time.time()
+	_shape = (xlen, ylen, zlen)
+
+	# Reshape data (a view, no copy is made)
+
+	if _zFastest:
+		c = np.reshape(c, _shape)
+	else:
+		c = np.reshape(c, _shape, order = 'F')
+
+	_voxels = active_voxels(c, _threshVal)
+	_labels, _structVal = label_sparse(_voxels, _shape)
+
+	if verbose:
+		print('Active voxels:', len(_voxels), 'structures:', _structVal, \
+		'time:', time.time() - start_time)
+
+	if _output == 'pairs':
+		return _voxels, _labels, _structVal
+
+	_out = np.zeros(_shape, dtype = label_dtype(_structVal))
+	_out.reshape(-1)[_voxels] = _labels
+
+	return _out, _structVal
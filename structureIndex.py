@@ -0,0 +1,71 @@
+import numpy as np
+from connectedComponents import index_dtype
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Compressed (CSR) index from structures to their voxels, built with one
+# stable sort of the labeled voxels. The voxels of structure l are
+#
+# _voxels[_offsets[l - 1]:_offsets[l]]
+#
+# (flat C-order indices into the label grid, in increasing order), so
+# fetching a structure costs its size instead of a pass over the grid.
+
+def structure_index(_labels, _chunkSize = 2**24):
+
+	'''
+
+	Returns the offsets (length n + 1) and the voxels of the CSR index of
+	the label grid _labels (any shape, 0 is empty space), reading it in
+	chunks of the flattened grid.
+
+	'''
+
+	_flat = np.reshape(_labels, -1)
+	_voxels = []
+	_ids = []
+
+	for n0 in range(0, len(_flat), _chunkSize):
+		_chunk = np.asarray(_flat[n0:n0 + _chunkSize])
+		_nonzero = np.flatnonzero(_chunk)
+		_voxels.append(_nonzero + n0)
+		_ids.append(_chunk[_nonzero])
+
+	_voxels = np.concatenate(_voxels).astype(index_dtype(len(_flat)))
+	_ids = np.concatenate(_ids)
+
+	# The voxels stay in increasing order within every structure
+
+	_order = np.argsort(_ids, kind = 'stable')
+	_counts = np.bincount(_ids, minlength = 1)[1:]
+	_offsets = np.zeros(len(_counts) + 1, dtype = np.int64)
+	np.cumsum(_counts, out = _offsets[1:])
+
+	return _offsets, _voxels[_order]
+
+def write_structure_index(_filename, _labels, _offsets, _voxels):
+
+	# Saves the label grid and its index together (.npz)
+
+	np.savez(_filename, labels = _labels, offsets = _offsets, voxels = _voxels)
+
+def read_structure_index(_filename):
+
+	'''
+
+	Returns the label grid, offsets and voxels written by
+	write_structure_index.
+
+	'''
+
+	_arrays = np.load(_filename)
+
+	return _arrays['labels'], _arrays['offsets'], _arrays['voxels']
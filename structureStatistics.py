@@ -0,0 +1,152 @@
+import numpy as np
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Per-structure statistics of a label grid, computed in one pass over
+# slabs of the grid with np.bincount reductions. The table is columnar:
+# a dictionary of equally long arrays, one row per structure 1 to n.
+# Extractions of a region of interest add the column truncated.
+
+# Columns of the table, in order
+statisticsColumns = ('label', 'volume', 'xmin', 'xmax', 'ymin', 'ymax', 'zmin', 'zmax', \
+'xc', 'yc', 'zc', 'xx', 'yy', 'zz', 'xy', 'xz', 'yz', 'truncated')
+
+def structure_statistics(_labels, _n = None, _slabSize = 16):
+
+	'''
+
+	Returns the statistics table of the 3D label grid _labels (0 is empty
+	space): label, voxel count (volume), bounding box, centroid (xc, yc,
+	zc) and the central second moments (xx, ..., yz), i.e. the covariance
+	of the voxel coordinates of every structure. _n is the number of
+	structures if known.
+
+	'''
+
+	if _n is None:
+		_n = 0
+		for i0 in range(0, np.shape(_labels)[0], _slabSize):
+			_n = max(_n, int(np.max(_labels[i0:i0 + _slabSize], initial = 0)))
+
+	_volume = np.zeros(_n + 1, dtype = np.int64)
+	_bbox = np.zeros((_n + 1, 6), dtype = np.int64)
+	_bbox[:, 0::2] = np.iinfo(np.int64).max
+	_bbox[:, 1::2] = -1
+
+	# Sums of x, y, z, x^2, y^2, z^2, xy, xz, yz
+	_sums = np.zeros((9, _n + 1), dtype = np.float64)
+
+	for i0 in range(0, np.shape(_labels)[0], _slabSize):
+
+		_slab = np.asarray(_labels[i0:i0 + _slabSize])
+		_i, _j, _k = np.nonzero(_slab)
+		_l = _slab[_i, _j, _k].astype(np.intp)
+		_i = _i + i0
+
+		_volume += np.bincount(_l, minlength = _n + 1)
+
+		for _col, _v in ((0, _i), (2, _j), (4, _k)):
+			np.minimum.at(_bbox[:, _col], _l, _v)
+			np.maximum.at(_bbox[:, _col + 1], _l, _v)
+
+		_i = _i.astype(np.float64)
+		_j = _j.astype(np.float64)
+		_k = _k.astype(np.float64)
+
+		for _row, _v in enumerate((_i, _j, _k, _i*_i, _j*_j, _k*_k, _i*_j, _i*_k, _j*_k)):
+			_sums[_row] += np.bincount(_l, weights = _v, minlength = _n + 1)
+
+	return _table(_volume[1:], _bbox[1:], _sums[:, 1:])
+
+def voxel_statistics(_voxelLists):
+
+	'''
+
+	Returns the statistics table of structures given as lists of voxels,
+	(n, 3) integer arrays. Structure ii + 1 is _voxelLists[ii].
+
+	'''
+
+	_n = len(_voxelLists)
+	_volume = np.zeros(_n, dtype = np.int64)
+	_bbox = np.zeros((_n, 6), dtype = np.int64)
+	_bbox[:, 0::2] = np.iinfo(np.int64).max
+	_bbox[:, 1::2] = -1
+	_sums = np.zeros((9, _n), dtype = np.float64)
+
+	for ii, _voxels in enumerate(_voxelLists):
+
+		if len(_voxels) == 0:
+			continue
+
+		_volume[ii] = len(_voxels)
+		_bbox[ii, 0::2] = np.min(_voxels, axis = 0)
+		_bbox[ii, 1::2] = np.max(_voxels, axis = 0)
+
+		_i, _j, _k = np.asarray(_voxels, dtype = np.float64).T
+		_sums[:, ii] = [np.sum(v) for v in (_i, _j, _k, _i*_i, _j*_j, _k*_k, _i*_j, _i*_k, _j*_k)]
+
+	return _table(_volume, _bbox, _sums)
+
+def _table(_volume, _bbox, _sums):
+
+	# Statistics table from the voxel counts, bounding boxes and the
+	# coordinate sums of structures 1 to n
+
+	_n = len(_volume)
+	_mean = _sums/np.maximum(_volume, 1)
+
+	_stats = {'label': np.arange(1, _n + 1, dtype = np.int64), 'volume': _volume}
+
+	for _col, _name in enumerate(('xmin', 'xmax', 'ymin', 'ymax', 'zmin', 'zmax')):
+		_stats[_name] = _bbox[:, _col]
+
+	_stats['xc'], _stats['yc'], _stats['zc'] = _mean[0], _mean[1], _mean[2]
+	_stats['xx'] = _mean[3] - _mean[0]*_mean[0]
+	_stats['yy'] = _mean[4] - _mean[1]*_mean[1]
+	_stats['zz'] = _mean[5] - _mean[2]*_mean[2]
+	_stats['xy'] = _mean[6] - _mean[0]*_mean[1]
+	_stats['xz'] = _mean[7] - _mean[0]*_mean[2]
+	_stats['yz'] = _mean[8] - _mean[1]*_mean[2]
+
+	return _stats
+
+def write_statistics(_stats, _filename):
+
+	'''
+
+	Writes the statistics table once, in the format given by the file
+	extension: .npz (one array per column), .npy (structured array) or
+	.csv (header line with the column names).
+
+	'''
+
+	_names = [v for v in statisticsColumns if v in _stats]
+
+	if _filename.endswith('.npz'):
+
+		np.savez(_filename, **{v: _stats[v] for v in _names})
+
+	elif _filename.endswith('.npy'):
+
+		_table = np.zeros(len(_stats[_names[0]]), dtype = [(v, _stats[v].dtype) for v in _names])
+		for v in _names:
+			_table[v] = _stats[v]
+		np.save(_filename, _table)
+
+	elif _filename.endswith('.csv'):
+
+		_formats = ['%d' if np.issubdtype(_stats[v].dtype, np.integer) else '%.9g' for v in _names]
+		np.savetxt(_filename, np.column_stack([_stats[v].astype(object) for v in _names]), \
+		fmt = _formats, delimiter = ',', header = ','.join(_names), comments = '')
+
+	else:
+		raise ValueError('Unknown statistics file format: ' + str(_filename))
@@ -0,0 +1,170 @@
+import numpy as np
+from connectedComponents import label_counts
+
+#---------------------------------------------------------------------#
+
+# ---------Analysis of Multiscale Data from the Geosciences---------- #
+
+# Author: Abhishek Harikrishnan
+# Email: abhishek.harikrishnan@fu-berlin.de
+# Last updated: 18-10-2026
+
+#---------------------------------------------------------------------#
+
+# Tracking of structures between consecutive snapshots by the overlap
+# of their labels. The sparse overlap matrix of two label grids is
+# built in one pass: every voxel labeled in both grids gives the pair
+# key (a << 32) | b, and the keys are counted by sorting. A structure
+# with several successors has split, one with several predecessors is
+# the result of a merge.
+
+def _sorted_counts(_keys):
+
+	# Unique values of the sorted array _keys and their counts
+
+	if len(_keys) == 0:
+		return _keys, np.zeros(0, dtype = np.int64)
+
+	_starts = np.nonzero(np.concatenate(([True], _keys[1:] != _keys[:-1])))[0]
+
+	return _keys[_starts], np.diff(np.append(_starts, len(_keys)))
+
+def overlap_matrix(_labelsA, _labelsB, _chunkSize = 2**22):
+
+	'''
+
+	Returns the nonzero entries of the overlap matrix of two label grids
+	of the same shape (0 is empty space) as three int64 arrays: label in
+	A, label in B and number of shared voxels, ordered by (a, b). The
+	grids are read in chunks of _chunkSize voxels.
+
+	'''
+
+	if np.shape(_labelsA) != np.shape(_labelsB):
+		raise ValueError('The label grids differ in shape: ' + str(np.shape(_labelsA)) \
+		+ ', ' + str(np.shape(_labelsB)))
+
+	_labelsA = np.reshape(_labelsA, -1)
+	_labelsB = np.reshape(_labelsB, -1)
+
+	_keys = []
+	_counts = []
+
+	for n0 in range(0, len(_labelsA), _chunkSize):
+
+		_a = np.asarray(_labelsA[n0:n0 + _chunkSize])
+		_b = np.asarray(_labelsB[n0:n0 + _chunkSize])
+		_both = (_a > 0) & (_b > 0)
+
+		_k, _c = _sorted_counts(np.sort((_a[_both].astype(np.int64) << 32) | \
+		_b[_both].astype(np.int64)))
+		_keys.append(_k)
+		_counts.append(_c)
+
+	# Combine the chunks
+
+	_keys = np.concatenate(_keys)
+	_counts = np.concatenate(_counts)
+	_order = np.argsort(_keys, kind = 'stable')
+	_keys, _n = _sorted_counts(_keys[_order])
+	_counts = np.add.reduceat(_counts[_order], np.cumsum(_n) - _n) if len(_keys) else _counts
+
+	return _keys >> 32, _keys & 0xffffffff, _counts.astype(np.int64)
+
+def track_structures(_labelsA, _labelsB, _minFraction = 0.0, _chunkSize = 2**22):
+
+	'''
+
+	Returns the links between the structures of two consecutive label
+	grids as a table (dictionary of columns): a, b, overlap (voxels),
+	fractionA (share of structure a going to b) and fractionB (share of
+	structure b coming from a), ordered by (a, b), and orderB, the rows
+	in order of b. Links where both fractions are below _minFraction are
+	dropped.
+
+	'''
+
+	_a, _b, _overlap = overlap_matrix(_labelsA, _labelsB, _chunkSize)
+
+	_volumeA = label_counts(np.reshape(_labelsA, -1), _chunkSize)
+	_volumeB = label_counts(np.reshape(_labelsB, -1), _chunkSize)
+
+	_fractionA = _overlap/_volumeA[_a]
+	_fractionB = _overlap/_volumeB[_b]
+
+	_keep = (_fractionA >= _minFraction) | (_fractionB >= _minFraction)
+
+	return {'a': _a[_keep], 'b': _b[_keep], 'overlap': _overlap[_keep], \
+	'fractionA': _fractionA[_keep], 'fractionB': _fractionB[_keep], \
+	'orderB': np.argsort(_b[_keep], kind = 'stable')}
+
+def successors(_links, a):
+
+	# Labels in the next snapshot structure a overlaps with, and the
+	# share of a going to each. The links are sorted by a.
+
+	n0, n1 = np.searchsorted(_links['a'], (a, a + 1))
+
+	return _links['b'][n0:n1], _links['fractionA'][n0:n1]
+
+def predecessors(_links, b):
+
+	# Labels in the previous snapshot overlapping structure b, and the
+	# share of b coming from each, found in the rows sorted by b
+
+	n0, n1 = np.searchsorted(_links['b'], (b, b + 1), sorter = _links['orderB'])
+	_rows = _links['orderB'][n0:n1]
+
+	return _links['a'][_rows], _links['fractionB'][_rows]
+
+def track_series(_labelGrids, _minFraction = 0.0, _chunkSize = 2**22):
+
+	'''
+
+	Chains track_structures over an iterable of label grids (e.g. a
+	generator such as manifest_labels) and returns the list of link
+	tables between snapshots t and t + 1. A snapshot given as None (a
+	failed one) breaks the tracks: the tables before and after it are
+	None, so no structure is linked across the gap. Only two grids are
+	referenced at a time.
+
+	'''
+
+	_series = []
+	_first = True
+	_previous = None
+
+	for _labels in _labelGrids:
+
+		if not _first:
+			if _previous is None or _labels is None:
+				_series.append(None)
+			else:
+				_series.append(track_structures(_previous, _labels, _minFraction, _chunkSize))
+
+		_first = False
+		_previous = _labels
+
+	return _series
+
+def manifest_labels(_manifest):
+
+	'''
+
+	Yields the label grids written by batchExtraction.extract_series as
+	memmaps, in the order of the snapshots, and None for the failed
+	snapshots (see track_series).
+
+	'''
+
+	_settings = _manifest['settings']
+	_shape = (_settings['xlen'], _settings['ylen'], _settings['zlen'])
+
+	for _entry in _manifest['snapshots']:
+
+		if _entry['status'] != 'ok':
+			yield None
+			continue
+
+		yield np.memmap(_entry['labels'], dtype = np.dtype(_entry['labelsDtype']), \
+		mode = 'r', shape = _shape)